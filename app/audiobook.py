@@ -0,0 +1,417 @@
+# -*- coding: utf-8 -*-
+"""
+有声书模式：逐行读取大文本文件，按章节标题切分，每章输出一个 MP3 和 SRT，
+最后生成 M3U8 播放列表和 CUE 索引。
+
+整本书不会一次读入内存：正文按引擎单次请求长度分段，同时合成的分段数有上限，
+分段按顺序合成完毕后立即追加到当前章节的文件中，内存占用与书的大小无关。
+每章完成后写入检查点（<output-dir>/.audiobook.json），中断后重新运行会从未完成的章节继续。
+
+用法：python -m app.audiobook novel.txt -o storage/output/novel --voice zh-CN-YunxiNeural-Male
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TextIO
+
+from loguru import logger
+
+from app.services import subtitle, voice
+from app.utils import audio, utils
+
+if TYPE_CHECKING:
+    from app.config.settings import Settings
+
+CHECKPOINT_FILE = ".audiobook.json"
+PLAYLIST_FILE = "playlist.m3u8"
+CUE_FILE = "audiobook.cue"
+
+# 常见的中英文章节标题：第十二章 / 第3回 / Chapter 12 / PART IV / 序章 / 尾声 等
+CHAPTER_PATTERN = re.compile(
+    r"^\s*(第[0-9０-９零〇一二两三四五六七八九十百千万]+[章回节卷部篇集]"
+    r"|(chapter|part|book)\s+([0-9]+|[ivxlcdm]+)\b"
+    r"|(序章|序言|楔子|引子|尾声|后记|番外|prologue|epilogue)\b)",
+    re.IGNORECASE,
+)
+# 超过这个长度的行视为正文，不会被当作章节标题
+_MAX_TITLE_CHARS = 50
+# 单次读取的最大字符数，没有换行的超长段落按此长度分批处理
+_MAX_LINE_CHARS = 65536
+_UNSAFE_FILENAME = re.compile(r'[\\/:*?"<>|\s]+')
+
+
+@dataclass(slots=True)
+class ChapterResult:
+    index: int
+    title: str
+    audio_file: str
+    subtitle_file: str
+    duration: float
+    sentences: int
+
+
+def _iter_lines(stream: TextIO) -> Iterator[str]:
+    while True:
+        line = stream.readline(_MAX_LINE_CHARS)
+        if not line:
+            return
+        yield line
+
+
+def iter_document(
+    stream: TextIO, max_chars: int, pattern: re.Pattern = CHAPTER_PATTERN
+) -> Iterator[tuple[str, str]]:
+    """
+    逐行读取文本，产出 ("chapter", 标题) 和 ("chunk", 正文分段) 两种事件。
+    分段不超过 max_chars，只在句子边界处切分；第一个标题之前的正文属于标题为空的第 0 章。
+    连续的标题（如卷名后紧跟章名）合并为一个标题，没有正文的章节不会产出，标题会作为本章开头朗读。
+    """
+
+    buffer = ""
+    title: Optional[str] = ""
+    for line in _iter_lines(stream):
+        text = line.strip()
+        if not text:
+            continue
+        if len(text) <= _MAX_TITLE_CHARS and pattern.match(text):
+            if buffer:
+                yield "chunk", buffer
+                buffer = ""
+            title = f"{title} {text}" if title else text
+            continue
+        if title is not None:
+            yield "chapter", title
+            # 章节标题作为本章的第一段朗读
+            buffer = title
+            title = None
+        for piece in utils.split_text_into_chunks(text, max_chars):
+            if buffer and len(buffer) + len(piece) + 1 > max_chars:
+                yield "chunk", buffer
+                buffer = ""
+            buffer = f"{buffer}\n{piece}" if buffer else piece
+    if buffer:
+        yield "chunk", buffer
+
+
+def _count_sentences(text: str) -> int:
+    return sum(1 for _ in utils.iter_sentence_spans(text))
+
+
+def scan_document(path: str, max_chars: int, pattern: re.Pattern = CHAPTER_PATTERN) -> tuple[int, int]:
+    """
+    预先扫描一遍，返回 (章节数, 句子数)，用于汇报进度。
+    """
+
+    chapters = sentences = 0
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for kind, value in iter_document(f, max_chars, pattern):
+            if kind == "chapter":
+                chapters += 1
+            else:
+                sentences += _count_sentences(value)
+    return chapters, sentences
+
+
+def file_digest(path: str) -> str:
+    """
+    分块计算文件内容的 MD5，同一份文本换了路径或重新上传后仍能对上检查点。
+    """
+
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _chapter_name(index: int, title: str) -> str:
+    safe_title = _UNSAFE_FILENAME.sub("_", title).strip("_")[:40]
+    return f"{index:03d}-{safe_title}" if safe_title else f"{index:03d}"
+
+
+class AudiobookRenderer:
+    """
+    把一个文本文件渲染为按章节拆分的有声书。
+
+    workers 为同时合成的分段数；progress 以 (已完成句数, 总句数) 回调，
+    断点续传时已完成章节的句数直接计入。
+    """
+
+    def __init__(
+        self,
+        source: str,
+        output_dir: str,
+        voice_name: str,
+        voice_rate: float = 1.0,
+        voice_volume: float = 1.0,
+        workers: int = 4,
+        use_cache: bool = True,
+        settings: Optional[Settings] = None,
+        pattern: re.Pattern = CHAPTER_PATTERN,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        engine = voice.resolve_engine(voice_name)
+        if engine is None:
+            raise ValueError(f"no tts engine matched voice: {voice_name}")
+        self.source = source
+        self.output_dir = output_dir
+        self.voice_name = voice_name
+        self.voice_rate = voice_rate
+        self.voice_volume = voice_volume
+        self.workers = max(1, workers)
+        self.use_cache = use_cache
+        self.settings = settings
+        self.pattern = pattern
+        self.progress = progress
+        self.max_chars = engine.max_chunk_chars
+        self.checkpoint_file = os.path.join(output_dir, CHECKPOINT_FILE)
+        self.chapters: list[ChapterResult] = []
+        self._done_sentences = 0
+        self._total_sentences = 0
+
+    def _fingerprint(self) -> str:
+        return utils.md5(
+            json.dumps(
+                [
+                    file_digest(self.source),
+                    self.voice_name,
+                    self.voice_rate,
+                    self.voice_volume,
+                    self.max_chars,
+                    self.pattern.pattern,
+                ]
+            )
+        )
+
+    def _load_checkpoint(self, fingerprint: str) -> dict[int, ChapterResult]:
+        try:
+            with open(self.checkpoint_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("fingerprint") != fingerprint:
+            logger.info("source or voice settings changed, rendering from the beginning")
+            return {}
+        finished = {}
+        for item in data.get("chapters", []):
+            chapter = ChapterResult(**item)
+            if os.path.exists(os.path.join(self.output_dir, chapter.audio_file)):
+                finished[chapter.index] = chapter
+        return finished
+
+    def _save_checkpoint(self, fingerprint: str) -> None:
+        data = {"fingerprint": fingerprint, "chapters": [asdict(c) for c in self.chapters]}
+        utils.atomic_write(
+            self.checkpoint_file, json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8")
+        )
+
+    def _report(self, sentences: int) -> None:
+        self._done_sentences += sentences
+        if self.progress is not None:
+            self.progress(min(self._done_sentences, self._total_sentences), self._total_sentences)
+
+    async def _synthesize(self, text: str):
+        result = await voice.atts_audio(
+            text=text,
+            voice_name=self.voice_name,
+            voice_rate=self.voice_rate,
+            voice_volume=self.voice_volume,
+            use_cache=self.use_cache,
+            settings=self.settings,
+        )
+        if result is None:
+            raise RuntimeError(f"speech synthesis failed: {text[:30]}")
+        return result
+
+    async def _render_chapter(
+        self, index: int, title: str, chunks: Iterator[str]
+    ) -> ChapterResult:
+        """
+        按顺序合成一章的分段。最多 workers 个分段同时合成，最早提交的分段完成后立即写出，
+        因此内存中最多只有 workers 段音频。写入 .part 文件，整章完成后再改名。
+        """
+
+        name = _chapter_name(index, title)
+        audio_file = os.path.join(self.output_dir, f"{name}.mp3")
+        subtitle_file = os.path.join(self.output_dir, f"{name}.srt")
+        pending: deque[tuple[str, asyncio.Task]] = deque()
+        samples = sample_rate = cue_index = sentences = 0
+
+        async def _write_head(audio_out, srt_out) -> None:
+            nonlocal samples, sample_rate, cue_index, sentences
+            text, task = pending.popleft()
+            result = await task
+            join = await asyncio.to_thread(audio.concat_mp3, [result.audio], audio_out)
+            offset = join.samples_to_100ns(samples)
+            samples += join.total_samples
+            sample_rate = join.sample_rate
+
+            cues = subtitle.align_subtitles(result.sub_maker, text)
+            for cue in cues:
+                cue_index += 1
+                cue.index = cue_index
+                cue.start += offset
+                cue.end += offset
+            if cues:
+                srt_out.write(subtitle.to_srt(cues))
+            count = _count_sentences(text)
+            sentences += count
+            self._report(count)
+
+        with open(audio_file + ".part", "wb") as audio_out, open(
+            subtitle_file + ".part", "w", encoding="utf-8"
+        ) as srt_out:
+            try:
+                for text in chunks:
+                    pending.append((text, asyncio.ensure_future(self._synthesize(text))))
+                    if len(pending) >= self.workers:
+                        await _write_head(audio_out, srt_out)
+                while pending:
+                    await _write_head(audio_out, srt_out)
+            finally:
+                for _, task in pending:
+                    task.cancel()
+
+        os.replace(audio_file + ".part", audio_file)
+        os.replace(subtitle_file + ".part", subtitle_file)
+        duration = samples / sample_rate if sample_rate else 0.0
+        logger.success(f"chapter {index} rendered: {os.path.basename(audio_file)}, {duration:.1f}s")
+        return ChapterResult(
+            index=index,
+            title=title,
+            audio_file=os.path.basename(audio_file),
+            subtitle_file=os.path.basename(subtitle_file),
+            duration=duration,
+            sentences=sentences,
+        )
+
+    async def arender(self) -> list[ChapterResult]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        fingerprint = await asyncio.to_thread(self._fingerprint)
+        finished = self._load_checkpoint(fingerprint)
+        self.chapters = []
+        self._done_sentences = 0
+        chapter_count, self._total_sentences = await asyncio.to_thread(
+            scan_document, self.source, self.max_chars, self.pattern
+        )
+        logger.info(
+            f"audiobook: {chapter_count} chapters, {self._total_sentences} sentences, "
+            f"{len(finished)} already rendered"
+        )
+
+        with open(self.source, "r", encoding="utf-8-sig") as f:
+            events = iter_document(f, self.max_chars, self.pattern)
+            index = -1
+            event = next(events, None)
+            while event is not None:
+                index += 1
+                title = event[1]
+
+                def _chapter_chunks() -> Iterator[str]:
+                    # 消费到下一个章节标题为止，标题事件留给外层循环
+                    nonlocal event
+                    for event in events:
+                        if event[0] == "chapter":
+                            return
+                        yield event[1]
+                    event = None
+
+                chunks = _chapter_chunks()
+                if index in finished:
+                    for _ in chunks:
+                        pass
+                    chapter = finished[index]
+                    self._report(chapter.sentences)
+                else:
+                    chapter = await self._render_chapter(index, title, chunks)
+                self.chapters.append(chapter)
+                self._save_checkpoint(fingerprint)
+
+        self.write_playlists()
+        return self.chapters
+
+    def render(self) -> list[ChapterResult]:
+        return utils.run_async(self.arender())
+
+    def write_playlists(self) -> None:
+        """
+        写出 M3U8 播放列表和 CUE 索引，路径均相对输出目录。
+        """
+
+        book_title = os.path.splitext(os.path.basename(self.source))[0]
+        lines = ["#EXTM3U", f"#PLAYLIST:{book_title}"]
+        cue = [f'TITLE "{book_title}"']
+        for chapter in self.chapters:
+            title = chapter.title or book_title
+            lines.append(f"#EXTINF:{round(chapter.duration)},{title}")
+            lines.append(chapter.audio_file)
+            cue.append(f'FILE "{chapter.audio_file}" MP3')
+            cue.append(f"  TRACK {chapter.index + 1:02d} AUDIO")
+            cue.append(f'    TITLE "{title}"')
+            cue.append("    INDEX 01 00:00:00")
+        utils.atomic_write(
+            os.path.join(self.output_dir, PLAYLIST_FILE), ("\n".join(lines) + "\n").encode("utf-8")
+        )
+        utils.atomic_write(
+            os.path.join(self.output_dir, CUE_FILE), ("\n".join(cue) + "\n").encode("utf-8")
+        )
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render a text file to a chaptered audiobook")
+    parser.add_argument("source", help="UTF-8 text file")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--voice", required=True, help="voice name")
+    parser.add_argument("--rate", type=float, default=1.0)
+    parser.add_argument("--volume", type=float, default=1.0)
+    parser.add_argument("--workers", type=int, default=4, help="chunks synthesized at once")
+    parser.add_argument("--chapter-pattern", default="", help="regex matching chapter titles")
+    parser.add_argument("--no-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    pattern = re.compile(args.chapter_pattern) if args.chapter_pattern else CHAPTER_PATTERN
+    renderer = AudiobookRenderer(
+        args.source,
+        os.path.abspath(args.output_dir),
+        args.voice,
+        voice_rate=args.rate,
+        voice_volume=args.volume,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+        pattern=pattern,
+    )
+    try:
+        chapters = renderer.render()
+    except KeyboardInterrupt:
+        logger.warning("interrupted, run the same command again to resume")
+        return 130
+    except Exception as exc:
+        logger.error(f"audiobook failed, run the same command again to resume: {str(exc)}")
+        return 1
+
+    total = sum(chapter.duration for chapter in chapters)
+    print(f"rendered {len(chapters)} chapters, {total / 60:.1f} minutes, playlist: {PLAYLIST_FILE}")
+    return 0
+
+
+__all__ = [
+    "AudiobookRenderer",
+    "CHAPTER_PATTERN",
+    "ChapterResult",
+    "file_digest",
+    "iter_document",
+    "main",
+    "scan_document",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
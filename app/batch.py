@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+命令行批量合成：读取 JSONL 或 CSV 清单，逐条合成音频和字幕。
+
+清单每条记录的字段：
+    text      要合成的文本（必填）
+    voice     声音名称，缺省时使用 --voice
+    rate      语速，取值 0.25 ~ 4.0，缺省时使用 --rate
+    volume    音量，取值 0 ~ 5.0，缺省时使用 --volume
+    output    输出文件名（相对 --output-dir），缺省时按行号命名，没有扩展名时补 .mp3
+
+已完成的条目记录在检查点文件中（默认 <output-dir>/.checkpoint.jsonl），中断后重新运行同一命令
+会跳过这些条目；条目的文本、声音、语速、音量或输出名变化后会重新合成。
+
+用法：python -m app.batch manifest.jsonl -o storage/output/batch [--concurrency 16]
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from app.services import voice
+from app.utils import utils
+
+CHECKPOINT_FILE = ".checkpoint.jsonl"
+
+# 语速取 SiliconFlow speed 参数的范围，音量与 WebUI 的可选范围一致
+RATE_RANGE = (0.25, 4.0)
+VOLUME_RANGE = (0.0, 5.0)
+
+
+@dataclass(slots=True)
+class ManifestItem:
+    line: int
+    text: str
+    voice_name: str
+    voice_rate: float
+    voice_volume: float
+    output: str
+
+    @property
+    def key(self) -> str:
+        # 任何影响输出的字段变化都会得到新的 key，从而重新合成
+        return utils.md5(
+            json.dumps(
+                [self.text, self.voice_name, self.voice_rate, self.voice_volume, self.output],
+                ensure_ascii=False,
+            )
+        )
+
+
+@dataclass(slots=True)
+class BatchStats:
+    total: int = 0
+    skipped: int = 0
+    succeeded: int = 0
+    failed: int = 0
+    chars: int = 0
+    interrupted: bool = False
+    started: float = field(default_factory=time.monotonic)
+    failures: list[tuple[ManifestItem, str]] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def summary(self) -> str:
+        elapsed = max(self.elapsed, 1e-6)
+        return (
+            f"rendered {self.succeeded}, failed {self.failed}, skipped {self.skipped} "
+            f"of {self.total} in {elapsed:.1f}s: "
+            f"{self.succeeded / elapsed:.2f} items/s, {self.chars / elapsed:.0f} chars/s"
+        )
+
+
+def _read_records(path: str) -> Iterator[tuple[int, dict]]:
+    if path.lower().endswith(".csv"):
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            # 表头占第 1 行，数据从第 2 行开始
+            for line, row in enumerate(csv.DictReader(f), start=2):
+                yield line, row
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line, content in enumerate(f, start=1):
+            content = content.strip()
+            if not content or content.startswith("#"):
+                continue
+            try:
+                record = json.loads(content)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"{path}:{line}: invalid json, {exc.msg}") from None
+            if not isinstance(record, dict):
+                raise ValueError(f"{path}:{line}: each line must be a json object")
+            yield line, record
+
+
+def _output_name(value: str, line: int) -> str:
+    name = os.path.normpath(value.strip()) if value and value.strip() else f"{line:06d}"
+    if os.path.isabs(name) or name.split(os.sep)[0] == "..":
+        raise ValueError(f"output must be a relative path inside the output dir: {value}")
+    if not utils.parse_extension(name):
+        name += ".mp3"
+    return name
+
+
+def _number(record: dict, names: tuple[str, ...], default: float, bounds: tuple) -> float:
+    # 只有字段不存在、为 null 或空字符串时才使用默认值，0 是合法的取值
+    value = default
+    for name in names:
+        if record.get(name) is not None and str(record[name]).strip() != "":
+            value = record[name]
+            break
+    number = float(value)
+    low, high = bounds
+    if not low <= number <= high:
+        raise ValueError(f"{names[0]} must be between {low} and {high}, got {value}")
+    return number
+
+
+def load_manifest(
+    path: str, voice_name: str = "", voice_rate: float = 1.0, voice_volume: float = 1.0
+) -> list[ManifestItem]:
+    """
+    读取清单并用命令行参数补全缺省字段，字段不合法时抛出 ValueError 并指出所在行。
+    """
+
+    items = []
+    outputs: dict[str, int] = {}
+    for line, record in _read_records(path):
+        text = str(record.get("text") or "").strip()
+        if not text:
+            raise ValueError(f"{path}:{line}: text is required")
+        name = str(record.get("voice") or record.get("voice_name") or voice_name).strip()
+        if not name:
+            raise ValueError(f"{path}:{line}: voice is required (or pass --voice)")
+        try:
+            rate = _number(record, ("rate", "voice_rate"), voice_rate, RATE_RANGE)
+            volume = _number(record, ("volume", "voice_volume"), voice_volume, VOLUME_RANGE)
+            output = _output_name(str(record.get("output") or ""), line)
+        except ValueError as exc:
+            raise ValueError(f"{path}:{line}: {exc}") from None
+        if output in outputs:
+            raise ValueError(
+                f"{path}:{line}: output {output} is also used on line {outputs[output]}"
+            )
+        outputs[output] = line
+        items.append(ManifestItem(line, text, name, rate, volume, output))
+    return items
+
+
+def load_checkpoint(path: str) -> set[str]:
+    """
+    返回检查点中已完成条目的 key。写到一半的最后一行会被忽略。
+    """
+
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for content in f:
+            try:
+                done.add(json.loads(content)["key"])
+            except (ValueError, KeyError, TypeError):
+                continue
+    return done
+
+
+def render(
+    items: list[ManifestItem],
+    output_dir: str,
+    checkpoint_file: str,
+    concurrency: Optional[int] = None,
+    subtitles: bool = True,
+    use_cache: bool = True,
+    progress_every: int = 100,
+) -> BatchStats:
+    """
+    合成清单中尚未完成的条目。每完成一条就追加到检查点文件，中断后已完成的条目不会丢失。
+    收到 Ctrl+C 时取消剩余条目并返回已有的统计，stats.interrupted 为 True。
+    """
+
+    stats = BatchStats(total=len(items))
+    done = load_checkpoint(checkpoint_file)
+
+    pending = []
+    for item in items:
+        if item.key in done and os.path.exists(os.path.join(output_dir, item.output)):
+            stats.skipped += 1
+        else:
+            pending.append(item)
+    if stats.skipped:
+        logger.info(f"resuming from checkpoint, skipped {stats.skipped} finished items")
+    if not pending:
+        return stats
+
+    requests = []
+    for item in pending:
+        audio_file = os.path.join(output_dir, item.output)
+        os.makedirs(os.path.dirname(audio_file), exist_ok=True)
+        requests.append(
+            voice.TTSRequest(
+                text=item.text,
+                voice_name=item.voice_name,
+                voice_rate=item.voice_rate,
+                voice_volume=item.voice_volume,
+                voice_file=audio_file,
+            )
+        )
+
+    results = voice.tts_batch(requests, max_concurrency=concurrency, use_cache=use_cache)
+    with open(checkpoint_file, "a", encoding="utf-8") as checkpoint:
+        try:
+            for result in results:
+                item = pending[result.index]
+                audio_file = result.request.voice_file
+                if result.status != "success" or not os.path.exists(audio_file):
+                    stats.failed += 1
+                    stats.failures.append((item, result.error or "speech synthesis failed"))
+                    continue
+
+                if subtitles:
+                    subtitle_file = os.path.splitext(audio_file)[0] + ".srt"
+                    voice.create_subtitle(
+                        sub_maker=result.sub_maker, text=item.text, subtitle_file=subtitle_file
+                    )
+                checkpoint.write(json.dumps({"key": item.key, "output": item.output}) + "\n")
+                checkpoint.flush()
+                stats.succeeded += 1
+                stats.chars += len(item.text)
+
+                finished = stats.succeeded + stats.failed
+                if progress_every and finished % progress_every == 0:
+                    logger.info(f"{finished}/{len(pending)}: {stats.summary()}")
+        except KeyboardInterrupt:
+            # 关闭迭代器会取消后台事件循环上尚未完成的请求
+            results.close()
+            stats.interrupted = True
+    return stats
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Render a JSONL/CSV manifest to audio files")
+    parser.add_argument("manifest", help="JSONL or CSV manifest")
+    parser.add_argument("-o", "--output-dir", required=True)
+    parser.add_argument("--checkpoint", default="", help=f"default: <output-dir>/{CHECKPOINT_FILE}")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="max concurrent requests, default: batch.max_concurrency")
+    parser.add_argument("--voice", default="", help="default voice name")
+    parser.add_argument("--rate", type=float, default=1.0, help="default voice rate")
+    parser.add_argument("--volume", type=float, default=1.0, help="default voice volume")
+    parser.add_argument("--no-subtitles", action="store_true")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--progress-every", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    try:
+        items = load_manifest(args.manifest, args.voice, args.rate, args.volume)
+    except (OSError, ValueError) as exc:
+        logger.error(str(exc))
+        return 2
+
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_file = args.checkpoint or os.path.join(output_dir, CHECKPOINT_FILE)
+    logger.info(f"rendering {len(items)} items from {args.manifest} to {output_dir}")
+
+    stats = render(
+        items,
+        output_dir,
+        checkpoint_file,
+        concurrency=args.concurrency,
+        subtitles=not args.no_subtitles,
+        use_cache=not args.no_cache,
+        progress_every=args.progress_every,
+    )
+
+    for item, error in stats.failures[:20]:
+        logger.error(f"line {item.line} ({item.output}) failed: {error}")
+    if len(stats.failures) > 20:
+        logger.error(f"... and {len(stats.failures) - 20} more failures")
+    print(stats.summary())
+    if stats.interrupted:
+        logger.warning(f"interrupted, run the same command again to resume from {checkpoint_file}")
+        return 130
+    return 1 if stats.failed else 0
+
+
+__all__ = ["BatchStats", "ManifestItem", "load_checkpoint", "load_manifest", "main", "render"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,6 +6,8 @@ import socket
 import toml
 from loguru import logger
 
+from app.utils import utils
+
 root_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 config_file = f"{root_dir}/config.toml"
 
@@ -32,25 +34,81 @@ def load_config():
     return _config_
 
 
-def save_config():
-    with open(config_file, "w", encoding="utf-8") as f:
-        _cfg["azure"] = azure
-        _cfg["siliconflow"] = siliconflow
-        _cfg["ui"] = ui
-        f.write(toml.dumps(_cfg))
+def save_config() -> bool:
+    """
+    把 azure、siliconflow 和 ui 的当前值写回 config.toml，内容与上次读写时相同则跳过。
+    先写临时文件再 rename，其他进程不会读到写了一半的配置。返回是否实际写入。
+    """
+
+    global _saved_content
+    _cfg["azure"] = azure
+    _cfg["siliconflow"] = siliconflow
+    _cfg["ui"] = ui
+    content = toml.dumps(_cfg)
+    if content == _saved_content:
+        return False
+    utils.atomic_write(config_file, content.encode("utf-8"))
+    _saved_content = content
+    return True
+
+
+def reload_config() -> None:
+    """
+    重新读取 config.toml，原地更新各配置字典，已经持有这些字典引用的模块会看到新值。
+    """
+
+    global _saved_content
+    new_cfg = load_config()
+    for name, section in _sections().items():
+        present = name in new_cfg
+        section.clear()
+        section.update(new_cfg.get(name, _DEFAULT_UI if name == "ui" else {}))
+        if present or name in ("azure", "siliconflow", "ui"):
+            new_cfg[name] = section
+    _cfg.clear()
+    _cfg.update(new_cfg)
+    _saved_content = toml.dumps(_cfg)
+
+
+def _sections() -> dict:
+    return {
+        "azure": azure,
+        "siliconflow": siliconflow,
+        "cache": cache,
+        "long_text": long_text,
+        "batch": batch,
+        "jobs": jobs,
+        "server": server,
+        "storage": storage,
+        "retry": retry,
+        "rate_limit": rate_limit,
+        "credentials": credentials,
+        "voices": voices,
+        "ui": ui,
+    }
 
 
 _cfg = load_config()
 azure = _cfg.get("azure", {})
 siliconflow = _cfg.get("siliconflow", {})
-ui = _cfg.get(
-    "ui",
-    {
-        "language": "zh",
-        "tts_server": "azure-tts-v1",
-        "voice_name": "",
-    },
-)
+cache = _cfg.get("cache", {})
+long_text = _cfg.get("long_text", {})
+batch = _cfg.get("batch", {})
+jobs = _cfg.get("jobs", {})
+server = _cfg.get("server", {})
+storage = _cfg.get("storage", {})
+retry = _cfg.get("retry", {})
+rate_limit = _cfg.get("rate_limit", {})
+credentials = _cfg.get("credentials", {})
+voices = _cfg.get("voices", {})
+_DEFAULT_UI = {
+    "language": "zh",
+    "tts_server": "azure-tts-v1",
+    "voice_name": "",
+}
+ui = _cfg.get("ui", dict(_DEFAULT_UI))
+# 上次从 config.toml 读到或写入的内容，save_config 据此判断是否需要写文件
+_saved_content = toml.dumps({**_cfg, "azure": azure, "siliconflow": siliconflow, "ui": ui})
 
 hostname = socket.gethostname()
 log_level = _cfg.get("log_level", "INFO")
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+会话级设置：每个会话持有一份不可变的设置快照，通过 TTSRequest 传给引擎，
+全局的 config.toml 只经由 SettingsStore 加锁、合并后延迟写入，并在被外部修改时重新加载。
+"""
+from __future__ import annotations
+
+import copy
+import os
+import threading
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from loguru import logger
+
+from app.config import config
+
+# 会话可以修改并写回 config.toml 的配置节
+SECTIONS = ("azure", "siliconflow", "ui")
+
+
+def _freeze(values: Mapping) -> Mapping:
+    return MappingProxyType(copy.deepcopy(dict(values)))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    一份不可变的设置快照，只包含 azure、siliconflow 和 ui 三节。
+    修改时用 update() 得到新的快照，原快照不受影响，可以安全地在线程之间共享。
+    """
+
+    azure: Mapping = field(default_factory=lambda: MappingProxyType({}))
+    siliconflow: Mapping = field(default_factory=lambda: MappingProxyType({}))
+    ui: Mapping = field(default_factory=lambda: MappingProxyType({}))
+
+    @classmethod
+    def from_config(cls) -> "Settings":
+        return cls(**{name: _freeze(getattr(config, name)) for name in SECTIONS})
+
+    def section(self, name: str) -> Mapping:
+        return getattr(self, name)
+
+    def update(self, **sections: Mapping) -> "Settings":
+        """
+        按节合并修改，返回新的快照；没有任何值变化时返回自身。
+        """
+
+        changed = {}
+        for name, values in sections.items():
+            if name not in SECTIONS:
+                raise ValueError(f"unknown settings section: {name}")
+            current = self.section(name)
+            if any(current.get(key) != value for key, value in values.items()):
+                changed[name] = _freeze({**current, **values})
+        if not changed:
+            return self
+        return Settings(**{name: changed.get(name, self.section(name)) for name in SECTIONS})
+
+    def diff(self, other: "Settings") -> dict[str, dict]:
+        """
+        返回 self 相对 other 发生变化的键，用于只把会话改动的部分写回全局配置。
+        """
+
+        changes = {}
+        for name in SECTIONS:
+            current, previous = self.section(name), other.section(name)
+            values = {key: value for key, value in current.items() if previous.get(key) != value}
+            if values:
+                changes[name] = values
+        return changes
+
+
+class SettingsStore:
+    """
+    全局配置的唯一写入口。
+
+    update() 在锁内把修改合并到 config 的配置字典，debounce 秒内的多次修改合并为一次写文件；
+    后台线程每隔 reload_interval 秒检查 config.toml，被外部修改时重新加载。
+    snapshot() 返回当前全局配置的快照，配置未变化时复用同一个对象。
+    """
+
+    def __init__(self, debounce: float = 1.0, reload_interval: float = 2.0) -> None:
+        self.debounce = debounce
+        self.reload_interval = reload_interval
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        # 尚未写入文件的修改，只记录 update() 传入的键
+        self._pending: dict[str, dict] = {}
+        self._snapshot: Optional[Settings] = None
+        self._file_state = self._stat()
+        self._watcher: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    @staticmethod
+    def _stat() -> tuple[int, int]:
+        try:
+            stat = os.stat(config.config_file)
+        except OSError:
+            return 0, 0
+        return stat.st_mtime_ns, stat.st_size
+
+    def snapshot(self) -> Settings:
+        self._ensure_watcher()
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = Settings.from_config()
+            return self._snapshot
+
+    def update(self, **sections: Mapping) -> None:
+        """
+        合并会话的修改到全局配置，稍后写入 config.toml。
+        """
+
+        with self._lock:
+            for name, values in sections.items():
+                if name not in SECTIONS:
+                    raise ValueError(f"unknown settings section: {name}")
+                getattr(config, name).update(copy.deepcopy(dict(values)))
+                self._pending.setdefault(name, {}).update(copy.deepcopy(dict(values)))
+            self._snapshot = None
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> bool:
+        """
+        立即写入待保存的修改，返回是否实际写了文件。
+        """
+
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            # 写之前先合并外部修改，避免覆盖别人刚写入的配置
+            self._reload_if_changed()
+            try:
+                written = config.save_config()
+            except Exception as exc:
+                logger.error(f"failed to save config: {str(exc)}")
+                return False
+            self._pending.clear()
+            self._file_state = self._stat()
+            return written
+
+    def _reload_if_changed(self) -> bool:
+        state = self._stat()
+        if state == self._file_state:
+            return False
+        self._file_state = state
+        try:
+            config.reload_config()
+        except Exception as exc:
+            logger.error(f"failed to reload config: {str(exc)}")
+            return False
+        # 还有未写入的修改，只把改过的键重新应用到新读取的配置上，其余键以文件为准
+        for name, values in self._pending.items():
+            getattr(config, name).update(copy.deepcopy(values))
+        self._snapshot = None
+        logger.info("config.toml changed on disk, reloaded")
+        return True
+
+    def reload_if_changed(self) -> bool:
+        """
+        config.toml 被外部修改时重新加载，返回是否重新加载。
+        """
+
+        with self._lock:
+            return self._reload_if_changed()
+
+    def _ensure_watcher(self) -> None:
+        if self._watcher is not None or self.reload_interval <= 0:
+            return
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = threading.Thread(
+                    target=self._watch, name="config-watcher", daemon=True
+                )
+                self._watcher.start()
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self.reload_interval):
+            try:
+                self.reload_if_changed()
+            except Exception as exc:
+                logger.warning(f"config watcher error: {str(exc)}")
+
+    def close(self) -> None:
+        self._stopped.set()
+        self.flush()
+
+
+_store: Optional[SettingsStore] = None
+_store_lock = threading.Lock()
+
+
+def get_settings_store() -> SettingsStore:
+    """
+    返回进程内共享的配置存储。
+    """
+
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                import atexit
+
+                _store = SettingsStore()
+                atexit.register(_store.close)
+    return _store
+
+
+def current_settings() -> Settings:
+    """
+    返回当前全局配置的快照，未指定会话设置的调用方使用。
+    """
+
+    return get_settings_store().snapshot()
+
+
+__all__ = ["SECTIONS", "Settings", "SettingsStore", "current_settings", "get_settings_store"]
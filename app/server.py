@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+不依赖 WebUI 的 HTTP 合成服务，可以在代理后面启动多个进程做负载均衡。
+
+接口：
+    GET  /health                  存活检查，关闭过程中返回 503
+    GET  /v1/voices               声音列表，参数 engine、region、q、limit
+    POST /v1/tts                  合成，JSON 参数 text、voice_name、voice_rate、voice_volume、stream
+                                  stream 为 false 时返回 JSON（id、音频和字幕地址、时长），
+                                  为 true 时以分块传输边合成边返回音频，响应头 X-TTS-Id 为结果 ID
+    GET  /v1/audio/{id}           已生成的音频，支持 Range 请求
+    GET  /v1/subtitles/{id}       已生成的字幕
+
+结果保存在 storage/output 的分片子目录中，按 config.toml 的 [storage] 策略定期清理。
+
+同时进行的合成数受 server.max_concurrency 限制，超出时返回 503 和 Retry-After。
+收到 SIGINT / SIGTERM 后停止接收新连接，等待进行中的请求结束（最多 shutdown_timeout 秒）后退出。
+
+用法：python -m app.server [--host 127.0.0.1] [--port 8080]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import re
+import signal
+import threading
+from dataclasses import asdict
+from typing import Optional
+
+from aiohttp import web
+from loguru import logger
+
+from app.config import config
+from app.services import voice
+from app.services.resilience import TTSServiceError
+from app.services.storage import get_storage_manager, shard_path
+from app.utils import utils
+
+# 结果 ID 为不带连字符的 UUID，同时用作文件名，只接受这种格式以免路径穿越
+_RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class Backpressure(Exception):
+    """
+    合成名额已满。
+    """
+
+
+class SynthesisServer:
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        queue_timeout: float = 0.0,
+        retry_after: int = 1,
+        max_text_chars: int = 100000,
+        output_dir: str = "",
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.max_text_chars = max_text_chars
+        self.output_dir = output_dir or utils.storage_dir("output", create=True)
+        self.in_flight = 0
+        self.closing = False
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def create_app(self) -> web.Application:
+        app = web.Application(client_max_size=4 * 1024 * 1024)
+        app.router.add_get("/health", self.health)
+        app.router.add_get("/v1/voices", self.voices)
+        app.router.add_post("/v1/tts", self.tts)
+        app.router.add_get("/v1/audio/{id}", self.audio)
+        app.router.add_get("/v1/subtitles/{id}", self.subtitle)
+        return app
+
+    def _paths(self, result_id: str) -> tuple[str, str]:
+        # 按结果 ID 分片，音频和字幕在同一个子目录
+        audio_file = shard_path(self.output_dir, f"{result_id}.mp3")
+        return audio_file, audio_file.replace(".mp3", ".srt")
+
+    async def _acquire(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        if self.closing:
+            raise Backpressure()
+        if self._semaphore.locked() and self.queue_timeout <= 0:
+            raise Backpressure()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            raise Backpressure() from None
+        self.in_flight += 1
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _unavailable(self) -> web.Response:
+        return web.json_response(
+            {"error": "server is busy, retry later"},
+            status=503,
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    async def health(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "status": "closing" if self.closing else "ok",
+                "in_flight": self.in_flight,
+                "max_concurrency": self.max_concurrency,
+            },
+            status=503 if self.closing else 200,
+        )
+
+    async def voices(self, request: web.Request) -> web.Response:
+        catalog = voice.get_voice_catalog()
+        engine = request.query.get("engine") or None
+        region = request.query.get("region", "")
+        query = request.query.get("q", "")
+        try:
+            limit = int(request.query.get("limit", 0))
+        except ValueError:
+            raise web.HTTPBadRequest(reason="limit must be an integer")
+
+        if query:
+            records = catalog.search(query, engine=engine, limit=limit or 20)
+        elif engine and region:
+            records = catalog.by_region(engine, region)
+        elif engine:
+            records = catalog.by_engine(engine)
+        else:
+            records = [r for e in catalog.engines() for r in catalog.by_engine(e)]
+        if limit:
+            records = records[:limit]
+        return web.json_response({"voices": [asdict(record) for record in records]})
+
+    async def _parse_tts(self, request: web.Request) -> dict:
+        try:
+            body = await request.json()
+        except Exception:
+            raise web.HTTPBadRequest(reason="request body must be json")
+        if not isinstance(body, dict):
+            raise web.HTTPBadRequest(reason="request body must be a json object")
+
+        text = str(body.get("text", "")).strip()
+        voice_name = str(body.get("voice_name", "")).strip()
+        if not text or not voice_name:
+            raise web.HTTPBadRequest(reason="text and voice_name are required")
+        if len(text) > self.max_text_chars:
+            raise web.HTTPRequestEntityTooLarge(
+                max_size=self.max_text_chars, actual_size=len(text)
+            )
+        try:
+            voice_rate = float(body.get("voice_rate", 1.0))
+            voice_volume = float(body.get("voice_volume", 1.0))
+        except (TypeError, ValueError):
+            raise web.HTTPBadRequest(reason="voice_rate and voice_volume must be numbers")
+        return {
+            "text": text,
+            "voice_name": voice_name,
+            "voice_rate": voice_rate,
+            "voice_volume": voice_volume,
+            "stream": bool(body.get("stream", False)),
+        }
+
+    async def tts(self, request: web.Request) -> web.StreamResponse:
+        params = await self._parse_tts(request)
+        try:
+            await self._acquire()
+        except Backpressure:
+            return self._unavailable()
+        try:
+            if params.pop("stream"):
+                return await self._stream(request, **params)
+            return await self._synthesize(**params)
+        finally:
+            self._release()
+
+    async def _synthesize(
+        self, text: str, voice_name: str, voice_rate: float, voice_volume: float
+    ) -> web.Response:
+        result_id = utils.get_uuid(remove_hyphen=True)
+        audio_file, subtitle_file = self._paths(result_id)
+        os.makedirs(os.path.dirname(audio_file), exist_ok=True)
+        sub_maker = await voice.atts(
+            text=text,
+            voice_name=voice_name,
+            voice_rate=voice_rate,
+            voice_file=audio_file,
+            voice_volume=voice_volume,
+        )
+        if not sub_maker or not os.path.exists(audio_file):
+            return web.json_response({"error": "speech synthesis failed"}, status=502)
+
+        audio_duration = await asyncio.to_thread(
+            self._finish, sub_maker, text, audio_file, subtitle_file
+        )
+        return web.json_response(
+            {
+                "id": result_id,
+                "audio_url": f"/v1/audio/{result_id}",
+                "subtitle_url": f"/v1/subtitles/{result_id}",
+                "duration": audio_duration,
+            }
+        )
+
+    @staticmethod
+    def _finish(sub_maker, text: str, audio_file: str, subtitle_file: str) -> float:
+        voice.create_subtitle(sub_maker=sub_maker, text=text, subtitle_file=subtitle_file)
+        return voice.get_audio_duration(sub_maker, audio_file)
+
+    async def _stream(
+        self,
+        request: web.Request,
+        text: str,
+        voice_name: str,
+        voice_rate: float,
+        voice_volume: float,
+    ) -> web.StreamResponse:
+        result_id = utils.get_uuid(remove_hyphen=True)
+        audio_file, subtitle_file = self._paths(result_id)
+        events = voice.astream(
+            text=text,
+            voice_name=voice_name,
+            voice_rate=voice_rate,
+            voice_volume=voice_volume,
+        )
+
+        # 等到第一个事件再发送响应头，合成一开始就失败时还能返回错误状态码
+        try:
+            first = await anext(events)
+        except StopAsyncIteration:
+            return web.json_response({"error": "speech synthesis failed"}, status=502)
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "audio/mpeg", "X-TTS-Id": result_id}
+        )
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+        os.makedirs(os.path.dirname(audio_file), exist_ok=True)
+
+        sub_maker = voice.new_sub_maker()
+        completed = False
+        try:
+            with open(audio_file, "wb") as f:
+                event = first
+                while True:
+                    if event.type == "audio":
+                        f.write(event.data)
+                        await response.write(event.data)
+                    elif event.type == "WordBoundary":
+                        sub_maker.create_sub((event.offset, event.duration), event.text)
+                    try:
+                        event = await anext(events)
+                    except StopAsyncIteration:
+                        break
+            completed = True
+        except TTSServiceError as exc:
+            # 响应头已经发出，只能中断连接，客户端会收到不完整的分块传输而不是正常结束
+            logger.error(f"tts stream {result_id} interrupted, error: {str(exc)}")
+            request.transport.close()
+            return response
+        finally:
+            await events.aclose()
+            if not completed and os.path.exists(audio_file):
+                os.remove(audio_file)
+
+        if sub_maker.subs:
+            await asyncio.to_thread(
+                voice.create_subtitle,
+                sub_maker=sub_maker,
+                text=text,
+                subtitle_file=subtitle_file,
+            )
+        await response.write_eof()
+        return response
+
+    def _result_file(self, request: web.Request, index: int) -> str:
+        result_id = request.match_info["id"]
+        if not _RESULT_ID_PATTERN.match(result_id):
+            raise web.HTTPNotFound()
+        path = self._paths(result_id)[index]
+        if not os.path.isfile(path):
+            raise web.HTTPNotFound()
+        return path
+
+    async def audio(self, request: web.Request) -> web.FileResponse:
+        # FileResponse 自行处理 Range / If-Range 和 HEAD 请求
+        return web.FileResponse(
+            self._result_file(request, 0), headers={"Content-Type": "audio/mpeg"}
+        )
+
+    async def subtitle(self, request: web.Request) -> web.FileResponse:
+        return web.FileResponse(
+            self._result_file(request, 1),
+            headers={"Content-Type": "application/x-subrip; charset=utf-8"},
+        )
+
+
+async def start_server(
+    server: SynthesisServer, host: str, port: int, shutdown_timeout: float = 30.0
+) -> web.AppRunner:
+    runner = web.AppRunner(
+        server.create_app(), access_log=None, shutdown_timeout=shutdown_timeout
+    )
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"tts server listening on http://{host}:{port}")
+    return runner
+
+
+async def stop_server(server: SynthesisServer, runner: web.AppRunner) -> None:
+    """
+    先标记为关闭（健康检查返回 503，新合成请求直接拒绝），再停止监听并等待进行中的请求结束。
+    """
+
+    server.closing = True
+    logger.info(f"tts server shutting down, in flight: {server.in_flight}")
+    await runner.cleanup()
+    logger.info("tts server stopped")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="TTS-LSJ-Tools HTTP synthesis server")
+    parser.add_argument("--host", default=config.server.get("host", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(config.server.get("port", 8080)))
+    args = parser.parse_args()
+
+    server = SynthesisServer(
+        max_concurrency=int(config.server.get("max_concurrency", 8)),
+        queue_timeout=float(config.server.get("queue_timeout", 0)),
+        retry_after=int(config.server.get("retry_after", 1)),
+        max_text_chars=int(config.server.get("max_text_chars", 100000)),
+    )
+    shutdown_timeout = float(config.server.get("shutdown_timeout", 30))
+    # 生成的结果按 [storage] 的保留策略定期清理，过期的 ID 返回 404
+    get_storage_manager().start()
+
+    # 服务运行在共享的后台事件循环上，与引擎的连接池、限流器使用同一个循环
+    voice.warmup_engines()
+    loop = utils.get_event_loop()
+    runner = asyncio.run_coroutine_threadsafe(
+        start_server(server, args.host, args.port, shutdown_timeout), loop
+    ).result()
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    while not stop.wait(1):
+        pass
+
+    asyncio.run_coroutine_threadsafe(stop_server(server, runner), loop).result(
+        shutdown_timeout + 5
+    )
+
+
+__all__ = ["SynthesisServer", "main", "start_server", "stop_server"]
+
+
+if __name__ == "__main__":
+    main()
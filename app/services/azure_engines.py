@@ -2,17 +2,29 @@
 from __future__ import annotations
 
 import asyncio
-import re
-from datetime import datetime
-from typing import Union
+from datetime import timedelta
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Union
 
-import edge_tts
-from edge_tts import SubMaker
 from loguru import logger
 
 from app.config import config
 
-from .tts_engine_base import TTSEngine, TTSRequest
+from .azure_synthesizer_pool import get_synthesizer_pool
+from .credentials import CredentialPool, get_credential_pool
+from .resilience import TTSServiceError, call_with_retry, stream_with_retry
+from .tts_engine_base import (
+    TTSAudio,
+    TTSEngine,
+    TTSRequest,
+    TTSStreamEvent,
+    new_sub_maker,
+)
+from .voice_catalog import get_voice_catalog
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+    from app.config.settings import Settings
 
 AZURE_VOICES_BLOCK = """
 Name: af-ZA-AdriNeural
@@ -211,8 +223,6 @@ Name: fr-FR-VivienneMultilingualNeural-V2
 Gender: Female
 """.strip()
 
-_VOICE_PATTERN = re.compile(r"Name:\s*(.+)\s*Gender:\s*(.+)\s*", re.MULTILINE)
-
 # 区域代码到区域名称的映射
 VOICE_REGIONS = {
     "zh-CN": "Chinese (Mainland)",
@@ -243,51 +253,23 @@ def get_voice_region(voice_name: str) -> str:
 
 def get_all_regions(v2_only: bool = False) -> list[str]:
     """获取所有可用区域列表"""
-    regions = set()
-    matches = _VOICE_PATTERN.findall(AZURE_VOICES_BLOCK)
-    for name, gender in matches:
-        if v2_only and "-V2" not in name:
-            continue
-        if not v2_only and "-V2" in name:
-            continue
-        region = get_voice_region(name)
-        if region:
-            regions.add(region)
-    return sorted(list(regions))
+    engine = "azure-tts-v2" if v2_only else "azure-tts-v1"
+    return list(get_voice_catalog().regions(engine))
 
 
 def get_all_azure_voices(filter_locals=None) -> list[str]:
-    voices = []
-    matches = _VOICE_PATTERN.findall(AZURE_VOICES_BLOCK)
-
-    for name, gender in matches:
-        if filter_locals and any(
-            name.lower().startswith(fl.lower()) for fl in filter_locals
-        ):
-            voices.append(f"{name}-{gender}")
-        elif not filter_locals:
-            voices.append(f"{name}-{gender}")
-
-    voices.sort()
-    return voices
+    catalog = get_voice_catalog()
+    voices = catalog.voice_ids("azure-tts-v1") + catalog.voice_ids("azure-tts-v2")
+    if filter_locals:
+        prefixes = tuple(fl.lower() for fl in filter_locals)
+        voices = [voice for voice in voices if voice.lower().startswith(prefixes)]
+    return sorted(voices)
 
 
 def get_azure_voices_by_region(region: str, v2_only: bool = False) -> list[str]:
     """根据区域获取声音列表"""
-    voices = []
-    matches = _VOICE_PATTERN.findall(AZURE_VOICES_BLOCK)
-
-    for name, gender in matches:
-        if v2_only and "-V2" not in name:
-            continue
-        if not v2_only and "-V2" in name:
-            continue
-        voice_region = get_voice_region(name)
-        if voice_region == region:
-            voices.append(f"{name}-{gender}")
-
-    voices.sort()
-    return voices
+    engine = "azure-tts-v2" if v2_only else "azure-tts-v1"
+    return [record.voice_id for record in get_voice_catalog().by_region(engine, region)]
 
 
 def parse_voice_name(name: str) -> str:
@@ -321,134 +303,319 @@ class AzureTTSV1Engine(TTSEngine):
         return not bool(is_azure_v2_voice(voice_name))
 
     def list_voices(self) -> list[str]:
-        return [voice for voice in get_all_azure_voices() if "-V2" not in voice]
+        return list(get_voice_catalog().voice_ids(self.engine_id))
+
+    async def _stream_once(
+        self, text: str, voice_name: str, rate_str: str
+    ) -> AsyncIterator[TTSStreamEvent]:
+        import edge_tts
+
+        communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield TTSStreamEvent(type="audio", data=chunk["data"])
+            elif chunk["type"] == "WordBoundary":
+                yield TTSStreamEvent(
+                    type="WordBoundary",
+                    offset=chunk["offset"],
+                    duration=chunk["duration"],
+                    text=chunk["text"],
+                )
+
+    async def asynthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        voice_name = parse_voice_name(request.voice_name)
+        text = request.text.strip()
+        rate_str = convert_rate_to_percent(request.voice_rate)
+
+        async def _attempt(i: int) -> SubMaker:
+            logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
+
+            sub_maker = new_sub_maker()
+            with open(request.voice_file, "wb") as file:
+                async for event in self._stream_once(text, voice_name, rate_str):
+                    if event.type == "audio":
+                        file.write(event.data)
+                    else:
+                        sub_maker.create_sub((event.offset, event.duration), event.text)
+            return sub_maker
 
-    def synthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        try:
+            sub_maker = await call_with_retry(self.engine_id, _attempt)
+        except TTSServiceError as exc:
+            logger.error(f"failed, error: {str(exc)}")
+            return None
+
+        logger.success(f"completed, output file: {request.voice_file}")
+        return sub_maker
+
+    async def astream(self, request: TTSRequest) -> AsyncIterator[TTSStreamEvent]:
         voice_name = parse_voice_name(request.voice_name)
         text = request.text.strip()
         rate_str = convert_rate_to_percent(request.voice_rate)
 
-        for i in range(3):
-            try:
-                logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
-
-                async def _do() -> SubMaker:
-                    communicate = edge_tts.Communicate(text, voice_name, rate=rate_str)
-                    sub_maker = edge_tts.SubMaker()
-                    with open(request.voice_file, "wb") as file:
-                        async for chunk in communicate.stream():
-                            if chunk["type"] == "audio":
-                                file.write(chunk["data"])
-                            elif chunk["type"] == "WordBoundary":
-                                sub_maker.create_sub(
-                                    (chunk["offset"], chunk["duration"]), chunk["text"]
-                                )
-                    return sub_maker
-
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-                sub_maker = loop.run_until_complete(_do())
-                loop.close()
-                logger.success(f"completed, output file: {request.voice_file}")
-                return sub_maker
-            except Exception as exc:
-                logger.error(f"failed, error: {str(exc)}")
-        return None
+        def _open(i: int) -> AsyncIterator[TTSStreamEvent]:
+            logger.info(f"start streaming, voice name: {voice_name}, try: {i + 1}")
+            return self._stream_once(text, voice_name, rate_str)
+
+        emitted = False
+        try:
+            async for event in stream_with_retry(self.engine_id, _open):
+                emitted = True
+                yield event
+        except TTSServiceError as exc:
+            logger.error(f"failed, error: {str(exc)}")
+            if emitted:
+                # 已经产出了部分数据，不能当作正常结束，否则调用方会把不完整的音频当成结果
+                raise
+            return
+        logger.success(f"streaming completed, voice name: {voice_name}")
+
+
+# 合成器池按输出格式区分，取值为 speechsdk.SpeechSynthesisOutputFormat 的成员名
+_OUTPUT_FORMAT = "Audio48Khz192KBitRateMonoMp3"
+
+
+def _format_duration_to_offset(duration) -> int:
+    """
+    把 SDK 回调中的时长转换为 100 纳秒单位，每个词都会触发一次，直接做整数运算。
+    """
+
+    if isinstance(duration, int):
+        return duration
+
+    if isinstance(duration, timedelta):
+        return (
+            duration.days * 86400 + duration.seconds
+        ) * 10000000 + duration.microseconds * 10
+
+    return 0
 
 
 class AzureTTSV2Engine(TTSEngine):
     engine_id = "azure-tts-v2"
+    limits_per_credential = True
 
     def supports_voice(self, voice_name: str) -> bool:
         return bool(is_azure_v2_voice(voice_name))
 
     def list_voices(self) -> list[str]:
-        return [voice for voice in get_all_azure_voices() if "-V2" in voice]
-
-    def synthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        return list(get_voice_catalog().voice_ids(self.engine_id))
+
+    @staticmethod
+    def credential_pool(settings: Optional[Settings] = None) -> CredentialPool:
+        """
+        返回 Azure Speech Key 池。配置了 azure.credentials 列表时使用列表中的 Key（可位于不同区域），
+        否则使用单个 speech_key / speech_region。传入 settings 时读取会话的设置快照。
+        """
+
+        azure = settings.azure if settings is not None else config.azure
+        entries = [
+            {
+                "key": item.get("speech_key", ""),
+                "region": item.get("speech_region", ""),
+                "weight": item.get("weight", 1),
+            }
+            for item in azure.get("credentials", [])
+            if item.get("speech_key") and item.get("speech_region")
+        ]
+        if not entries:
+            speech_key = azure.get("speech_key", "")
+            service_region = azure.get("speech_region", "")
+            if speech_key and service_region:
+                entries = [{"key": speech_key, "region": service_region}]
+        return get_credential_pool(AzureTTSV2Engine.engine_id, entries)
+
+    async def awarmup(self) -> None:
+        voices = config.azure.get("warmup_voices", [])
+        if not config.azure.get("warmup", False) or not voices:
+            return
+
+        pool = get_synthesizer_pool()
+        count = int(config.azure.get("warmup_connections", 1))
+        for credential in self.credential_pool().available():
+            for voice in voices:
+                azure_voice_name = is_azure_v2_voice(voice) or parse_voice_name(voice)
+                # 创建合成器会加载 SDK 原生库，放到线程中执行
+                await asyncio.to_thread(
+                    pool.warmup, credential, azure_voice_name, _OUTPUT_FORMAT, count
+                )
+        logger.info(f"azure v2 synthesizer pool warmed up: {pool.stats()}")
+
+    @staticmethod
+    def _error_from_cancellation(result) -> TTSServiceError:
+        """
+        把 SDK 的取消结果归类为 TTSServiceError，限流和服务端错误可重试。
+        """
+
+        import azure.cognitiveservices.speech as speechsdk
+
+        cancellation_details = result.cancellation_details
+        logger.error(
+            f"azure v2 speech synthesis canceled: {cancellation_details.reason}"
+        )
+        if cancellation_details.reason != speechsdk.CancellationReason.Error:
+            return TTSServiceError(
+                f"azure v2 speech synthesis canceled: {cancellation_details.reason}"
+            )
+
+        logger.error(
+            f"azure v2 speech synthesis error: {cancellation_details.error_details}"
+        )
+        message = f"azure v2 speech synthesis error: {cancellation_details.error_details}"
+        error_code = cancellation_details.error_code
+        codes = speechsdk.CancellationErrorCode
+        if error_code == codes.TooManyRequests:
+            return TTSServiceError(message, kind="throttled", status=429)
+        if error_code in (codes.AuthenticationFailure, codes.Forbidden):
+            return TTSServiceError(message, kind="auth", retryable=False)
+        if error_code == codes.BadRequest:
+            return TTSServiceError(message, kind="client", retryable=False)
+        if error_code in (codes.ConnectionFailure, codes.ServiceTimeout):
+            return TTSServiceError(message, kind="network")
+        return TTSServiceError(message, kind="server")
+
+    async def asynthesize_audio(self, request: TTSRequest) -> Optional[TTSAudio]:
         azure_voice_name = is_azure_v2_voice(request.voice_name)
         if not azure_voice_name:
             logger.error(f"invalid voice name: {request.voice_name}")
             raise ValueError(f"invalid voice name: {request.voice_name}")
         text = request.text.strip()
 
-        def _format_duration_to_offset(duration) -> int:
-            if isinstance(duration, str):
-                time_obj = datetime.strptime(duration, "%H:%M:%S.%f")
-                milliseconds = (
-                    (time_obj.hour * 3600000)
-                    + (time_obj.minute * 60000)
-                    + (time_obj.second * 1000)
-                    + (time_obj.microsecond // 1000)
-                )
-                return milliseconds * 10000
+        loop = asyncio.get_running_loop()
+        pool = self.credential_pool(request.settings)
+        synthesizers = get_synthesizer_pool()
 
-            if isinstance(duration, int):
-                return duration
+        async def _attempt(i: int) -> TTSAudio:
+            logger.info(f"start, voice name: {azure_voice_name}, try: {i + 1}")
 
-            return 0
+            sub_maker = new_sub_maker()
 
-        for i in range(3):
-            try:
-                logger.info(f"start, voice name: {azure_voice_name}, try: {i + 1}")
+            def speech_synthesizer_word_boundary_cb(evt: speechsdk.SessionEventArgs):
+                duration = _format_duration_to_offset(evt.duration)
+                offset = _format_duration_to_offset(evt.audio_offset)
+                sub_maker.subs.append(evt.text)
+                sub_maker.offset.append((offset, offset + duration))
 
-                import azure.cognitiveservices.speech as speechsdk
+            # SDK 在自己的线程中回调完成/取消事件，这里转交给事件循环，
+            # 不再调用 ResultFuture.get() 阻塞线程
+            done = loop.create_future()
 
-                sub_maker = SubMaker()
+            def _resolve(evt):
+                if not done.done():
+                    done.set_result(evt.result)
 
-                def speech_synthesizer_word_boundary_cb(evt: speechsdk.SessionEventArgs):
-                    duration = _format_duration_to_offset(str(evt.duration))
-                    offset = _format_duration_to_offset(evt.audio_offset)
-                    sub_maker.subs.append(evt.text)
-                    sub_maker.offset.append((offset, offset + duration))
+            def speech_synthesizer_done_cb(evt):
+                loop.call_soon_threadsafe(_resolve, evt)
 
-                speech_key = config.azure.get("speech_key", "")
-                service_region = config.azure.get("speech_region", "")
-                if not speech_key or not service_region:
-                    logger.error("Azure speech key or region is not set")
-                    return None
+            async with pool.use(len(text)) as credential:
+                async with synthesizers.ause(
+                    credential, azure_voice_name, _OUTPUT_FORMAT
+                ) as synthesizer:
+                    # 取出合成器时已在线程中加载过 SDK，这里的导入不会阻塞事件循环
+                    import azure.cognitiveservices.speech as speechsdk
 
-                audio_config = speechsdk.audio.AudioOutputConfig(
-                    filename=request.voice_file, use_default_speaker=True
-                )
-                speech_config = speechsdk.SpeechConfig(
-                    subscription=speech_key, region=service_region
-                )
-                speech_config.speech_synthesis_voice_name = azure_voice_name
-                speech_config.set_property(
-                    property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestWordBoundary,
-                    value="true",
+                    synthesizer.bind(
+                        synthesis_word_boundary=speech_synthesizer_word_boundary_cb,
+                        synthesis_completed=speech_synthesizer_done_cb,
+                        synthesis_canceled=speech_synthesizer_done_cb,
+                    )
+                    synthesizer.synthesizer.speak_text_async(text)
+                    result = await done
+                    if result.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+                        raise self._error_from_cancellation(result)
+
+            return TTSAudio(audio=result.audio_data, sub_maker=sub_maker)
+
+        try:
+            return await call_with_retry(self.engine_id, _attempt)
+        except TTSServiceError as exc:
+            logger.error(f"failed, error: {str(exc)}")
+            return None
+
+    async def asynthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        result = await self.asynthesize_audio(request)
+        if result is None:
+            return None
+
+        # 音频在内存中合成，只有指定了输出文件时才写盘
+        if request.voice_file:
+            with open(request.voice_file, "wb") as f:
+                f.write(result.audio)
+        logger.success(
+            f"azure v2 speech synthesis succeeded: {request.voice_file or 'in memory'}"
+        )
+        return result.sub_maker
+
+    async def _stream_once(
+        self, azure_voice_name: str, text: str, pool: CredentialPool
+    ) -> AsyncIterator[TTSStreamEvent]:
+        loop = asyncio.get_running_loop()
+        events: asyncio.Queue = asyncio.Queue()
+
+        def speech_synthesizer_synthesizing_cb(evt):
+            if evt.result.audio_data:
+                loop.call_soon_threadsafe(
+                    events.put_nowait,
+                    TTSStreamEvent(type="audio", data=bytes(evt.result.audio_data)),
                 )
 
-                speech_config.set_speech_synthesis_output_format(
-                    speechsdk.SpeechSynthesisOutputFormat.Audio48Khz192KBitRateMonoMp3
-                )
-                speech_synthesizer = speechsdk.SpeechSynthesizer(
-                    audio_config=audio_config, speech_config=speech_config
-                )
-                speech_synthesizer.synthesis_word_boundary.connect(
-                    speech_synthesizer_word_boundary_cb
-                )
+        def speech_synthesizer_word_boundary_cb(evt):
+            duration = _format_duration_to_offset(evt.duration)
+            offset = _format_duration_to_offset(evt.audio_offset)
+            loop.call_soon_threadsafe(
+                events.put_nowait,
+                TTSStreamEvent(
+                    type="WordBoundary", offset=offset, duration=duration, text=evt.text
+                ),
+            )
+
+        def speech_synthesizer_done_cb(evt):
+            loop.call_soon_threadsafe(events.put_nowait, evt.result)
+
+        async with pool.use(len(text)) as credential:
+            # 合成器的 audio_config 为 None，不写文件也不打开扬声器，音频通过 synthesizing 事件增量返回
+            async with get_synthesizer_pool().ause(
+                credential, azure_voice_name, _OUTPUT_FORMAT
+            ) as synthesizer:
+                import azure.cognitiveservices.speech as speechsdk
 
-                result = speech_synthesizer.speak_text_async(text).get()
-                if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                    logger.success(
-                        f"azure v2 speech synthesis succeeded: {request.voice_file}"
-                    )
-                    return sub_maker
-                elif result.reason == speechsdk.ResultReason.Canceled:
-                    cancellation_details = result.cancellation_details
-                    logger.error(
-                        f"azure v2 speech synthesis canceled: {cancellation_details.reason}"
-                    )
-                    if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                        logger.error(
-                            f"azure v2 speech synthesis error: {cancellation_details.error_details}"
-                        )
-                logger.info(f"completed, output file: {request.voice_file}")
-            except Exception as exc:
-                logger.error(f"failed, error: {str(exc)}")
-        return None
+                synthesizer.bind(
+                    synthesizing=speech_synthesizer_synthesizing_cb,
+                    synthesis_word_boundary=speech_synthesizer_word_boundary_cb,
+                    synthesis_completed=speech_synthesizer_done_cb,
+                    synthesis_canceled=speech_synthesizer_done_cb,
+                )
+                synthesizer.synthesizer.start_speaking_text_async(text)
+                while True:
+                    event = await events.get()
+                    if isinstance(event, TTSStreamEvent):
+                        yield event
+                        continue
+                    if event.reason != speechsdk.ResultReason.SynthesizingAudioCompleted:
+                        raise self._error_from_cancellation(event)
+                    break
+
+    async def astream(self, request: TTSRequest) -> AsyncIterator[TTSStreamEvent]:
+        azure_voice_name = is_azure_v2_voice(request.voice_name)
+        if not azure_voice_name:
+            logger.error(f"invalid voice name: {request.voice_name}")
+            raise ValueError(f"invalid voice name: {request.voice_name}")
+        text = request.text.strip()
+        pool = self.credential_pool(request.settings)
+
+        def _open(i: int) -> AsyncIterator[TTSStreamEvent]:
+            logger.info(f"start streaming, voice name: {azure_voice_name}, try: {i + 1}")
+            return self._stream_once(azure_voice_name, text, pool)
+
+        emitted = False
+        try:
+            async for event in stream_with_retry(self.engine_id, _open):
+                emitted = True
+                yield event
+        except TTSServiceError as exc:
+            logger.error(f"failed, error: {str(exc)}")
+            if emitted:
+                raise
 
 
 __all__ = [
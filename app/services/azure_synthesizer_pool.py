@@ -0,0 +1,317 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from loguru import logger
+
+from app.config import config
+
+from .credentials import Credential
+
+# 合成器在 SDK 中注册的事件，请求之间通过 bind() 切换回调
+_EVENTS = (
+    "synthesizing",
+    "synthesis_word_boundary",
+    "synthesis_completed",
+    "synthesis_canceled",
+)
+
+
+class PooledSynthesizer:
+    """
+    连接池中的一个 SpeechSynthesizer 及其预先打开的连接。
+
+    SDK 的事件只能追加不能移除，因此创建时统一注册转发函数，
+    每次使用前用 bind() 设置当前请求的回调。
+    """
+
+    def __init__(self, key: tuple, synthesizer, connection) -> None:
+        self.key = key
+        self.synthesizer = synthesizer
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self.connected = False
+        self.disconnected = False
+        self._handlers: dict[str, Callable] = {}
+
+        for name in _EVENTS:
+            getattr(synthesizer, name).connect(self._forwarder(name))
+        connection.connected.connect(self._on_connected)
+        connection.disconnected.connect(self._on_disconnected)
+
+    def _forwarder(self, name: str) -> Callable:
+        def _forward(evt) -> None:
+            handler = self._handlers.get(name)
+            if handler is not None:
+                handler(evt)
+
+        return _forward
+
+    def _on_connected(self, evt) -> None:
+        self.connected = True
+        self.disconnected = False
+
+    def _on_disconnected(self, evt) -> None:
+        self.connected = False
+        self.disconnected = True
+
+    def bind(self, **handlers: Callable) -> None:
+        self._handlers = handlers
+
+    def unbind(self) -> None:
+        self._handlers = {}
+
+    def close(self) -> None:
+        self.unbind()
+        try:
+            # 中途放弃的合成需要先停止，否则 SDK 会继续接收音频
+            self.synthesizer.stop_speaking_async()
+            self.connection.close()
+        except Exception as exc:
+            logger.debug(f"failed to close azure synthesizer connection: {str(exc)}")
+
+
+class SynthesizerPool:
+    """
+    按 (Key, 区域, 声音, 输出格式) 复用的 Azure 合成器池。
+
+    新建的合成器会立即打开连接，请求时直接复用空闲合成器，省去建立 websocket 的耗时。
+    取出时丢弃已断开、空闲过久的合成器，归还时丢弃出错、超过使用次数或存活时间的合成器。
+    """
+
+    def __init__(
+        self,
+        max_idle: int = 4,
+        max_age: float = 600,
+        idle_timeout: float = 120,
+        max_uses: int = 500,
+    ) -> None:
+        self.max_idle = max_idle
+        self.max_age = max_age
+        self.idle_timeout = idle_timeout
+        self.max_uses = max_uses
+        self._idle: dict[tuple, deque[PooledSynthesizer]] = {}
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.reused = 0
+        self.recycled = 0
+        atexit.register(self.close_all)
+
+    @staticmethod
+    def _make_key(credential: Credential, voice_name: str, output_format: str) -> tuple:
+        return (credential.key_id, credential.region, voice_name, output_format)
+
+    def _create(
+        self, credential: Credential, voice_name: str, output_format: str
+    ) -> PooledSynthesizer:
+        import azure.cognitiveservices.speech as speechsdk
+
+        speech_config = speechsdk.SpeechConfig(
+            subscription=credential.key, region=credential.region
+        )
+        speech_config.speech_synthesis_voice_name = voice_name
+        speech_config.set_property(
+            property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestWordBoundary,
+            value="true",
+        )
+        speech_config.set_speech_synthesis_output_format(
+            getattr(speechsdk.SpeechSynthesisOutputFormat, output_format)
+        )
+        # audio_config 为 None 时音频只保存在结果中，不写文件也不打开扬声器
+        synthesizer = speechsdk.SpeechSynthesizer(
+            speech_config=speech_config, audio_config=None
+        )
+        connection = speechsdk.Connection.from_speech_synthesizer(synthesizer)
+        item = PooledSynthesizer(
+            self._make_key(credential, voice_name, output_format),
+            synthesizer,
+            connection,
+        )
+        # 异步建立连接，首次合成时连接通常已经就绪
+        connection.open(True)
+        with self._lock:
+            self.created += 1
+        return item
+
+    def _is_reusable(self, item: PooledSynthesizer, now: float) -> bool:
+        return (
+            not item.disconnected
+            and now - item.created_at < self.max_age
+            and now - item.last_used < self.idle_timeout
+            and item.uses < self.max_uses
+        )
+
+    def _prune(self, now: float) -> list[PooledSynthesizer]:
+        # 调用方需持有 self._lock，返回需要关闭的合成器，在锁外关闭
+        stale = []
+        for key, items in list(self._idle.items()):
+            alive = deque()
+            for item in items:
+                (alive if self._is_reusable(item, now) else stale).append(item)
+            if alive:
+                self._idle[key] = alive
+            else:
+                self._idle.pop(key, None)
+        return stale
+
+    def acquire(
+        self, credential: Credential, voice_name: str, output_format: str
+    ) -> PooledSynthesizer:
+        """
+        取出一个空闲合成器，没有可用的空闲合成器时新建。
+        """
+
+        key = self._make_key(credential, voice_name, output_format)
+        now = time.monotonic()
+        with self._lock:
+            stale = self._prune(now)
+            items = self._idle.get(key)
+            item = items.pop() if items else None
+            if item is not None:
+                self.reused += 1
+            self.recycled += len(stale)
+        for old in stale:
+            old.close()
+        if item is None:
+            item = self._create(credential, voice_name, output_format)
+        return item
+
+    def release(self, item: PooledSynthesizer, healthy: bool = True) -> None:
+        """
+        归还合成器，healthy 为 False 或不满足复用条件时直接关闭。
+        """
+
+        item.unbind()
+        item.uses += 1
+        item.last_used = time.monotonic()
+        with self._lock:
+            items = self._idle.setdefault(item.key, deque())
+            keep = (
+                healthy
+                and self._is_reusable(item, item.last_used)
+                and len(items) < self.max_idle
+            )
+            if keep:
+                items.append(item)
+            else:
+                self.recycled += 1
+                if not items:
+                    self._idle.pop(item.key, None)
+        if not keep:
+            item.close()
+
+    @contextmanager
+    def use(
+        self, credential: Credential, voice_name: str, output_format: str
+    ) -> Iterator[PooledSynthesizer]:
+        """
+        在 with 块内独占一个合成器，块内抛出异常（包括被取消）时该合成器不再复用。
+        """
+
+        item = self.acquire(credential, voice_name, output_format)
+        healthy = False
+        try:
+            yield item
+            healthy = True
+        finally:
+            self.release(item, healthy)
+
+    @asynccontextmanager
+    async def ause(
+        self, credential: Credential, voice_name: str, output_format: str
+    ) -> AsyncIterator[PooledSynthesizer]:
+        """
+        use() 的异步版本。未命中时创建合成器会加载 SDK 并打开连接，关闭合成器也会阻塞，
+        取出和归还都放到线程中执行，不占用事件循环。
+        """
+
+        loop = asyncio.get_running_loop()
+        task = asyncio.ensure_future(
+            asyncio.to_thread(self.acquire, credential, voice_name, output_format)
+        )
+        try:
+            item = await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # 取消时线程仍在创建合成器，完成后原样归还，避免连接泄漏
+            def _return(done: asyncio.Future) -> None:
+                if not done.cancelled() and done.exception() is None:
+                    loop.run_in_executor(None, self.release, done.result())
+
+            task.add_done_callback(_return)
+            raise
+
+        healthy = False
+        try:
+            yield item
+            healthy = True
+        finally:
+            await asyncio.to_thread(self.release, item, healthy)
+
+    def warmup(
+        self, credential: Credential, voice_name: str, output_format: str, count: int = 1
+    ) -> None:
+        """
+        为指定声音预先创建并连接 count 个合成器放入池中。
+        """
+
+        key = self._make_key(credential, voice_name, output_format)
+        with self._lock:
+            missing = min(count, self.max_idle) - len(self._idle.get(key, ()))
+        items = [
+            self._create(credential, voice_name, output_format)
+            for _ in range(max(0, missing))
+        ]
+        with self._lock:
+            self._idle.setdefault(key, deque()).extend(items)
+
+    def close_all(self) -> None:
+        with self._lock:
+            items = [item for queue in self._idle.values() for item in queue]
+            self._idle.clear()
+        for item in items:
+            item.close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "idle": sum(len(items) for items in self._idle.values()),
+                "keys": len(self._idle),
+                "created": self.created,
+                "reused": self.reused,
+                "recycled": self.recycled,
+            }
+
+
+_pool: Optional[SynthesizerPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_synthesizer_pool() -> SynthesizerPool:
+    """
+    返回全局合成器池，容量和回收策略从 config.azure 读取。
+    """
+
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SynthesizerPool(
+                    max_idle=int(config.azure.get("pool_max_idle", 4)),
+                    max_age=float(config.azure.get("pool_max_age", 600)),
+                    idle_timeout=float(config.azure.get("pool_idle_timeout", 120)),
+                    max_uses=int(config.azure.get("pool_max_uses", 500)),
+                )
+    return _pool
+
+
+__all__ = ["PooledSynthesizer", "SynthesizerPool", "get_synthesizer_pool"]
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.services import rate_limit
+from app.services.resilience import TTSServiceError, classify_exception
+from app.utils import utils
+
+
+@dataclass(slots=True)
+class Credential:
+    """
+    一个 API Key 及其负载状态，region 仅 Azure 使用。
+    """
+
+    key: str
+    region: str = ""
+    weight: int = 1
+    in_flight: int = 0
+    current_weight: int = 0
+    ejected_until: float = 0.0
+    ejected_kind: str = ""
+
+    @property
+    def key_id(self) -> str:
+        # 日志和限流配置中只使用指纹，不暴露完整 Key
+        return utils.md5(self.key)[:8]
+
+    def is_available(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+
+class CredentialPool:
+    """
+    多个 API Key 之间的负载均衡：按最少在途请求或平滑加权轮询选择 Key，
+    返回鉴权/额度错误的 Key 会被暂时剔除，限流的 Key 短暂剔除。
+    """
+
+    def __init__(self, engine_id: str) -> None:
+        self.engine_id = engine_id
+        self._credentials: dict[tuple[str, str], Credential] = {}
+        self._lock = threading.Lock()
+
+    def sync(self, entries: list[dict]) -> None:
+        """
+        按配置同步 Key 列表，已存在的 Key 保留其负载和剔除状态。
+        """
+
+        with self._lock:
+            credentials = {}
+            for entry in entries:
+                key = str(entry.get("key", "")).strip()
+                if not key:
+                    continue
+                region = str(entry.get("region", "")).strip()
+                existing = self._credentials.get((key, region))
+                if existing is None:
+                    existing = Credential(key=key, region=region)
+                existing.weight = max(1, int(entry.get("weight", 1)))
+                credentials[(key, region)] = existing
+            self._credentials = credentials
+
+    def __len__(self) -> int:
+        return len(self._credentials)
+
+    def acquire(self) -> Credential:
+        """
+        选择一个可用的 Key 并计入在途请求，没有可用 Key 时抛出 TTSServiceError。
+        """
+
+        strategy = config.credentials.get("strategy", "least_in_flight")
+        now = time.monotonic()
+        with self._lock:
+            credentials = list(self._credentials.values())
+            if not credentials:
+                raise TTSServiceError(
+                    f"{self.engine_id} api key is not set", kind="auth", retryable=False
+                )
+
+            available = [c for c in credentials if c.is_available(now)]
+            if not available:
+                soonest = min(credentials, key=lambda c: c.ejected_until)
+                raise TTSServiceError(
+                    f"all {self.engine_id} api keys are ejected",
+                    kind=soonest.ejected_kind or "throttled",
+                    retryable=soonest.ejected_kind == "throttled",
+                    retry_after=soonest.ejected_until - now,
+                )
+
+            if strategy == "weighted_round_robin":
+                # 平滑加权轮询：每次为所有 Key 累加权重，选中当前权重最大的并扣除总权重
+                total = sum(c.weight for c in available)
+                for c in available:
+                    c.current_weight += c.weight
+                credential = max(available, key=lambda c: c.current_weight)
+                credential.current_weight -= total
+            else:
+                credential = min(available, key=lambda c: c.in_flight / c.weight)
+
+            credential.in_flight += 1
+            return credential
+
+    def release(
+        self, credential: Credential, error: Optional[TTSServiceError] = None
+    ) -> None:
+        with self._lock:
+            credential.in_flight = max(0, credential.in_flight - 1)
+            if error is None:
+                return
+
+            if error.kind in ("auth", "quota"):
+                duration = float(config.credentials.get("auth_eject_seconds", 300))
+            elif error.kind == "throttled":
+                duration = error.retry_after or float(
+                    config.credentials.get("throttle_eject_seconds", 10)
+                )
+            else:
+                return
+            credential.ejected_until = time.monotonic() + duration
+            credential.ejected_kind = "throttled" if error.kind == "throttled" else error.kind
+
+        logger.warning(
+            f"{self.engine_id} api key {credential.key_id} ejected for {duration:.0f}s ({error.kind})"
+        )
+
+    @asynccontextmanager
+    async def use(self, chars: int = 0) -> AsyncIterator[Credential]:
+        """
+        选取一个 Key 并按该 Key 的限流配置执行请求，结束后根据结果释放或剔除。
+        """
+
+        credential = self.acquire()
+        try:
+            async with rate_limit.limit(self.engine_id, credential.key_id, chars):
+                yield credential
+        except Exception as exc:
+            error = classify_exception(exc)
+            self.release(credential, error)
+            rate_limit.record_outcome(self.engine_id, credential.key_id, error)
+            if error.kind in ("auth", "quota") and self.has_available():
+                # 失效的 Key 已被剔除，还有其他可用 Key 时允许重试立即换 Key
+                raise TTSServiceError(
+                    str(error), kind=error.kind, retry_after=0, status=error.status
+                ) from exc
+            raise
+        except BaseException:
+            self.release(credential)
+            raise
+        else:
+            self.release(credential)
+            rate_limit.record_outcome(self.engine_id, credential.key_id, None)
+
+    def available(self) -> list[Credential]:
+        """
+        返回当前未被剔除的 Key，不计入在途请求，用于预热等场景。
+        """
+
+        now = time.monotonic()
+        with self._lock:
+            return [c for c in self._credentials.values() if c.is_available(now)]
+
+    def has_available(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            return any(c.is_available(now) for c in self._credentials.values())
+
+    def is_idle(self) -> bool:
+        with self._lock:
+            return not any(c.in_flight for c in self._credentials.values())
+
+
+# 不同会话可能使用不同的 Key，按 (引擎, Key 集合) 各保留一个池，超出上限时淘汰最久未用的空闲池
+_MAX_POOLS = 32
+_pools: "OrderedDict[tuple[str, frozenset], CredentialPool]" = OrderedDict()
+_pools_lock = threading.Lock()
+
+
+def get_credential_pool(engine_id: str, entries: list[dict]) -> CredentialPool:
+    """
+    返回这组 Key 对应的池并同步权重。同一组 Key 总是得到同一个池，剔除状态和在途请求数
+    因此在调用之间保留；会话各自的 Key 互不影响，也不会因为交替调用而反复重建。
+    """
+
+    pool_key = (
+        engine_id,
+        frozenset(
+            (str(entry.get("key", "")).strip(), str(entry.get("region", "")).strip())
+            for entry in entries
+            if str(entry.get("key", "")).strip()
+        ),
+    )
+    with _pools_lock:
+        pool = _pools.get(pool_key)
+        if pool is None:
+            pool = CredentialPool(engine_id)
+            _pools[pool_key] = pool
+            for stale_key in list(_pools):
+                if len(_pools) <= _MAX_POOLS:
+                    break
+                if stale_key != pool_key and _pools[stale_key].is_idle():
+                    del _pools[stale_key]
+        else:
+            _pools.move_to_end(pool_key)
+    pool.sync(entries)
+    return pool
+
+
+__all__ = ["Credential", "CredentialPool", "get_credential_pool"]
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import atexit
+import threading
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    import aiohttp
+
+
+class HttpClientPool:
+    """
+    共享的 keep-alive HTTP 连接池。
+
+    aiohttp 的会话只能在创建它的事件循环中使用，因此每个事件循环持有一个会话，
+    同一循环内的所有请求复用其中的连接，避免每次请求重新握手。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        pool_size: int = 10,
+        keepalive_timeout: float = 60,
+        connect_timeout: float = 10,
+        read_timeout: float = 60,
+    ) -> None:
+        import aiohttp
+
+        self.name = name
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=connect_timeout, sock_read=read_timeout
+        )
+        self._sessions: dict[asyncio.AbstractEventLoop, aiohttp.ClientSession] = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close_all)
+
+    def get_session(self) -> aiohttp.ClientSession:
+        """
+        返回当前事件循环对应的会话，必须在协程中调用。
+        """
+
+        import aiohttp
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(
+                    limit=self.pool_size,
+                    limit_per_host=self.pool_size,
+                    keepalive_timeout=self.keepalive_timeout,
+                )
+                session = aiohttp.ClientSession(
+                    connector=connector, timeout=self.timeout
+                )
+                self._sessions[loop] = session
+            # 清理已经关闭的事件循环留下的会话
+            for stale in [item for item in self._sessions if item.is_closed()]:
+                self._sessions.pop(stale, None)
+        return session
+
+    async def warmup(self, url: str, connections: int = 2) -> None:
+        """
+        并发发起若干 HEAD 请求，提前建立 TCP+TLS 连接放入连接池。
+        """
+
+        session = self.get_session()
+
+        async def _open() -> None:
+            async with session.head(url, allow_redirects=False) as response:
+                await response.read()
+
+        results = await asyncio.gather(
+            *(_open() for _ in range(max(1, min(connections, self.pool_size)))),
+            return_exceptions=True,
+        )
+        failed = [r for r in results if isinstance(r, BaseException)]
+        if failed:
+            logger.warning(f"{self.name} warmup failed: {str(failed[0])}")
+        else:
+            logger.info(f"{self.name} warmup completed, connections: {len(results)}")
+
+    async def close(self) -> None:
+        """
+        关闭当前事件循环对应的会话。
+        """
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._sessions.pop(loop, None)
+        if session is not None and not session.closed:
+            await session.close()
+
+    def close_all(self, timeout: float = 2) -> None:
+        """
+        关闭所有事件循环中的会话，进程退出时自动调用。
+        """
+
+        with self._lock:
+            sessions = list(self._sessions.items())
+            self._sessions.clear()
+        for loop, session in sessions:
+            if session.closed or not loop.is_running():
+                continue
+            try:
+                asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout)
+            except Exception as exc:
+                logger.warning(f"failed to close {self.name} http session: {str(exc)}")
+
+
+__all__ = ["HttpClientPool"]
@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+"""
+进程内的后台任务管理：任务以协程的形式在共享的后台事件循环上执行，同时运行的任务数有上限，
+其余任务排队等待。任务对象保存在进程内，WebUI 重跑或刷新页面后可以按任务 ID 找回进度和结果。
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.utils import utils
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+@dataclass(slots=True)
+class Job:
+    """
+    一个后台任务。done / total 为以句子计的进度，result 为任务函数的返回值。
+    """
+
+    id: str
+    title: str = ""
+    owner: str = ""
+    status: str = QUEUED
+    done: int = 0
+    total: int = 0
+    result: Any = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    _future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def progress(self) -> float:
+        if self.status == SUCCEEDED:
+            return 1.0
+        if not self.total:
+            return 0.0
+        return min(1.0, self.done / self.total)
+
+    @property
+    def elapsed(self) -> float:
+        if not self.started_at:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def set_progress(self, done: int, total: Optional[int] = None) -> None:
+        """
+        更新进度，可直接作为 voice.atts 的 progress 回调。
+        """
+
+        if total is not None:
+            self.total = total
+        self.done = done
+
+
+# 任务函数：接收任务对象（用于汇报进度），返回值保存到 job.result
+JobFunc = Callable[[Job], Awaitable[Any]]
+
+
+class JobManager:
+    """
+    有界的后台任务池。
+
+    submit() 立即返回任务对象，任务在后台事件循环上按提交顺序获取执行名额；
+    cancel() 会取消排队中的任务，或向运行中的任务抛出 CancelledError。
+    已结束的任务保留 keep_seconds 秒，总数超过 max_jobs 时先淘汰最早结束的任务。
+    """
+
+    def __init__(
+        self, max_workers: int = 2, keep_seconds: float = 3600, max_jobs: int = 200
+    ) -> None:
+        self.max_workers = max(1, max_workers)
+        self.keep_seconds = keep_seconds
+        self.max_jobs = max(1, max_jobs)
+        self._jobs: dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, func: JobFunc, title: str = "", owner: str = "") -> Job:
+        job = Job(id=utils.get_uuid(remove_hyphen=True), title=title, owner=owner)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        job._future = asyncio.run_coroutine_threadsafe(
+            self._run(job, func), utils.get_event_loop()
+        )
+        job._future.add_done_callback(lambda future: self._on_done(job, future))
+        logger.info(f"job {job.id} queued: {title}")
+        return job
+
+    async def _run(self, job: Job, func: JobFunc) -> None:
+        if self._semaphore is None:
+            # 在后台事件循环中创建，只会在该循环的线程中访问
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        try:
+            async with self._semaphore:
+                job.status = RUNNING
+                job.started_at = time.time()
+                job.result = await func(job)
+                job.status = SUCCEEDED
+                logger.success(f"job {job.id} succeeded in {job.elapsed:.1f}s")
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            logger.info(f"job {job.id} cancelled")
+            raise
+        except Exception as exc:
+            job.status = FAILED
+            job.error = str(exc)
+            logger.error(f"job {job.id} failed, error: {str(exc)}")
+        finally:
+            job.finished_at = time.time()
+
+    @staticmethod
+    def _on_done(job: Job, future: Future) -> None:
+        # 还没开始执行就被取消的任务不会进入 _run，在这里补上状态
+        if future.cancelled() and not job.finished:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, owner: Optional[str] = None) -> list[Job]:
+        """
+        按提交顺序返回任务，指定 owner 时只返回该会话提交的任务。
+        """
+
+        with self._lock:
+            return [
+                job for job in self._jobs.values() if owner is None or job.owner == owner
+            ]
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        if job is None or job.finished or job._future is None:
+            return False
+        return job._future.cancel()
+
+    def remove(self, job_id: str) -> None:
+        """
+        取消并移除任务，不删除任务已生成的文件。
+        """
+
+        self.cancel(job_id)
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def _prune(self) -> None:
+        now = time.time()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished),
+            key=lambda job: job.finished_at,
+        )
+        overflow = len(self._jobs) - self.max_jobs + 1
+        for job in finished:
+            if overflow > 0 or now - job.finished_at > self.keep_seconds:
+                del self._jobs[job.id]
+                overflow -= 1
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """
+    返回进程内共享的任务管理器，配置从 config.jobs 读取。
+    """
+
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = JobManager(
+                    max_workers=int(config.jobs.get("max_workers", 2)),
+                    keep_seconds=float(config.jobs.get("keep_seconds", 3600)),
+                    max_jobs=int(config.jobs.get("max_jobs", 200)),
+                )
+    return _manager
+
+
+__all__ = [
+    "CANCELLED",
+    "FAILED",
+    "FINISHED_STATES",
+    "Job",
+    "JobFunc",
+    "JobManager",
+    "QUEUED",
+    "RUNNING",
+    "SUCCEEDED",
+    "get_job_manager",
+]
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.services import resilience
+
+
+class TokenBucket:
+    """
+    令牌桶：rate 为每秒补充的令牌数，capacity 为桶容量。
+    单次申请超过容量时允许透支，后续申请等待令牌补足，避免大请求永远拿不到令牌。
+    """
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, amount: float) -> float:
+        """
+        预留令牌并返回需要等待的秒数。
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    async def acquire(self, amount: float = 1) -> None:
+        delay = self._reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制：收到限流时并发上限乘性减小，成功时加性增大，
+    使吞吐量贴近服务端上限而不触发惩罚窗口。
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        decrease_factor: float = 0.5,
+        adaptive: bool = True,
+    ) -> None:
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(initial_limit or self.max_limit)
+        self.decrease_factor = decrease_factor
+        self.adaptive = adaptive
+        self.in_flight = 0
+        self._waiters: deque[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_flight < int(self.limit) and not self._waiters:
+                self.in_flight += 1
+                return
+            waiter = loop.create_future()
+            self._waiters.append((loop, waiter))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if (loop, waiter) in self._waiters:
+                    self._waiters.remove((loop, waiter))
+                    raise
+            # 已经拿到名额后才被取消，归还名额
+            self.release()
+            raise
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._wake_waiters()
+
+    def _wake_waiters(self) -> None:
+        # 调用方需持有 self._lock；等待者可能属于不同的事件循环
+        while self._waiters and self.in_flight < int(self.limit):
+            loop, waiter = self._waiters.popleft()
+            self.in_flight += 1
+            loop.call_soon_threadsafe(_resolve_waiter, waiter)
+
+    def on_success(self) -> None:
+        if not self.adaptive:
+            return
+        with self._lock:
+            self.limit = min(self.max_limit, self.limit + 1.0 / max(1.0, self.limit))
+            self._wake_waiters()
+
+    def on_throttled(self) -> None:
+        if not self.adaptive:
+            return
+        with self._lock:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+
+
+def _resolve_waiter(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """
+    单个引擎 + API Key 的限流器：请求数令牌桶、字符数令牌桶和自适应并发。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        requests_per_second: float = 0,
+        chars_per_minute: float = 0,
+        max_concurrency: int = 8,
+        adaptive: bool = True,
+    ) -> None:
+        self.name = name
+        self.requests = (
+            TokenBucket(requests_per_second, max(1.0, requests_per_second))
+            if requests_per_second > 0
+            else None
+        )
+        self.chars = (
+            TokenBucket(chars_per_minute / 60.0, chars_per_minute)
+            if chars_per_minute > 0
+            else None
+        )
+        self.concurrency = AdaptiveConcurrency(max_concurrency, adaptive=adaptive)
+
+    @asynccontextmanager
+    async def limit(self, chars: int = 0) -> AsyncIterator[None]:
+        await self.concurrency.acquire()
+        token = _current_limiter.set(self)
+        try:
+            if self.requests is not None:
+                await self.requests.acquire(1)
+            if self.chars is not None and chars > 0:
+                await self.chars.acquire(chars)
+            yield
+        finally:
+            try:
+                _current_limiter.reset(token)
+            except ValueError:
+                # 异步生成器在其他上下文中被关闭时无法还原，忽略即可
+                pass
+            self.concurrency.release()
+
+
+_current_limiter: contextvars.ContextVar[Optional[RateLimiter]] = contextvars.ContextVar(
+    "current_rate_limiter", default=None
+)
+_limiters: dict[tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def _limiter_settings(engine_id: str, key_id: str) -> dict:
+    engine_settings = dict(config.rate_limit.get(engine_id, {}))
+    key_settings = engine_settings.pop("keys", {}).get(key_id, {})
+    engine_settings.update(key_settings)
+    return engine_settings
+
+
+def get_rate_limiter(engine_id: str, key_id: str = "") -> Optional[RateLimiter]:
+    """
+    返回引擎 + API Key 对应的限流器，未启用限流时返回 None。
+    key_id 为 API Key 的指纹，可在 [rate_limit.<engine_id>.keys.<key_id>] 中单独配置。
+    """
+
+    if not config.rate_limit.get("enabled", True):
+        return None
+    with _limiters_lock:
+        limiter = _limiters.get((engine_id, key_id))
+        if limiter is None:
+            settings = _limiter_settings(engine_id, key_id)
+            limiter = RateLimiter(
+                name=f"{engine_id}:{key_id}" if key_id else engine_id,
+                requests_per_second=float(settings.get("requests_per_second", 0)),
+                chars_per_minute=float(settings.get("chars_per_minute", 0)),
+                max_concurrency=int(settings.get("max_concurrency", 8)),
+                adaptive=bool(settings.get("adaptive", True)),
+            )
+            _limiters[(engine_id, key_id)] = limiter
+            logger.debug(f"rate limiter created: {limiter.name}, settings: {settings}")
+        return limiter
+
+
+@asynccontextmanager
+async def limit(engine_id: str, key_id: str = "", chars: int = 0) -> AsyncIterator[None]:
+    """
+    在引擎调用外层使用，按配置限制请求速率、字符速率和并发数。
+    """
+
+    limiter = get_rate_limiter(engine_id, key_id)
+    if limiter is None:
+        yield
+        return
+    async with limiter.limit(chars):
+        yield
+
+
+def _apply_outcome(
+    limiter: RateLimiter, error: Optional[resilience.TTSServiceError]
+) -> None:
+    if error is None:
+        limiter.concurrency.on_success()
+    elif error.kind == "throttled":
+        limiter.concurrency.on_throttled()
+        logger.warning(
+            f"{limiter.name} throttled, concurrency limit: {limiter.concurrency.limit:.2f}"
+        )
+
+
+def record_outcome(
+    engine_id: str, key_id: str, error: Optional[resilience.TTSServiceError]
+) -> None:
+    """
+    把单次请求的结果反馈给对应的限流器，用于在重试逻辑之内按 Key 限流的场景。
+    """
+
+    limiter = get_rate_limiter(engine_id, key_id)
+    if limiter is not None:
+        _apply_outcome(limiter, error)
+
+
+def _on_outcome(engine_id: str, error: Optional[resilience.TTSServiceError]) -> None:
+    # 重试逻辑在引擎内部，与限流器处于同一个任务中，通过 contextvar 找到当前限流器
+    limiter = _current_limiter.get()
+    if limiter is not None:
+        _apply_outcome(limiter, error)
+
+
+resilience.add_outcome_listener(_on_outcome)
+
+
+__all__ = [
+    "AdaptiveConcurrency",
+    "RateLimiter",
+    "TokenBucket",
+    "get_rate_limiter",
+    "limit",
+    "record_outcome",
+]
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import asyncio
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+from loguru import logger
+
+from app.config import config
+
+T = TypeVar("T")
+
+
+class TTSServiceError(Exception):
+    """
+    经过分类的引擎调用错误。
+
+    kind 取值：throttled（限流）、server（服务端错误）、network（连接中断/超时）、
+    auth（鉴权失败）、quota（额度不足）、client（请求参数错误）、io（本地文件读写失败）、unknown。
+    """
+
+    def __init__(
+        self,
+        message: str,
+        kind: str = "unknown",
+        retryable: bool = True,
+        retry_after: Optional[float] = None,
+        status: Optional[int] = None,
+    ) -> None:
+        super().__init__(message)
+        self.kind = kind
+        self.retryable = retryable
+        self.retry_after = retry_after
+        self.status = status
+
+
+class CircuitOpenError(TTSServiceError):
+    """
+    引擎的熔断器处于打开状态，请求被直接拒绝。
+    """
+
+    def __init__(self, engine_id: str, retry_after: float) -> None:
+        super().__init__(
+            f"circuit open for {engine_id}, retry after {retry_after:.1f}s",
+            kind="circuit_open",
+            retryable=False,
+            retry_after=retry_after,
+        )
+        self.engine_id = engine_id
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    解析 Retry-After 头，支持秒数和 HTTP 日期两种格式。
+    """
+
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def error_from_http_status(
+    status: int, message: str = "", retry_after: Optional[str] = None
+) -> TTSServiceError:
+    """
+    根据 HTTP 状态码构造分类后的错误。
+    """
+
+    message = message or f"http status {status}"
+    if status == 429:
+        return TTSServiceError(
+            message,
+            kind="throttled",
+            retry_after=parse_retry_after(retry_after),
+            status=status,
+        )
+    if status >= 500 or status == 408:
+        return TTSServiceError(
+            message,
+            kind="server",
+            retry_after=parse_retry_after(retry_after),
+            status=status,
+        )
+    if status in (401, 403):
+        return TTSServiceError(message, kind="auth", retryable=False, status=status)
+    if status == 402:
+        return TTSServiceError(message, kind="quota", retryable=False, status=status)
+    return TTSServiceError(message, kind="client", retryable=False, status=status)
+
+
+def classify_exception(exc: BaseException) -> TTSServiceError:
+    """
+    把引擎抛出的原始异常归类为 TTSServiceError。
+    """
+
+    if isinstance(exc, TTSServiceError):
+        return exc
+
+    # aiohttp 和 edge_tts 未加载时异常不可能来自它们，无需为分类而导入
+    aiohttp = sys.modules.get("aiohttp")
+    if aiohttp and isinstance(exc, aiohttp.ClientResponseError):
+        retry_after = exc.headers.get("Retry-After") if exc.headers else None
+        return error_from_http_status(exc.status, str(exc), retry_after)
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)) or (
+        aiohttp and isinstance(exc, aiohttp.ClientError)
+    ):
+        return TTSServiceError(str(exc) or type(exc).__name__, kind="network")
+    if isinstance(exc, OSError):
+        # 其余 OSError 来自本地文件操作（如输出路径不存在、没有写权限），重试无用，也不代表引擎故障
+        return TTSServiceError(str(exc) or type(exc).__name__, kind="io", retryable=False)
+
+    edge_tts_exceptions = sys.modules.get("edge_tts.exceptions")
+    if edge_tts_exceptions and isinstance(
+        exc, edge_tts_exceptions.BaseEdgeTTSException
+    ):
+        # websocket 断开、没有收到音频等，重试通常可以恢复
+        return TTSServiceError(str(exc) or type(exc).__name__, kind="network")
+
+    if isinstance(exc, ValueError):
+        return TTSServiceError(str(exc), kind="client", retryable=False)
+    return TTSServiceError(str(exc) or type(exc).__name__, kind="unknown")
+
+
+@dataclass(slots=True)
+class RetryPolicy:
+    """
+    指数退避 + 全抖动的重试策略。
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+
+    def compute_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            # 服务端明确要求的等待时间优先，额外加少量抖动避免同时重试
+            return min(self.max_delay, retry_after) + random.uniform(0, self.base_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2**attempt))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """
+    单个引擎的熔断器：连续失败达到阈值后打开，冷却时间过后放行一次探测请求，
+    探测成功则关闭，失败则重新打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, engine_id: str, failure_threshold: int = 5, reset_timeout: float = 30.0
+    ) -> None:
+        self.engine_id = engine_id
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def before_request(self) -> None:
+        """
+        熔断器打开时抛出 CircuitOpenError。
+        """
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            elapsed = time.monotonic() - self.opened_at
+            if self.state == self.OPEN and elapsed >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return
+            raise CircuitOpenError(
+                self.engine_id, max(0.0, self.reset_timeout - elapsed)
+            )
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"circuit closed for {self.engine_id}")
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_ignored(self) -> None:
+        """
+        请求失败但不代表服务不可用（如参数错误）时调用，释放半开状态下的探测名额。
+        """
+
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(
+                        f"circuit opened for {self.engine_id}, failures: {self.failures}"
+                    )
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(engine_id: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(engine_id)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                engine_id,
+                failure_threshold=int(config.retry.get("circuit_failure_threshold", 5)),
+                reset_timeout=float(config.retry.get("circuit_reset_timeout", 30)),
+            )
+            _breakers[engine_id] = breaker
+        return breaker
+
+
+def get_retry_policy() -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=int(config.retry.get("max_attempts", 3)),
+        base_delay=float(config.retry.get("base_delay", 0.5)),
+        max_delay=float(config.retry.get("max_delay", 10)),
+    )
+
+
+_outcome_listeners: list[Callable[[str, Optional[TTSServiceError]], None]] = []
+
+
+def add_outcome_listener(
+    listener: Callable[[str, Optional[TTSServiceError]], None]
+) -> None:
+    """
+    注册调用结果监听器：每次尝试成功时以 (engine_id, None) 调用，失败时传入分类后的错误。
+    """
+
+    _outcome_listeners.append(listener)
+
+
+def _notify(engine_id: str, error: Optional[TTSServiceError]) -> None:
+    for listener in _outcome_listeners:
+        try:
+            listener(engine_id, error)
+        except Exception as exc:
+            logger.warning(f"outcome listener failed: {str(exc)}")
+
+
+def _record_failure(breaker: CircuitBreaker, error: TTSServiceError) -> None:
+    _notify(breaker.engine_id, error)
+    # 只有服务端问题才计入熔断，参数错误等客户端问题不代表服务不可用
+    if error.kind in ("throttled", "server", "network", "unknown"):
+        breaker.record_failure()
+    else:
+        breaker.record_ignored()
+
+
+async def call_with_retry(
+    engine_id: str,
+    attempt: Callable[[int], Awaitable[T]],
+    policy: Optional[RetryPolicy] = None,
+) -> T:
+    """
+    按重试策略调用 attempt(try_index)，失败时退避重试，并在熔断器打开时快速失败。
+    重试耗尽或遇到不可重试的错误时抛出 TTSServiceError。
+    """
+
+    policy = policy or get_retry_policy()
+    breaker = get_circuit_breaker(engine_id)
+
+    for i in range(policy.max_attempts):
+        breaker.before_request()
+        try:
+            result = await attempt(i)
+        except Exception as exc:
+            error = classify_exception(exc)
+            _record_failure(breaker, error)
+            if not error.retryable or i == policy.max_attempts - 1:
+                raise error from exc
+            delay = policy.compute_delay(i, error.retry_after)
+            logger.warning(
+                f"{engine_id} failed ({error.kind}): {str(error)}, retry in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        except BaseException:
+            # 被取消的请求没有结果，释放半开状态下的探测名额，否则熔断器会一直拒绝请求
+            breaker.record_ignored()
+            raise
+        else:
+            breaker.record_success()
+            _notify(engine_id, None)
+            return result
+
+    raise TTSServiceError(f"{engine_id} retry attempts exhausted")
+
+
+async def stream_with_retry(
+    engine_id: str,
+    open_stream: Callable[[int], AsyncIterator[T]],
+    policy: Optional[RetryPolicy] = None,
+) -> AsyncIterator[T]:
+    """
+    call_with_retry 的流式版本：已经产出的数据无法撤回，只在首个数据到达前失败时重试。
+    """
+
+    policy = policy or get_retry_policy()
+    breaker = get_circuit_breaker(engine_id)
+
+    for i in range(policy.max_attempts):
+        breaker.before_request()
+        emitted = False
+        try:
+            async for item in open_stream(i):
+                emitted = True
+                yield item
+        except Exception as exc:
+            error = classify_exception(exc)
+            _record_failure(breaker, error)
+            if emitted or not error.retryable or i == policy.max_attempts - 1:
+                raise error from exc
+            delay = policy.compute_delay(i, error.retry_after)
+            logger.warning(
+                f"{engine_id} stream failed ({error.kind}): {str(error)}, retry in {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+        except BaseException:
+            # 被取消或调用方提前关闭（GeneratorExit）时同样释放探测名额
+            breaker.record_ignored()
+            raise
+        else:
+            breaker.record_success()
+            _notify(engine_id, None)
+            return
+
+
+__all__ = [
+    "add_outcome_listener",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "RetryPolicy",
+    "TTSServiceError",
+    "call_with_retry",
+    "classify_exception",
+    "error_from_http_status",
+    "get_circuit_breaker",
+    "get_retry_policy",
+    "parse_retry_after",
+    "stream_with_retry",
+]
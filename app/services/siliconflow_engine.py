@@ -1,16 +1,59 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
-from typing import Union
+import asyncio
+import threading
+from typing import TYPE_CHECKING, AsyncIterator, Optional, Union
 
-import requests
-from edge_tts import SubMaker
 from loguru import logger
 
 from app.config import config
-from app.utils import utils
+from app.utils import mp3, utils
+
+from .credentials import Credential, CredentialPool, get_credential_pool
+from .http_client import HttpClientPool
+from .resilience import (
+    TTSServiceError,
+    call_with_retry,
+    error_from_http_status,
+    stream_with_retry,
+)
+from .tts_engine_base import TTSEngine, TTSRequest, TTSStreamEvent, new_sub_maker
+from .voice_catalog import get_voice_catalog
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+    from app.config.settings import Settings
+
+_API_BASE_URL = "https://api.siliconflow.cn"
+_API_URL = f"{_API_BASE_URL}/v1/audio/speech"
+_STREAM_CHUNK_SIZE = 16 * 1024
+
+_http_pool: Optional[HttpClientPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpClientPool:
+    """
+    返回硅基流动共享的 HTTP 连接池，连接数和超时从 config.siliconflow 读取。
+    """
+
+    global _http_pool
+    if _http_pool is None:
+        with _http_pool_lock:
+            if _http_pool is None:
+                _http_pool = HttpClientPool(
+                    name="siliconflow",
+                    pool_size=int(config.siliconflow.get("pool_size", 10)),
+                    keepalive_timeout=float(
+                        config.siliconflow.get("keepalive_timeout", 60)
+                    ),
+                    connect_timeout=float(config.siliconflow.get("connect_timeout", 10)),
+                    read_timeout=float(config.siliconflow.get("read_timeout", 60)),
+                )
+    return _http_pool
 
-from .tts_engine_base import TTSEngine, TTSRequest
 
 _SILICONFLOW_VOICES_WITH_GENDER = [
     ("FunAudioLLM/CosyVoice2-0.5B", "alex", "Male"),
@@ -25,10 +68,7 @@ _SILICONFLOW_VOICES_WITH_GENDER = [
 
 
 def get_siliconflow_voices() -> list[str]:
-    return [
-        f"siliconflow:{model}:{voice}-{gender}"
-        for model, voice, gender in _SILICONFLOW_VOICES_WITH_GENDER
-    ]
+    return list(get_voice_catalog().voice_ids(SiliconFlowEngine.engine_id))
 
 
 def is_siliconflow_voice(voice_name: str) -> bool:
@@ -37,6 +77,8 @@ def is_siliconflow_voice(voice_name: str) -> bool:
 
 class SiliconFlowEngine(TTSEngine):
     engine_id = "siliconflow"
+    max_chunk_chars = 1000
+    limits_per_credential = True
 
     def supports_voice(self, voice_name: str) -> bool:
         return is_siliconflow_voice(voice_name)
@@ -44,19 +86,47 @@ class SiliconFlowEngine(TTSEngine):
     def list_voices(self) -> list[str]:
         return get_siliconflow_voices()
 
-    def synthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+    @staticmethod
+    def credential_pool(settings: Optional[Settings] = None) -> CredentialPool:
+        """
+        返回 API Key 池。配置了 siliconflow.credentials 列表时使用列表中的 Key，否则使用单个 api_key。
+        传入 settings 时读取会话的设置快照。
+        """
+
+        siliconflow = settings.siliconflow if settings is not None else config.siliconflow
+        entries = [
+            {"key": item.get("api_key", ""), "weight": item.get("weight", 1)}
+            for item in siliconflow.get("credentials", [])
+            if item.get("api_key")
+        ]
+        if not entries and siliconflow.get("api_key", ""):
+            entries = [{"key": siliconflow.get("api_key", "")}]
+        return get_credential_pool(SiliconFlowEngine.engine_id, entries)
+
+    async def awarmup(self) -> None:
+        if not config.siliconflow.get("warmup", False):
+            return
+        if not len(self.credential_pool()):
+            return
+        await get_http_pool().warmup(
+            _API_BASE_URL, int(config.siliconflow.get("warmup_connections", 2))
+        )
+
+    def _prepare(self, request: TTSRequest, stream: bool = False) -> Optional[dict]:
+        """
+        校验配置并构造请求参数，失败时返回 None。
+        """
+
         text = request.text.strip()
-        api_key = config.siliconflow.get("api_key", "")
 
-        if not api_key:
+        pool = self.credential_pool(request.settings)
+        if not len(pool):
             logger.error("SiliconFlow API key is not set")
             return None
 
         gain = request.voice_volume - 1.0
         gain = max(-10, min(10, gain))
 
-        url = "https://api.siliconflow.cn/v1/audio/speech"
-
         parts = request.voice_name.split(":")
         if len(parts) < 3:
             logger.error(f"Invalid siliconflow voice name format: {request.voice_name}")
@@ -65,95 +135,175 @@ class SiliconFlowEngine(TTSEngine):
         model = parts[1]
         voice_with_gender = parts[2]
         voice = voice_with_gender.split("-")[0]
-        full_voice = f"{model}:{voice}"
 
-        payload = {
+        return {
+            "text": text,
+            "pool": pool,
             "model": model,
-            "input": text,
-            "voice": voice,
-            "response_format": "mp3",
-            "sample_rate": 32000,
-            "stream": False,
-            "speed": request.voice_rate,
-            "gain": gain,
+            "full_voice": f"{model}:{voice}",
+            "payload": {
+                "model": model,
+                "input": text,
+                "voice": voice,
+                "response_format": "mp3",
+                "sample_rate": 32000,
+                "stream": stream,
+                "speed": request.voice_rate,
+                "gain": gain,
+            },
         }
 
+    async def _post(self, prepared: dict, credential: Credential):
+        """
+        使用指定的 API Key 发起合成请求，非 200 响应转换为分类后的 TTSServiceError。
+        """
+
+        session = get_http_pool().get_session()
         headers = {
-            "Authorization": f"Bearer {api_key}",
+            "Authorization": f"Bearer {credential.key}",
             "Content-Type": "application/json",
         }
-
-        for i in range(3):
+        response = await session.post(_API_URL, json=prepared["payload"], headers=headers)
+        if response.status != 200:
             try:
-                logger.info(
-                    f"start siliconflow tts, model: {model}, voice: {full_voice}, try: {i + 1}"
-                )
-
-                response = requests.post(url, json=payload, headers=headers)
-
-                if response.status_code == 200:
+                message = await response.text()
+            finally:
+                response.release()
+            logger.error(
+                f"siliconflow tts failed with status code {response.status}: {message}"
+            )
+            raise error_from_http_status(
+                response.status, message, response.headers.get("Retry-After")
+            )
+        return response
+
+    async def asynthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        prepared = self._prepare(request)
+        if prepared is None:
+            return None
+        text = prepared["text"]
+        pool = prepared["pool"]
+
+        async def _attempt(i: int) -> None:
+            logger.info(
+                f"start siliconflow tts, model: {prepared['model']}, voice: {prepared['full_voice']}, try: {i + 1}"
+            )
+            # 每次尝试重新选择 Key，被限流或失效的 Key 会在重试时被绕开
+            async with pool.use(len(text)) as credential:
+                async with await self._post(prepared, credential) as response:
+                    # 分块写入磁盘，不在内存中保留完整响应
                     with open(request.voice_file, "wb") as f:
-                        f.write(response.content)
-
-                    sub_maker = SubMaker()
-
-                    try:
-                        from moviepy import AudioFileClip
-
-                        audio_clip = AudioFileClip(request.voice_file)
-                        audio_duration = audio_clip.duration
-                        audio_clip.close()
-
-                        audio_duration_100ns = int(audio_duration * 10000000)
-
-                        sentences = utils.split_string_by_punctuations(text)
-
-                        if sentences:
-                            total_chars = sum(len(s) for s in sentences)
-                            char_duration = (
-                                audio_duration_100ns / total_chars
-                                if total_chars > 0
-                                else 0
-                            )
-
-                            current_offset = 0
-                            for sentence in sentences:
-                                if not sentence.strip():
-                                    continue
-
-                                sentence_chars = len(sentence)
-                                sentence_duration = int(sentence_chars * char_duration)
-
-                                sub_maker.subs.append(sentence)
-                                sub_maker.offset.append(
-                                    (current_offset, current_offset + sentence_duration)
-                                )
-
-                                current_offset += sentence_duration
-                        else:
-                            sub_maker.subs = [text]
-                            sub_maker.offset = [(0, audio_duration_100ns)]
-
-                    except Exception as exc:
-                        logger.warning(f"Failed to create accurate subtitles: {str(exc)}")
-                        sub_maker.subs = [text]
-                        sub_maker.offset = [
-                            (
-                                0,
-                                locals().get("audio_duration_100ns", 10000000),
-                            )
-                        ]
-
-                    logger.success(f"siliconflow tts succeeded: {request.voice_file}")
-                    return sub_maker
-                else:
-                    logger.error(
-                        f"siliconflow tts failed with status code {response.status_code}: {response.text}"
-                    )
-            except Exception as exc:
-                logger.error(f"siliconflow tts failed: {str(exc)}")
-
-        return None
+                        async for data in response.content.iter_chunked(
+                            _STREAM_CHUNK_SIZE
+                        ):
+                            f.write(data)
+
+        try:
+            await call_with_retry(self.engine_id, _attempt)
+        except TTSServiceError as exc:
+            logger.error(f"siliconflow tts failed: {str(exc)}")
+            return None
+
+        # 没有 Xing 头的音频需要逐帧遍历帧头，长音频放到线程中执行以免阻塞事件循环
+        sub_maker = await asyncio.to_thread(_build_sub_maker, request.voice_file, text)
+        logger.success(f"siliconflow tts succeeded: {request.voice_file}")
+        return sub_maker
+
+    async def _stream_once(self, prepared: dict) -> AsyncIterator[TTSStreamEvent]:
+        audio = bytearray()
+        async with prepared["pool"].use(len(prepared["text"])) as credential:
+            async with await self._post(prepared, credential) as response:
+                async for data in response.content.iter_chunked(_STREAM_CHUNK_SIZE):
+                    audio.extend(data)
+                    yield TTSStreamEvent(type="audio", data=data)
+
+        # 硅基流动不返回时间轴，音频结束后按句子估算并补发边界事件
+        for event in await asyncio.to_thread(
+            _estimate_boundaries, bytes(audio), prepared["text"]
+        ):
+            yield event
+
+    async def astream(self, request: TTSRequest) -> AsyncIterator[TTSStreamEvent]:
+        prepared = self._prepare(request, stream=True)
+        if prepared is None:
+            return
+
+        def _open(i: int) -> AsyncIterator[TTSStreamEvent]:
+            logger.info(
+                f"start siliconflow streaming, model: {prepared['model']}, voice: {prepared['full_voice']}, try: {i + 1}"
+            )
+            return self._stream_once(prepared)
+
+        emitted = False
+        try:
+            async for event in stream_with_retry(self.engine_id, _open):
+                emitted = True
+                yield event
+        except TTSServiceError as exc:
+            logger.error(f"siliconflow tts failed: {str(exc)}")
+            if emitted:
+                # 已经产出了部分数据，抛出异常让调用方知道结果不完整
+                raise
+            return
+        logger.success("siliconflow streaming completed")
+
+
+def _build_sub_maker(voice_file: str, text: str) -> SubMaker:
+    """
+    硅基流动不返回字幕时间轴，按句子字符数在音频总时长内线性分配。
+    """
+
+    try:
+        audio_duration_100ns = mp3.parse_mp3_file(
+            voice_file, collect_frames=False
+        ).duration_100ns
+    except (OSError, ValueError) as exc:
+        logger.warning(f"Failed to read audio duration: {str(exc)}")
+        audio_duration_100ns = 0
+    return _distribute_sentences(text, audio_duration_100ns)
+
+
+def _distribute_sentences(text: str, audio_duration_100ns: int) -> SubMaker:
+    sub_maker = new_sub_maker()
+    if audio_duration_100ns <= 0:
+        logger.warning("Failed to create accurate subtitles: unknown audio duration")
+        sub_maker.subs = [text]
+        sub_maker.offset = [(0, 10000000)]
+        return sub_maker
+
+    sentences = utils.split_string_by_punctuations(text)
+
+    if sentences:
+        total_chars = sum(len(s) for s in sentences)
+        char_duration = audio_duration_100ns / total_chars if total_chars > 0 else 0
+
+        current_offset = 0
+        for sentence in sentences:
+            if not sentence.strip():
+                continue
+
+            sentence_chars = len(sentence)
+            sentence_duration = int(sentence_chars * char_duration)
+
+            sub_maker.subs.append(sentence)
+            sub_maker.offset.append((current_offset, current_offset + sentence_duration))
+
+            current_offset += sentence_duration
+    else:
+        sub_maker.subs = [text]
+        sub_maker.offset = [(0, audio_duration_100ns)]
+
+    return sub_maker
+
+
+def _estimate_boundaries(audio: bytes, text: str) -> list[TTSStreamEvent]:
+    # 直接在内存中解析帧头得到时长，无需写临时文件再启动 ffmpeg
+    duration = mp3.parse_mp3(audio, collect_frames=False).duration_100ns
+    sub_maker = _distribute_sentences(text, duration)
+    return [
+        TTSStreamEvent(type="WordBoundary", offset=start, duration=end - start, text=sub)
+        for (start, end), sub in zip(sub_maker.offset, sub_maker.subs)
+    ]
 
 
 __all__ = ["SiliconFlowEngine", "get_siliconflow_voices", "is_siliconflow_voice"]
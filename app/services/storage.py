@@ -0,0 +1,407 @@
+# -*- coding: utf-8 -*-
+"""
+storage/output 和 storage/temp 的生命周期管理。
+
+新文件按名称哈希分到两级子目录，避免单个目录下堆积大量文件：
+    storage/<area>/<md5(stem)[:2]>/<name>                  未归属的文件（HTTP 服务、命令行）
+    storage/<area>/<md5(owner)[:2]>/~<owner>/<name>        归属于某个会话的文件（WebUI）
+
+后台清理线程以低优先级定期扫描各区域，把直接位于区域根目录或分片目录下的每个文件或目录
+视为一个条目，依次删除：超过 max_age_hours 的条目、超出 per_user_size_mb 的会话中最旧的条目、
+区域总大小超过 max_size_mb 时全区最旧的条目。修改时间在 min_age 秒以内的条目不会被删除，
+以免删掉正在写入的文件；以 . 开头的文件（如 .gitkeep）不参与清理。
+"""
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.utils import utils
+
+# 受管理的区域及默认的保留策略
+AREAS = ("output", "temp")
+_DEFAULT_POLICIES = {
+    "output": {"max_age_hours": 168, "max_size_mb": 2048, "per_user_size_mb": 512},
+    "temp": {"max_age_hours": 24, "max_size_mb": 512, "per_user_size_mb": 0},
+}
+
+_OWNER_PREFIX = "~"
+_OWNER_PATTERN = re.compile(r"^[0-9A-Za-z_-]{1,64}$")
+_SHARD_PATTERN = re.compile(r"^[0-9a-f]{2}$")
+
+# 扫描时每处理这么多个文件让出一次 CPU 和磁盘
+_SCAN_BATCH = 256
+
+
+def shard_path(base_dir: str, name: str, owner: str = "") -> str:
+    """
+    返回 name 在 base_dir 下的分片路径，不创建目录。
+    未指定 owner 时按文件名去掉扩展名的部分分片，同名的 .mp3 和 .srt 会落在同一个目录。
+    """
+
+    if not name or os.path.basename(name) != name or name.startswith((".", _OWNER_PREFIX)):
+        raise ValueError(f"invalid storage file name: {name}")
+    if owner:
+        if not _OWNER_PATTERN.match(owner):
+            raise ValueError(f"invalid storage owner: {owner}")
+        return os.path.join(base_dir, utils.md5(owner)[:2], _OWNER_PREFIX + owner, name)
+    return os.path.join(base_dir, utils.md5(os.path.splitext(name)[0])[:2], name)
+
+
+@dataclass(slots=True)
+class RetentionPolicy:
+    """
+    一个区域的保留策略，各项为 0 表示不限制。
+    """
+
+    max_age: float = 0.0
+    max_bytes: int = 0
+    per_user_bytes: int = 0
+
+    @classmethod
+    def from_config(cls, area: str) -> "RetentionPolicy":
+        values = {**_DEFAULT_POLICIES.get(area, {}), **config.storage.get(area, {})}
+        return cls(
+            max_age=float(values.get("max_age_hours", 0)) * 3600,
+            max_bytes=int(float(values.get("max_size_mb", 0)) * 1024 * 1024),
+            per_user_bytes=int(float(values.get("per_user_size_mb", 0)) * 1024 * 1024),
+        )
+
+
+@dataclass(slots=True)
+class StorageItem:
+    path: str
+    owner: str
+    size: int
+    mtime: float
+    is_dir: bool = False
+
+
+@dataclass(slots=True)
+class SweepReport:
+    """
+    一次清理一个区域的结果。
+    """
+
+    area: str
+    scanned: int = 0
+    removed: int = 0
+    reclaimed_bytes: int = 0
+    remaining_bytes: int = 0
+    errors: int = 0
+    finished_at: float = field(default_factory=time.time)
+
+    def summary(self) -> str:
+        return (
+            f"{self.area}: removed {self.removed} of {self.scanned} items, "
+            f"reclaimed {self.reclaimed_bytes / 1024 / 1024:.1f} MB, "
+            f"{self.remaining_bytes / 1024 / 1024:.1f} MB left"
+        )
+
+
+class StorageManager:
+    """
+    管理 storage 下 output、temp 两个区域的文件布局和保留策略。
+
+    path_for() 返回新文件的分片路径；sweep() 按策略清理一遍并返回每个区域的 SweepReport；
+    start() 启动后台清理线程，每隔 sweep_interval 秒执行一次 sweep()。
+    """
+
+    def __init__(
+        self,
+        root: str = "",
+        policies: Optional[dict[str, RetentionPolicy]] = None,
+        sweep_interval: float = 600,
+        min_age: float = 300,
+    ) -> None:
+        self.root = root or utils.storage_dir()
+        self.policies = policies if policies is not None else {
+            area: RetentionPolicy.from_config(area) for area in AREAS
+        }
+        self.sweep_interval = sweep_interval
+        self.min_age = min_age
+        self.last_reports: dict[str, SweepReport] = {}
+        self.total_reclaimed = 0
+        self._lock = threading.Lock()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def area_dir(self, area: str, create: bool = False) -> str:
+        if area not in self.policies:
+            raise ValueError(f"unknown storage area: {area}")
+        d = os.path.join(self.root, area)
+        if create:
+            os.makedirs(d, exist_ok=True)
+        return d
+
+    def path_for(self, area: str, name: str, owner: str = "") -> str:
+        """
+        返回区域内新文件（或目录）的分片路径，并创建其所在目录。
+        """
+
+        path = shard_path(self.area_dir(area), name, owner)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _scan(self, area: str) -> Iterator[StorageItem]:
+        base = self.area_dir(area)
+        if not os.path.isdir(base):
+            return
+        count = 0
+        for entry, owner in self._entries(base):
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    size, mtime, files = _dir_usage(entry.path)
+                    count += files
+                    yield StorageItem(entry.path, owner, size, mtime, is_dir=True)
+                else:
+                    stat = entry.stat(follow_symlinks=False)
+                    count += 1
+                    yield StorageItem(entry.path, owner, stat.st_size, stat.st_mtime)
+            except FileNotFoundError:
+                continue
+            if count >= _SCAN_BATCH:
+                count = 0
+                # 让出时间片，扫描大目录时不和合成任务抢磁盘
+                time.sleep(0.01)
+
+    @staticmethod
+    def _entries(base: str) -> Iterator[tuple[os.DirEntry, str]]:
+        # 根目录下不是分片目录的条目是旧版本直接写在区域根目录的文件，按未归属处理。
+        # 以 . 开头的文件（如仓库中的 .gitkeep）不是生成的文件，不参与清理
+        for entry in _scandir(base):
+            if entry.is_dir(follow_symlinks=False) and _SHARD_PATTERN.match(entry.name):
+                for child in _scandir(entry.path):
+                    if child.is_dir(follow_symlinks=False) and child.name.startswith(
+                        _OWNER_PREFIX
+                    ):
+                        owner = child.name[len(_OWNER_PREFIX):]
+                        for item in _scandir(child.path):
+                            yield item, owner
+                    else:
+                        yield child, ""
+            else:
+                yield entry, ""
+
+    def _remove(self, item: StorageItem, report: SweepReport) -> None:
+        try:
+            if item.is_dir:
+                shutil.rmtree(item.path)
+            else:
+                os.remove(item.path)
+        except FileNotFoundError:
+            # 可能已被另一个进程的清理线程删除
+            return
+        except OSError as exc:
+            report.errors += 1
+            logger.warning(f"failed to remove {item.path}, error: {str(exc)}")
+            return
+        report.removed += 1
+        report.reclaimed_bytes += item.size
+
+    def sweep_area(self, area: str) -> SweepReport:
+        policy = self.policies[area]
+        report = SweepReport(area=area)
+        now = time.time()
+
+        def evictable(item: StorageItem) -> bool:
+            return now - item.mtime >= self.min_age
+
+        items = []
+        for item in self._scan(area):
+            report.scanned += 1
+            if policy.max_age and now - item.mtime > policy.max_age and evictable(item):
+                self._remove(item, report)
+            else:
+                items.append(item)
+        # 之后按容量淘汰时都从最旧的条目开始
+        items.sort(key=lambda item: item.mtime)
+
+        if policy.per_user_bytes:
+            usage: dict[str, int] = {}
+            for item in items:
+                if item.owner:
+                    usage[item.owner] = usage.get(item.owner, 0) + item.size
+            kept = []
+            for item in items:
+                if item.owner and usage[item.owner] > policy.per_user_bytes and evictable(item):
+                    usage[item.owner] -= item.size
+                    self._remove(item, report)
+                else:
+                    kept.append(item)
+            items = kept
+
+        total = sum(item.size for item in items)
+        if policy.max_bytes and total > policy.max_bytes:
+            kept = []
+            for item in items:
+                if total > policy.max_bytes and evictable(item):
+                    total -= item.size
+                    self._remove(item, report)
+                else:
+                    kept.append(item)
+            items = kept
+
+        report.remaining_bytes = sum(item.size for item in items)
+        self._prune_empty_dirs(area)
+        return report
+
+    def _prune_empty_dirs(self, area: str) -> None:
+        base = self.area_dir(area)
+        for shard in _scandir(base):
+            if not (shard.is_dir(follow_symlinks=False) and _SHARD_PATTERN.match(shard.name)):
+                continue
+            for child in _scandir(shard.path):
+                if child.is_dir(follow_symlinks=False) and child.name.startswith(_OWNER_PREFIX):
+                    _rmdir_if_empty(child.path)
+            _rmdir_if_empty(shard.path)
+
+    def sweep(self) -> list[SweepReport]:
+        """
+        按保留策略清理所有区域，返回每个区域的清理结果。
+        """
+
+        reports = []
+        with self._lock:
+            for area in self.policies:
+                try:
+                    report = self.sweep_area(area)
+                except Exception as exc:
+                    logger.error(f"storage sweep of {area} failed, error: {str(exc)}")
+                    continue
+                self.last_reports[area] = report
+                self.total_reclaimed += report.reclaimed_bytes
+                reports.append(report)
+                if report.removed:
+                    logger.info(f"storage sweep {report.summary()}")
+        return reports
+
+    def usage(self) -> dict[str, int]:
+        """
+        返回各区域当前占用的字节数。
+        """
+
+        return {area: sum(item.size for item in self._scan(area)) for area in self.policies}
+
+    def stats(self) -> dict:
+        return {
+            "total_reclaimed_bytes": self.total_reclaimed,
+            "areas": {
+                area: {
+                    "scanned": report.scanned,
+                    "removed": report.removed,
+                    "reclaimed_bytes": report.reclaimed_bytes,
+                    "remaining_bytes": report.remaining_bytes,
+                    "finished_at": report.finished_at,
+                }
+                for area, report in self.last_reports.items()
+            },
+        }
+
+    def start(self) -> None:
+        """
+        启动后台清理线程，重复调用无副作用。sweep_interval 不大于 0 时不启动。
+        """
+
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(
+                    target=self._run, name="storage-sweeper", daemon=True
+                )
+                self._sweeper.start()
+
+    def _run(self) -> None:
+        _lower_thread_priority()
+        # 启动后先清理一次，之后按间隔执行
+        while not self._stopped.is_set():
+            try:
+                self.sweep()
+            except Exception as exc:
+                logger.warning(f"storage sweeper error: {str(exc)}")
+            if self._stopped.wait(self.sweep_interval):
+                break
+
+    def close(self) -> None:
+        self._stopped.set()
+
+
+def _scandir(path: str) -> list[os.DirEntry]:
+    try:
+        with os.scandir(path) as it:
+            return [entry for entry in it if not entry.name.startswith(".")]
+    except (FileNotFoundError, NotADirectoryError):
+        return []
+
+
+def _dir_usage(path: str) -> tuple[int, float, int]:
+    """
+    返回目录下所有文件的总大小、最新的修改时间和文件数，空目录取目录自身的修改时间。
+    """
+
+    size, mtime, files = 0, 0.0, 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(dirpath, filename))
+            except FileNotFoundError:
+                continue
+            size += stat.st_size
+            mtime = max(mtime, stat.st_mtime)
+            files += 1
+    return size, mtime or os.stat(path).st_mtime, files
+
+
+def _rmdir_if_empty(path: str) -> None:
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def _lower_thread_priority() -> None:
+    # Linux 上 setpriority 作用于单个线程，只降低清理线程的优先级；其他平台忽略
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+_manager: Optional[StorageManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_storage_manager() -> StorageManager:
+    """
+    返回进程内共享的存储管理器，配置从 config.storage 读取。
+    """
+
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = StorageManager(
+                    sweep_interval=float(config.storage.get("sweep_interval", 600)),
+                    min_age=float(config.storage.get("min_age", 300)),
+                )
+    return _manager
+
+
+__all__ = [
+    "AREAS",
+    "RetentionPolicy",
+    "StorageItem",
+    "StorageManager",
+    "SweepReport",
+    "get_storage_manager",
+    "shard_path",
+]
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable
+
+from loguru import logger
+
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+_NON_WORD = re.compile(r"\W+")
+_BRACKETS = str.maketrans({c: " " for c in "[](){}"})
+# 词边界与原文对不上时，向后查找的最大字符数
+_RESYNC_WINDOW = 64
+
+
+@dataclass(slots=True)
+class SubtitleCue:
+    """
+    一条字幕，start/end 为 100 纳秒单位。
+    """
+
+    index: int
+    start: int
+    end: int
+    text: str
+
+
+def _unescape(text: str) -> str:
+    # 与 xml.sax.saxutils.unescape 相同，避免为此导入 urllib
+    return text.replace("&lt;", "<").replace("&gt;", ">").replace("&amp;", "&")
+
+
+def _normalize(text: str) -> str:
+    return _NON_WORD.sub("", text).casefold()
+
+
+def format_text(text: str) -> str:
+    """
+    去掉原文中的括号，与 TTS 引擎实际朗读的内容保持一致。
+    """
+
+    return text.translate(_BRACKETS).strip()
+
+
+def align_subtitles(sub_maker: SubMaker, text: str) -> list[SubtitleCue]:
+    """
+    把引擎返回的词边界按原文的句子分组，每句生成一条字幕。
+
+    原文的每一句只做一次归一化（去掉标点和空白并忽略大小写）后拼接成一个字符串，
+    词边界按顺序用一个游标向前匹配，整体为线性时间。某个词与原文对不上时在后面
+    一小段范围内重新同步，仍找不到则把该词计入当前句，不会因为个别差异丢掉整份字幕。
+    """
+
+    script_lines = utils.split_string_by_punctuations(format_text(text))
+    if not script_lines or not sub_maker.subs:
+        return []
+
+    line_ends = []
+    parts = []
+    total = 0
+    for line in script_lines:
+        normalized = _normalize(line)
+        parts.append(normalized)
+        total += len(normalized)
+        line_ends.append(total)
+    script = "".join(parts)
+
+    cues: list[SubtitleCue] = []
+    line_index = 0
+    cursor = 0
+    start = -1
+    end = 0
+
+    def _emit(first: int, last: int) -> None:
+        cues.append(
+            SubtitleCue(
+                index=len(cues) + 1,
+                start=start,
+                end=max(start, end),
+                text=" ".join(line.strip() for line in script_lines[first:last]),
+            )
+        )
+
+    for (word_start, word_end), word in zip(sub_maker.offset, sub_maker.subs):
+        if line_index >= len(script_lines):
+            # 原文已经全部匹配，多出来的词只延长最后一条字幕
+            cues[-1].end = max(cues[-1].end, word_end)
+            continue
+
+        if start < 0:
+            start = word_start
+        end = word_end
+
+        if "&" in word:
+            word = _unescape(word)
+        normalized = _normalize(word)
+        if normalized:
+            if script.startswith(normalized, cursor):
+                cursor += len(normalized)
+            else:
+                found = script.find(
+                    normalized, cursor, cursor + _RESYNC_WINDOW + len(normalized)
+                )
+                if found >= 0:
+                    cursor = found + len(normalized)
+
+        if cursor >= line_ends[line_index]:
+            first = line_index
+            while line_index < len(line_ends) and cursor >= line_ends[line_index]:
+                line_index += 1
+            _emit(first, line_index)
+            start = -1
+
+    if line_index < len(script_lines):
+        # 音频比原文短或结尾对不上，剩余的句子合并为最后一条字幕
+        if start < 0:
+            start = end
+        _emit(line_index, len(script_lines))
+
+    return cues
+
+
+def validate_cues(cues: Iterable[SubtitleCue]) -> bool:
+    """
+    检查字幕时间轴：每条字幕有内容、结束不早于开始、开始时间不倒退。
+    """
+
+    previous_start = -1
+    for cue in cues:
+        if not cue.text or cue.start < 0 or cue.end < cue.start:
+            return False
+        if cue.start < previous_start:
+            return False
+        previous_start = cue.start
+    return True
+
+
+def _timestamp(ticks: int, separator: str) -> str:
+    milliseconds = ticks // 10000
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{milliseconds:03d}"
+
+
+def to_srt(cues: Iterable[SubtitleCue]) -> str:
+    return "\n".join(
+        f"{cue.index}\n{_timestamp(cue.start, ',')} --> {_timestamp(cue.end, ',')}\n{cue.text}\n"
+        for cue in cues
+    ) + "\n"
+
+
+def to_vtt(cues: Iterable[SubtitleCue]) -> str:
+    body = "\n".join(
+        f"{_timestamp(cue.start, '.')} --> {_timestamp(cue.end, '.')}\n{cue.text}\n"
+        for cue in cues
+    )
+    return f"WEBVTT\n\n{body}\n"
+
+
+def write_subtitles(cues: list[SubtitleCue], subtitle_file: str) -> None:
+    """
+    按扩展名写出 SRT 或 VTT 字幕文件。
+    """
+
+    if os.path.splitext(subtitle_file)[1].lower() == ".vtt":
+        content = to_vtt(cues)
+    else:
+        content = to_srt(cues)
+    with open(subtitle_file, "w", encoding="utf-8") as f:
+        f.write(content)
+
+
+def create_subtitle(sub_maker: SubMaker, text: str, subtitle_file: str) -> list[SubtitleCue]:
+    """
+    按原文句子对齐词边界并写出字幕文件，返回生成的字幕。
+    """
+
+    cues = align_subtitles(sub_maker, text)
+    if not cues:
+        logger.warning("failed, no subtitle generated")
+        return []
+    if not validate_cues(cues):
+        logger.error("failed, invalid subtitle timeline")
+        return []
+
+    write_subtitles(cues, subtitle_file)
+    logger.info(
+        f"completed, subtitle file created: {subtitle_file}, "
+        f"duration: {cues[-1].end / 10000000:.2f}"
+    )
+    return cues
+
+
+__all__ = [
+    "SubtitleCue",
+    "align_subtitles",
+    "create_subtitle",
+    "format_text",
+    "to_srt",
+    "to_vtt",
+    "validate_cues",
+    "write_subtitles",
+]
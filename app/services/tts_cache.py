@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.services.tts_engine_base import new_sub_maker
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+_CACHE_VERSION = 1
+
+# 磁盘超出容量时淘汰到上限的这个比例，之后的若干次写入不必再淘汰
+_LOW_WATER = 0.9
+# 其他进程也会写入同一个缓存目录，淘汰前距上次扫描超过这么多秒时重新扫描磁盘
+_RESCAN_INTERVAL = 60.0
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    """
+    缓存中的一条合成结果：MP3 数据及对应的字幕时间轴。
+    """
+
+    audio: bytes
+    subs: list[str]
+    offset: list[tuple[int, int]]
+
+    def to_sub_maker(self) -> SubMaker:
+        sub_maker = new_sub_maker()
+        sub_maker.subs = list(self.subs)
+        sub_maker.offset = [tuple(item) for item in self.offset]
+        return sub_maker
+
+    @property
+    def size(self) -> int:
+        return len(self.audio)
+
+
+def make_cache_key(
+    engine_id: str,
+    voice_name: str,
+    text: str,
+    voice_rate: float,
+    voice_volume: float,
+    output_format: str = "mp3",
+) -> str:
+    """
+    根据引擎、声音、文本、语速、音量和输出格式计算缓存键。
+    """
+
+    payload = json.dumps(
+        [
+            _CACHE_VERSION,
+            engine_id,
+            voice_name,
+            text,
+            round(float(voice_rate), 4),
+            round(float(voice_volume), 4),
+            output_format,
+        ],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """
+    两级合成缓存：进程内 LRU + storage/cache 下的磁盘存储。
+
+    磁盘条目按键的前两位分目录存放，每条包含 `<key>.mp3` 和 `<key>.json`，
+    写入时先写临时文件再 rename，保证多个 Streamlit 会话可以安全共享。
+    磁盘索引和总大小在内存中维护，超出容量时一次淘汰到上限的 90%，只偶尔重新扫描磁盘。
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_entries: int = 2000,
+        max_bytes: int = 512 * 1024 * 1024,
+        memory_max_entries: int = 64,
+        memory_max_bytes: int = 32 * 1024 * 1024,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+
+        self._memory: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_index: Optional[dict[str, tuple[float, int]]] = None
+        self._disk_bytes = 0
+        self._scanned_at = 0.0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _entry_paths(self, key: str) -> tuple[str, str]:
+        directory = os.path.join(self.cache_dir, key[:2])
+        return os.path.join(directory, f"{key}.mp3"), os.path.join(
+            directory, f"{key}.json"
+        )
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.memory_max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+        self._memory[key] = entry
+        self._memory_bytes += entry.size
+        while self._memory and (
+            len(self._memory) > self.memory_max_entries
+            or self._memory_bytes > self.memory_max_bytes
+        ):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+
+    def _index_entry(self, key: str, mtime: float, size: int) -> None:
+        if self._disk_index is None:
+            return
+        old = self._disk_index.get(key)
+        if old is not None:
+            self._disk_bytes -= old[1]
+        self._disk_index[key] = (mtime, size)
+        self._disk_bytes += size
+
+    def _rescan(self) -> None:
+        self._disk_index = self._scan_disk()
+        self._disk_bytes = sum(size for _, size in self._disk_index.values())
+        self._scanned_at = time.monotonic()
+
+    def _scan_disk(self) -> dict[str, tuple[float, int]]:
+        index = {}
+        if not os.path.isdir(self.cache_dir):
+            return index
+        for root, _, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(".mp3"):
+                    continue
+                path = os.path.join(root, file)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                index[file[: -len(".mp3")]] = (stat.st_mtime, stat.st_size)
+        return index
+
+    def _load_from_disk(self, key: str) -> Optional[CacheEntry]:
+        audio_path, meta_path = self._entry_paths(key)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(audio_path, "rb") as f:
+                audio = f.read()
+        except (OSError, ValueError):
+            return None
+
+        if meta.get("version") != _CACHE_VERSION or meta.get("size") != len(audio):
+            return None
+
+        try:
+            # 刷新访问时间，磁盘淘汰按 mtime 由旧到新进行
+            os.utime(audio_path, None)
+        except OSError:
+            pass
+        return CacheEntry(
+            audio=audio,
+            subs=meta.get("subs", []),
+            offset=[tuple(item) for item in meta.get("offset", [])],
+        )
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return entry
+
+        entry = self._load_from_disk(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, entry)
+            self._index_entry(key, time.time(), entry.size)
+            return entry
+
+    def put(self, key: str, entry: CacheEntry) -> None:
+        audio_path, meta_path = self._entry_paths(key)
+        meta = {
+            "version": _CACHE_VERSION,
+            "size": entry.size,
+            "subs": entry.subs,
+            "offset": [list(item) for item in entry.offset],
+        }
+        try:
+            os.makedirs(os.path.dirname(audio_path), exist_ok=True)
+            # 先写元数据，再写音频：读取方以音频文件作为条目存在的依据
+            utils.atomic_write(
+                meta_path, json.dumps(meta, ensure_ascii=False).encode("utf-8")
+            )
+            utils.atomic_write(audio_path, entry.audio)
+        except OSError as exc:
+            logger.warning(f"failed to write tts cache entry {key}: {str(exc)}")
+            return
+
+        with self._lock:
+            self._remember(key, entry)
+            if self._disk_index is None:
+                self._rescan()
+            else:
+                self._index_entry(key, time.time(), entry.size)
+            self._evict_disk()
+
+    def _over(self, entries: int, total_bytes: int, ratio: float = 1.0) -> bool:
+        return entries > self.max_entries * ratio or total_bytes > self.max_bytes * ratio
+
+    def _evict_disk(self) -> None:
+        if self._disk_index is None:
+            return
+        if not self._over(len(self._disk_index), self._disk_bytes):
+            return
+
+        # 其他进程可能也写入或删除了条目，距上次扫描较久时重新扫描一次磁盘
+        if time.monotonic() - self._scanned_at > _RESCAN_INTERVAL:
+            self._rescan()
+            if not self._over(len(self._disk_index), self._disk_bytes):
+                return
+
+        index = self._disk_index
+        for key, (_, size) in sorted(index.items(), key=lambda item: item[1][0]):
+            if not self._over(len(index), self._disk_bytes, _LOW_WATER):
+                break
+            for path in self._entry_paths(key):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            index.pop(key, None)
+            removed = self._memory.pop(key, None)
+            if removed is not None:
+                self._memory_bytes -= removed.size
+            self._disk_bytes -= size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for key in self._scan_disk():
+                for path in self._entry_paths(key):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            self._disk_index = {}
+            self._disk_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            index = self._disk_index or {}
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(index),
+                "disk_bytes": self._disk_bytes,
+            }
+
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Optional[TTSCache]:
+    """
+    返回全局缓存实例，配置中 cache.enabled 为 false 时返回 None。
+    """
+
+    global _cache
+    if not config.cache.get("enabled", True):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = TTSCache(
+                    cache_dir=utils.storage_dir("cache", create=True),
+                    max_entries=int(config.cache.get("max_entries", 2000)),
+                    max_bytes=int(config.cache.get("max_size_mb", 512)) * 1024 * 1024,
+                    memory_max_entries=int(config.cache.get("memory_max_entries", 64)),
+                    memory_max_bytes=int(config.cache.get("memory_max_size_mb", 32))
+                    * 1024
+                    * 1024,
+                )
+    return _cache
+
+
+__all__ = ["CacheEntry", "TTSCache", "get_cache", "make_cache_key"]
@@ -1,11 +1,34 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import importlib
+import os
+import threading
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Iterable, Optional, Union
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, AsyncIterator, Iterable, Iterator, Optional, Union
 
-from edge_tts import SubMaker
+from loguru import logger
+
+from app.utils import utils
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+    from app.config.settings import Settings
+
+# 第三方引擎通过该入口点组注册，名称为 engine_id，值为 "模块:类名"
+ENTRY_POINT_GROUP = "tts_lsj_tools.engines"
+
+
+def new_sub_maker() -> SubMaker:
+    """
+    创建空的 SubMaker。edge_tts 会连带导入 aiohttp，推迟到第一次需要时再导入。
+    """
+
+    from edge_tts import SubMaker
+
+    return SubMaker()
 
 
 @dataclass(slots=True)
@@ -18,7 +41,48 @@ class TTSRequest:
     voice_name: str
     voice_rate: float
     voice_volume: float
-    voice_file: str
+    voice_file: str = ""
+    # 会话的设置快照，引擎从中读取 Key 等配置；为 None 时使用全局配置
+    settings: Optional[Settings] = None
+
+
+@dataclass(slots=True)
+class TTSStreamEvent:
+    """
+    流式合成产出的事件：type 为 audio 时 data 为音频数据，
+    为 WordBoundary 时 offset/duration（100 纳秒单位）和 text 描述一个词的时间位置。
+    """
+
+    type: str
+    data: bytes = b""
+    offset: int = 0
+    duration: int = 0
+    text: str = ""
+
+
+@dataclass(slots=True)
+class TTSAudio:
+    """
+    内存中的合成结果：完整的音频数据及字幕时间轴，不落盘。
+    """
+
+    audio: bytes
+    sub_maker: SubMaker
+
+
+@dataclass(slots=True)
+class TTSBatchResult:
+    """
+    批量合成中单个请求的结果，status 为 success / failed / error。
+    """
+
+    index: int
+    request: TTSRequest
+    status: str
+    engine_id: str = ""
+    sub_maker: Optional[SubMaker] = None
+    error: str = ""
+    elapsed: float = 0.0
 
 
 class TTSEngine(ABC):
@@ -27,6 +91,10 @@ class TTSEngine(ABC):
     """
 
     engine_id: str
+    # 单次请求可接受的最大文本长度，超过时 voice.tts() 会分段并发合成
+    max_chunk_chars: int = 2000
+    # 为 True 时引擎在每次尝试中自行选择 API Key 并按 Key 限流，voice 不再统一限流
+    limits_per_credential: bool = False
 
     def __init__(self) -> None:
         if not getattr(self, "engine_id", None):
@@ -46,9 +114,87 @@ class TTSEngine(ABC):
         return voice_name
 
     @abstractmethod
+    async def asynthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
+        """
+        异步执行语音合成，返回 SubMaker 或 None。
+        """
+
     def synthesize(self, request: TTSRequest) -> Union[SubMaker, None]:
         """
-        执行语音合成，返回 SubMaker 或 None。
+        同步执行语音合成，在共享的后台事件循环上运行 asynthesize。
+        """
+
+        return utils.run_async(self.asynthesize(request))
+
+    async def astream(self, request: TTSRequest) -> AsyncIterator[TTSStreamEvent]:
+        """
+        流式合成，音频到达后立即产出。默认实现先完整合成到临时文件再一次性产出，
+        支持增量返回的引擎应覆盖此方法。
+
+        在产出任何事件之前失败时直接结束（不产出事件）；已经产出数据后失败时必须抛出异常，
+        不能正常结束，否则调用方会把不完整的音频当作完整结果。
+        """
+
+        temp_dir = utils.storage_dir("temp", create=True)
+        request = replace(
+            request,
+            voice_file=os.path.join(temp_dir, f"tmp-stream-{utils.get_uuid()}.mp3"),
+        )
+        try:
+            sub_maker = await self.asynthesize(request)
+            if not sub_maker or not os.path.exists(request.voice_file):
+                return
+            with open(request.voice_file, "rb") as f:
+                yield TTSStreamEvent(type="audio", data=f.read())
+            for (start, end), text in zip(sub_maker.offset, sub_maker.subs):
+                yield TTSStreamEvent(
+                    type="WordBoundary", offset=start, duration=end - start, text=text
+                )
+        finally:
+            if os.path.exists(request.voice_file):
+                os.remove(request.voice_file)
+
+    def stream(self, request: TTSRequest) -> Iterator[TTSStreamEvent]:
+        """
+        astream 的同步版本，在共享的后台事件循环上执行。
+        """
+
+        return utils.iterate_async(self.astream(request))
+
+    async def asynthesize_audio(self, request: TTSRequest) -> Optional[TTSAudio]:
+        """
+        合成到内存并直接返回音频数据，忽略 request.voice_file，失败时返回 None。
+        默认实现收集 astream 的产出，能直接拿到完整音频的引擎应覆盖此方法。
+        """
+
+        from .resilience import TTSServiceError
+
+        audio = bytearray()
+        sub_maker = new_sub_maker()
+        try:
+            async for event in self.astream(request):
+                if event.type == "audio":
+                    audio.extend(event.data)
+                elif event.type == "WordBoundary":
+                    sub_maker.subs.append(event.text)
+                    sub_maker.offset.append((event.offset, event.offset + event.duration))
+        except TTSServiceError:
+            # 流在中途断开，已收到的部分不完整，按失败处理
+            return None
+        if not audio:
+            return None
+        return TTSAudio(audio=bytes(audio), sub_maker=sub_maker)
+
+    def synthesize_audio(self, request: TTSRequest) -> Optional[TTSAudio]:
+        """
+        asynthesize_audio 的同步版本。
+        """
+
+        return utils.run_async(self.asynthesize_audio(request))
+
+    async def awarmup(self) -> None:
+        """
+        预先建立到服务端的连接，默认不做任何事情。
         """
 
     def list_voices(self) -> list[str]:
@@ -61,21 +207,129 @@ class TTSEngine(ABC):
 
 class EngineRegistry:
     """
-    简单的引擎注册表，方便根据声音名称或 engine_id 获取对应实现。
+    引擎注册表，方便根据声音名称或 engine_id 获取对应实现。
+
+    除了引擎实例，也可以注册 "模块:类名" 形式的目标，引擎模块在第一次 get() 时才导入并实例化，
+    启动时不需要加载各引擎及其依赖。find_by_voice() 按注册顺序逐个加载，找到匹配的引擎即停止，
+    fallback 指定的引擎（能处理任意声音名称）总是最后尝试。
+
+    指定 entry_point_group 时，第一次查询引擎前读取该入口点组中声明的第三方引擎。
     """
 
-    def __init__(self, engines: Iterable[TTSEngine]):
-        self._engines = {engine.engine_id: engine for engine in engines}
+    def __init__(
+        self,
+        engines: Iterable[Union[TTSEngine, tuple[str, str]]] = (),
+        fallback: Optional[str] = None,
+        entry_point_group: Optional[str] = None,
+    ):
+        # engine_id -> 引擎实例，或尚未加载的 "模块:类名"
+        self._engines: dict[str, Union[TTSEngine, str]] = {}
+        self._failed: set[str] = set()
+        self._lock = threading.RLock()
+        self.fallback = fallback
+        self._entry_point_group = entry_point_group
+        for engine in engines:
+            if isinstance(engine, TTSEngine):
+                self.register_engine(engine)
+            else:
+                self.register(*engine)
+
+    def register(self, engine_id: str, target: str) -> None:
+        """
+        登记一个延迟加载的引擎，target 为 "模块:类名"。
+        """
+
+        with self._lock:
+            self._engines[engine_id] = target
+            self._failed.discard(engine_id)
+
+    def register_engine(self, engine: TTSEngine) -> None:
+        with self._lock:
+            self._engines[engine.engine_id] = engine
+            self._failed.discard(engine.engine_id)
+
+    def load_entry_points(self, group: str = ENTRY_POINT_GROUP) -> list[str]:
+        """
+        登记已安装的包通过入口点声明的引擎，只读取包元数据，不导入引擎模块。
+        已注册的 engine_id 不会被覆盖，返回新登记的 engine_id。
+        """
+
+        from importlib import metadata
+
+        added = []
+        try:
+            entry_points = metadata.entry_points(group=group)
+        except Exception as exc:
+            logger.warning(f"failed to read engine entry points: {str(exc)}")
+            return added
+        with self._lock:
+            for entry_point in entry_points:
+                if entry_point.name in self._engines:
+                    continue
+                self._engines[entry_point.name] = entry_point.value
+                added.append(entry_point.name)
+        return added
+
+    def _discover(self) -> None:
+        if self._entry_point_group is None:
+            return
+        with self._lock:
+            group, self._entry_point_group = self._entry_point_group, None
+            if group is not None:
+                self.load_entry_points(group)
+
+    def ids(self) -> list[str]:
+        """
+        返回所有已登记的 engine_id，fallback 排在最后，不会触发引擎加载。
+        """
+
+        self._discover()
+        ids = [engine_id for engine_id in self._engines if engine_id != self.fallback]
+        if self.fallback in self._engines:
+            ids.append(self.fallback)
+        return ids
+
+    def is_loaded(self, engine_id: str) -> bool:
+        return isinstance(self._engines.get(engine_id), TTSEngine)
+
+    def _load(self, engine_id: str) -> Optional[TTSEngine]:
+        self._discover()
+        target = self._engines.get(engine_id)
+        if target is None or isinstance(target, TTSEngine):
+            return target
+        with self._lock:
+            target = self._engines.get(engine_id)
+            if target is None or isinstance(target, TTSEngine):
+                return target
+            if engine_id in self._failed:
+                return None
+            try:
+                module_name, _, attr = target.partition(":")
+                engine_cls = getattr(importlib.import_module(module_name), attr)
+                engine = engine_cls()
+            except Exception as exc:
+                # 第三方引擎加载失败时只记录一次，不影响其他引擎
+                self._failed.add(engine_id)
+                logger.error(f"failed to load tts engine {engine_id} from {target}: {str(exc)}")
+                return None
+            if engine.engine_id != engine_id:
+                logger.warning(
+                    f"tts engine {target} declares engine_id {engine.engine_id}, "
+                    f"registered as {engine_id}"
+                )
+            self._engines[engine_id] = engine
+            return engine
 
     def get(self, engine_id: str) -> Optional[TTSEngine]:
-        return self._engines.get(engine_id)
+        return self._load(engine_id)
 
     def all(self) -> list[TTSEngine]:
-        return list(self._engines.values())
+        engines = (self._load(engine_id) for engine_id in self.ids())
+        return [engine for engine in engines if engine is not None]
 
     def find_by_voice(self, voice_name: str) -> Optional[TTSEngine]:
-        for engine in self._engines.values():
-            if engine.supports_voice(voice_name):
+        for engine_id in self.ids():
+            engine = self._load(engine_id)
+            if engine is not None and engine.supports_voice(voice_name):
                 return engine
         return None
-
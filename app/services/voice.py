@@ -1,44 +1,75 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
+import importlib
 import os
-import re
-from typing import Union
-from xml.sax.saxutils import unescape
+import time
+from dataclasses import replace
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterator, Optional, Union
 
-from edge_tts import SubMaker, submaker
-from edge_tts.submaker import mktimestamp
 from loguru import logger
-from moviepy.video.tools import subtitles
-
-from app.services.tts_engine_base import EngineRegistry, TTSRequest
-from app.services.azure_engines import (
-    AzureTTSV1Engine,
-    AzureTTSV2Engine,
-    VOICE_REGIONS,
-    convert_rate_to_percent,
-    get_all_azure_voices,
-    get_all_regions,
-    get_azure_voices_by_region,
-    get_voice_region,
-    is_azure_v2_voice,
-    parse_voice_name,
-)
-from app.services.siliconflow_engine import (
-    SiliconFlowEngine,
-    get_siliconflow_voices,
-    is_siliconflow_voice,
+
+from app.config import config
+from app.services import rate_limit, subtitle
+from app.services.tts_cache import CacheEntry, get_cache, make_cache_key
+from app.services.tts_engine_base import (
+    ENTRY_POINT_GROUP,
+    EngineRegistry,
+    TTSAudio,
+    TTSBatchResult,
+    TTSEngine,
+    TTSRequest,
+    TTSStreamEvent,
+    new_sub_maker,
 )
-from app.utils import utils
+from app.services.voice_catalog import VoiceCatalog, VoiceRecord, get_voice_catalog
+from app.utils import mp3, utils
+from app.utils.audio import concat_mp3
+
+if TYPE_CHECKING:
+    from edge_tts import SubMaker
+
+    from app.config.settings import Settings
+
+# 合成进度回调：(已完成句数, 总句数)
+ProgressCallback = Callable[[int, int], None]
 
+# 引擎模块及其依赖（edge_tts、Azure Speech SDK、aiohttp）在第一次使用时才导入，
+# 已安装的包可以通过 tts_lsj_tools.engines 入口点添加引擎。V1 能处理任意声音名称，最后兜底
 _ENGINE_REGISTRY = EngineRegistry(
     [
-        AzureTTSV2Engine(),
-        SiliconFlowEngine(),
-        AzureTTSV1Engine(),
-    ]
+        ("azure-tts-v2", "app.services.azure_engines:AzureTTSV2Engine"),
+        ("siliconflow", "app.services.siliconflow_engine:SiliconFlowEngine"),
+        ("azure-tts-v1", "app.services.azure_engines:AzureTTSV1Engine"),
+    ],
+    fallback="azure-tts-v1",
+    entry_point_group=ENTRY_POINT_GROUP,
 )
 
+# 从引擎模块转出的函数，按需导入对应模块
+_LAZY_EXPORTS = {
+    "VOICE_REGIONS": "app.services.azure_engines",
+    "convert_rate_to_percent": "app.services.azure_engines",
+    "get_all_azure_voices": "app.services.azure_engines",
+    "get_all_regions": "app.services.azure_engines",
+    "get_azure_voices_by_region": "app.services.azure_engines",
+    "get_voice_region": "app.services.azure_engines",
+    "is_azure_v2_voice": "app.services.azure_engines",
+    "parse_voice_name": "app.services.azure_engines",
+    "get_siliconflow_voices": "app.services.siliconflow_engine",
+    "is_siliconflow_voice": "app.services.siliconflow_engine",
+}
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
 
 def get_registered_engine(engine_id: str):
     return _ENGINE_REGISTRY.get(engine_id)
@@ -48,15 +79,93 @@ def get_registered_engines():
     return _ENGINE_REGISTRY.all()
 
 
+_warmup_started = False
+
+
+def warmup_engines() -> None:
+    """
+    在后台事件循环上预热各引擎的连接，不阻塞调用方，同一进程内只执行一次。
+    """
+
+    global _warmup_started
+    if _warmup_started:
+        return
+    _warmup_started = True
+
+    async def _warmup():
+        results = await asyncio.gather(
+            *(engine.awarmup() for engine in _ENGINE_REGISTRY.all()),
+            return_exceptions=True,
+        )
+        for engine, result in zip(_ENGINE_REGISTRY.all(), results):
+            if isinstance(result, BaseException):
+                logger.warning(f"{engine.engine_id} warmup failed: {str(result)}")
+
+    asyncio.run_coroutine_threadsafe(_warmup(), utils.get_event_loop())
+
+
+def resolve_engine(voice_name: str) -> Optional[TTSEngine]:
+    """
+    根据声音名称查找引擎，找不到时兜底使用 Azure V1。
+    """
+
+    engine = _ENGINE_REGISTRY.find_by_voice(voice_name)
+    if engine is None:
+        # 默认兜底使用 Azure V1
+        engine = _ENGINE_REGISTRY.get("azure-tts-v1")
+    return engine
+
+
 def tts(
     text: str,
     voice_name: str,
     voice_rate: float,
     voice_file: str,
     voice_volume: float = 1.0,
+    use_cache: bool = True,
+    long_text: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    settings: Optional[Settings] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Union[SubMaker, None]:
+    """
+    atts 的同步版本，在共享的后台事件循环上执行，不会为每次调用新建事件循环。
+    """
+
+    return utils.run_async(
+        atts(
+            text=text,
+            voice_name=voice_name,
+            voice_rate=voice_rate,
+            voice_file=voice_file,
+            voice_volume=voice_volume,
+            use_cache=use_cache,
+            long_text=long_text,
+            max_workers=max_workers,
+            settings=settings,
+            progress=progress,
+        )
+    )
+
+
+async def atts(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_file: str,
+    voice_volume: float = 1.0,
+    use_cache: bool = True,
+    long_text: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    settings: Optional[Settings] = None,
+    progress: Optional[ProgressCallback] = None,
 ) -> Union[SubMaker, None]:
     """
     根据声音名称自动匹配合适的引擎并执行合成。
+    命中缓存时直接写出缓存的音频，不再请求引擎。
+    long_text 为 None 时，文本超过引擎单次请求长度会自动切换到分段并发合成。
+    settings 为会话的设置快照，引擎从中读取 Key，为 None 时使用全局配置。
+    progress 以 (已完成句数, 总句数) 回调合成进度，长文本按片段完成的先后累加。
     """
 
     request = TTSRequest(
@@ -65,141 +174,609 @@ def tts(
         voice_rate=voice_rate,
         voice_volume=voice_volume,
         voice_file=voice_file,
+        settings=settings,
     )
 
-    engine = _ENGINE_REGISTRY.find_by_voice(voice_name)
-    if engine is None:
-        # 默认兜底使用 Azure V1
-        engine = _ENGINE_REGISTRY.get(AzureTTSV1Engine.engine_id)
-
+    engine = resolve_engine(voice_name)
     if engine is None:
         logger.error(f"no tts engine matched voice: {voice_name}")
         return None
 
+    return await _dispatch(engine, request, use_cache, long_text, max_workers, progress)
+
+
+def _count_sentences(text: str) -> int:
+    return max(1, sum(1 for _ in utils.iter_sentence_spans(text)))
+
+
+async def _dispatch(
+    engine: TTSEngine,
+    request: TTSRequest,
+    use_cache: bool = True,
+    long_text: Optional[bool] = None,
+    max_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Union[SubMaker, None]:
     normalized_voice = engine.normalize_voice_name(request.voice_name)
     request.voice_name = normalized_voice
-    return engine.synthesize(request)
 
+    if long_text is None:
+        long_text = len(request.text.strip()) > engine.max_chunk_chars
+    if long_text:
+        return await _synthesize_long_text(
+            engine, request, use_cache, max_workers, progress
+        )
+    if progress is None:
+        return await _synthesize(engine, request, use_cache)
+    total = _count_sentences(request.text)
+    progress(0, total)
+    sub_maker = await _synthesize(engine, request, use_cache)
+    if sub_maker:
+        progress(total, total)
+    return sub_maker
+
+
+async def _synthesize(
+    engine: TTSEngine, request: TTSRequest, use_cache: bool
+) -> Union[SubMaker, None]:
+    if not use_cache:
+        return await _call_engine(engine, request)
+    return await _synthesize_with_cache(engine, request)
 
-def _format_text(text: str) -> str:
-    text = text.replace("[", " ")
-    text = text.replace("]", " ")
-    text = text.replace("(", " ")
-    text = text.replace(")", " ")
-    text = text.replace("{", " ")
-    text = text.replace("}", " ")
-    text = text.strip()
-    return text
 
+async def _call_engine(
+    engine: TTSEngine, request: TTSRequest
+) -> Union[SubMaker, None]:
+    """
+    经过限流器调用引擎，缓存命中的请求不会走到这里。
+    """
 
-def create_subtitle(sub_maker: submaker.SubMaker, text: str, subtitle_file: str):
+    if engine.limits_per_credential:
+        return await engine.asynthesize(request)
+    async with rate_limit.limit(engine.engine_id, chars=len(request.text)):
+        return await engine.asynthesize(request)
+
+
+def _get_engine_limits(per_engine_limits: Optional[dict[str, int]]) -> dict[str, int]:
+    limits = {
+        "azure-tts-v1": 8,
+        "azure-tts-v2": 4,
+        "siliconflow": 4,
+    }
+    limits.update(config.batch.get("per_engine_limits", {}))
+    if per_engine_limits:
+        limits.update(per_engine_limits)
+    return limits
+
+
+async def atts_batch(
+    requests: list[TTSRequest],
+    max_concurrency: Optional[int] = None,
+    per_engine_limits: Optional[dict[str, int]] = None,
+    use_cache: bool = True,
+) -> AsyncIterator[TTSBatchResult]:
     """
-    优化字幕文件
-    1. 将字幕文件按照标点符号分割成多行
-    2. 逐行匹配字幕文件中的文本
-    3. 生成新的字幕文件
+    并发合成一批请求，按完成顺序逐个产出结果。
+    总并发数受 max_concurrency 限制，每个引擎另有独立的并发上限。
     """
 
-    text = _format_text(text)
+    if max_concurrency is None:
+        max_concurrency = int(config.batch.get("max_concurrency", 16))
+    limits = _get_engine_limits(per_engine_limits)
+
+    global_semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    engine_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    async def _run(index: int, request: TTSRequest) -> TTSBatchResult:
+        # 不修改调用方传入的请求对象
+        request = replace(request)
+        engine = resolve_engine(request.voice_name)
+        if engine is None:
+            return TTSBatchResult(
+                index=index,
+                request=request,
+                status="error",
+                error=f"no tts engine matched voice: {request.voice_name}",
+            )
 
-    def formatter(idx: int, start_time: float, end_time: float, sub_text: str) -> str:
-        start_t = mktimestamp(start_time).replace(".", ",")
-        end_t = mktimestamp(end_time).replace(".", ",")
-        return f"{idx}\n{start_t} --> {end_t}\n{sub_text}\n"
+        engine_semaphore = engine_semaphores.get(engine.engine_id)
+        if engine_semaphore is None:
+            engine_semaphore = asyncio.Semaphore(
+                max(1, int(limits.get(engine.engine_id, max_concurrency)))
+            )
+            engine_semaphores[engine.engine_id] = engine_semaphore
 
-    start_time = -1.0
-    sub_items = []
-    sub_index = 0
+        async with engine_semaphore, global_semaphore:
+            started = time.monotonic()
+            try:
+                sub_maker = await _dispatch(engine, request, use_cache)
+            except Exception as exc:
+                logger.error(f"batch item {index} failed, error: {str(exc)}")
+                return TTSBatchResult(
+                    index=index,
+                    request=request,
+                    status="error",
+                    engine_id=engine.engine_id,
+                    error=str(exc),
+                    elapsed=time.monotonic() - started,
+                )
 
-    script_lines = utils.split_string_by_punctuations(text)
+        return TTSBatchResult(
+            index=index,
+            request=request,
+            status="success" if sub_maker else "failed",
+            engine_id=engine.engine_id,
+            sub_maker=sub_maker,
+            elapsed=time.monotonic() - started,
+        )
 
-    def match_line(_sub_line: str, _sub_index: int):
-        if len(script_lines) <= _sub_index:
-            return ""
+    tasks = [asyncio.ensure_future(_run(i, r)) for i, r in enumerate(requests)]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def tts_batch(
+    requests: list[TTSRequest],
+    max_concurrency: Optional[int] = None,
+    per_engine_limits: Optional[dict[str, int]] = None,
+    use_cache: bool = True,
+) -> Iterator[TTSBatchResult]:
+    """
+    atts_batch 的同步版本，在共享的后台事件循环上执行，按完成顺序逐个产出结果。
+    """
 
-        _line = script_lines[_sub_index]
-        if _sub_line == _line:
-            return script_lines[_sub_index].strip()
+    return utils.iterate_async(
+        atts_batch(requests, max_concurrency, per_engine_limits, use_cache)
+    )
 
-        _sub_line_ = re.sub(r"[^\w\s]", "", _sub_line)
-        _line_ = re.sub(r"[^\w\s]", "", _line)
-        if _sub_line_ == _line_:
-            return _line_.strip()
 
-        _sub_line_ = re.sub(r"\W+", "", _sub_line)
-        _line_ = re.sub(r"\W+", "", _line)
-        if _sub_line_ == _line_:
-            return _line.strip()
+def _get_audio_file_duration(audio_file: str, sub_maker: SubMaker) -> int:
+    """
+    获取音频文件时长（100 纳秒单位），读取失败时退回字幕最后的结束时间。
+    """
+
+    try:
+        duration = mp3.parse_mp3_file(audio_file, collect_frames=False).duration_100ns
+        if duration:
+            return duration
+        logger.warning(f"failed to read audio duration: no mp3 frames in {audio_file}")
+    except (OSError, ValueError) as exc:
+        logger.warning(f"failed to read audio duration: {str(exc)}")
+    if sub_maker.offset:
+        return int(sub_maker.offset[-1][1])
+    return 0
+
+
+def _concat_chunk_files(
+    chunk_files: list[str], sub_makers: list[SubMaker], output_file: str
+) -> list[int]:
+    """
+    按帧边界拼接分段音频并返回每段的时长（100 纳秒单位），
+    各段的 ID3 标签和 Xing 信息帧被去掉，不会出现在拼接结果中间。
+    """
+
+    try:
+        join = concat_mp3(chunk_files, output_file)
+        offsets = join.join_offsets + [join.samples_to_100ns(join.total_samples)]
+        return [end - start for start, end in zip(offsets, offsets[1:])]
+    except (OSError, ValueError) as exc:
+        logger.warning(f"frame-accurate concat failed, fallback to byte concat: {str(exc)}")
+
+    with open(output_file, "wb") as output:
+        for chunk_file in chunk_files:
+            with open(chunk_file, "rb") as f:
+                output.write(f.read())
+    return [
+        _get_audio_file_duration(chunk_file, sub_maker)
+        for chunk_file, sub_maker in zip(chunk_files, sub_makers)
+    ]
 
-        return ""
 
-    sub_line = ""
+def merge_sub_makers(
+    sub_makers: list[SubMaker], durations: list[int]
+) -> SubMaker:
+    """
+    按顺序合并多个 SubMaker，后一段的时间轴整体平移前面各段音频的总时长。
+    """
 
+    merged = new_sub_maker()
+    shift = 0
+    for sub_maker, duration in zip(sub_makers, durations):
+        merged.subs.extend(sub_maker.subs)
+        merged.offset.extend(
+            (start + shift, end + shift) for start, end in sub_maker.offset
+        )
+        shift += duration
+    return merged
+
+
+async def _synthesize_long_text(
+    engine: TTSEngine,
+    request: TTSRequest,
+    use_cache: bool,
+    max_workers: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+) -> Union[SubMaker, None]:
+    """
+    长文本模式：按句子切分为引擎可接受的片段并发合成，只重试失败的片段，
+    最后按顺序拼接音频并合并时间轴。
+    """
+
+    chunks = utils.split_text_into_chunks(request.text, engine.max_chunk_chars)
+    if not chunks:
+        logger.error("long text synthesis failed, text is empty")
+        return None
+
+    if max_workers is None:
+        max_workers = int(config.long_text.get("max_workers", 4))
+    max_retries = int(config.long_text.get("max_retries", 2))
+
+    temp_dir = utils.storage_dir("temp", create=True)
+    task_id = utils.get_uuid(remove_hyphen=True)
+    chunk_requests = [
+        TTSRequest(
+            text=chunk,
+            voice_name=request.voice_name,
+            voice_rate=request.voice_rate,
+            voice_volume=request.voice_volume,
+            voice_file=os.path.join(temp_dir, f"tmp-chunk-{task_id}-{i}.mp3"),
+            settings=request.settings,
+        )
+        for i, chunk in enumerate(chunks)
+    ]
+    results: list[Optional[SubMaker]] = [None] * len(chunks)
+    semaphore = asyncio.Semaphore(max(1, max_workers))
+    sentence_counts = [_count_sentences(chunk) for chunk in chunks]
+    total_sentences = sum(sentence_counts)
+    completed_sentences = 0
+    if progress is not None:
+        progress(0, total_sentences)
+
+    async def _run(idx: int) -> Union[SubMaker, None]:
+        nonlocal completed_sentences
+        async with semaphore:
+            sub_maker = await _synthesize(engine, chunk_requests[idx], use_cache)
+        if sub_maker and progress is not None:
+            completed_sentences += sentence_counts[idx]
+            progress(min(completed_sentences, total_sentences), total_sentences)
+        return sub_maker
+
+    logger.info(
+        f"start long text synthesis, chunks: {len(chunks)}, workers: {max_workers}"
+    )
     try:
-        for _, (offset, sub) in enumerate(zip(sub_maker.offset, sub_maker.subs)):
-            _start_time, end_time = offset
-            if start_time < 0:
-                start_time = _start_time
-
-            sub = unescape(sub)
-            sub_line += sub
-            sub_text = match_line(sub_line, sub_index)
-            if sub_text:
-                sub_index += 1
-                line = formatter(
-                    idx=sub_index,
-                    start_time=start_time,
-                    end_time=end_time,
-                    sub_text=sub_text,
-                )
-                sub_items.append(line)
-                start_time = -1.0
-                sub_line = ""
+        pending = list(range(len(chunks)))
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                logger.warning(f"retry failed chunks: {pending}, try: {attempt + 1}")
+            sub_makers = await asyncio.gather(
+                *(_run(idx) for idx in pending), return_exceptions=True
+            )
+            for idx, sub_maker in zip(pending, sub_makers):
+                if isinstance(sub_maker, BaseException):
+                    logger.error(f"chunk {idx} failed, error: {str(sub_maker)}")
+                elif sub_maker and os.path.exists(chunk_requests[idx].voice_file):
+                    results[idx] = sub_maker
+            pending = [idx for idx, result in enumerate(results) if result is None]
+            if not pending:
+                break
+
+        if pending:
+            logger.error(f"long text synthesis failed, failed chunks: {pending}")
+            return None
+
+        chunk_files = [chunk_request.voice_file for chunk_request in chunk_requests]
+        durations = await asyncio.to_thread(
+            _concat_chunk_files, chunk_files, results, request.voice_file
+        )
+
+        logger.success(f"long text synthesis completed: {request.voice_file}")
+        return merge_sub_makers(results, durations)
+    finally:
+        for chunk_request in chunk_requests:
+            if os.path.exists(chunk_request.voice_file):
+                os.remove(chunk_request.voice_file)
+
+
+def _make_request_cache_key(engine: TTSEngine, request: TTSRequest) -> str:
+    return make_cache_key(
+        engine_id=engine.engine_id,
+        voice_name=request.voice_name,
+        text=request.text.strip(),
+        voice_rate=request.voice_rate,
+        voice_volume=request.voice_volume,
+        output_format=utils.parse_extension(request.voice_file) or "mp3",
+    )
 
-        if len(sub_items) == len(script_lines):
-            with open(subtitle_file, "w", encoding="utf-8") as file:
-                file.write("\n".join(sub_items) + "\n")
-            try:
-                sbs = subtitles.file_to_subtitles(subtitle_file, encoding="utf-8")
-                duration = max([tb for ((ta, tb), txt) in sbs])
-                logger.info(
-                    f"completed, subtitle file created: {subtitle_file}, duration: {duration}"
-                )
-            except Exception as exc:
-                logger.error(f"failed, error: {str(exc)}")
-                os.remove(subtitle_file)
-        else:
-            logger.warning(
-                f"failed, sub_items len: {len(sub_items)}, script_lines len: {len(script_lines)}"
+
+def _write_file(path: str, data: bytes) -> None:
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _read_file(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+async def _synthesize_with_cache(
+    engine: TTSEngine, request: TTSRequest
+) -> Union[SubMaker, None]:
+    cache = get_cache()
+    if cache is None:
+        return await _call_engine(engine, request)
+
+    # 缓存的读写都是阻塞的文件操作，放到线程中执行，不占用共享的事件循环
+    key = _make_request_cache_key(engine, request)
+    entry = await asyncio.to_thread(cache.get, key)
+    if entry is not None:
+        await asyncio.to_thread(_write_file, request.voice_file, entry.audio)
+        logger.info(f"tts cache hit: {key}, output file: {request.voice_file}")
+        return entry.to_sub_maker()
+
+    sub_maker = await _call_engine(engine, request)
+    if sub_maker and os.path.exists(request.voice_file):
+        audio = await asyncio.to_thread(_read_file, request.voice_file)
+        if audio:
+            await asyncio.to_thread(
+                cache.put,
+                key,
+                CacheEntry(
+                    audio=audio,
+                    subs=list(sub_maker.subs),
+                    offset=[tuple(item) for item in sub_maker.offset],
+                ),
             )
+    return sub_maker
+
+
+async def atts_audio(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_volume: float = 1.0,
+    use_cache: bool = True,
+    settings: Optional[Settings] = None,
+) -> Optional[TTSAudio]:
+    """
+    合成到内存并直接返回音频数据和时间轴，不写任何文件，适合调用方自行处理音频的场景。
+    """
+
+    request = TTSRequest(
+        text=text,
+        voice_name=voice_name,
+        voice_rate=voice_rate,
+        voice_volume=voice_volume,
+        settings=settings,
+    )
+
+    engine = resolve_engine(voice_name)
+    if engine is None:
+        logger.error(f"no tts engine matched voice: {voice_name}")
+        return None
+    request.voice_name = engine.normalize_voice_name(request.voice_name)
+
+    cache = get_cache() if use_cache else None
+    key = _make_request_cache_key(engine, request)
+    if cache is not None:
+        entry = await asyncio.to_thread(cache.get, key)
+        if entry is not None:
+            logger.info(f"tts cache hit: {key}, returning cached audio")
+            return TTSAudio(audio=entry.audio, sub_maker=entry.to_sub_maker())
+
+    if engine.limits_per_credential:
+        result = await engine.asynthesize_audio(request)
+    else:
+        async with rate_limit.limit(engine.engine_id, chars=len(request.text)):
+            result = await engine.asynthesize_audio(request)
+
+    if cache is not None and result is not None and result.sub_maker.subs:
+        await asyncio.to_thread(
+            cache.put,
+            key,
+            CacheEntry(
+                audio=result.audio,
+                subs=list(result.sub_maker.subs),
+                offset=[tuple(item) for item in result.sub_maker.offset],
+            ),
+        )
+    return result
+
+
+def tts_audio(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_volume: float = 1.0,
+    use_cache: bool = True,
+    settings: Optional[Settings] = None,
+) -> Optional[TTSAudio]:
+    """
+    atts_audio 的同步版本。
+    """
+
+    return utils.run_async(
+        atts_audio(
+            text=text,
+            voice_name=voice_name,
+            voice_rate=voice_rate,
+            voice_volume=voice_volume,
+            use_cache=use_cache,
+            settings=settings,
+        )
+    )
+
 
+async def _stream_engine(
+    engine: TTSEngine, request: TTSRequest
+) -> AsyncIterator[TTSStreamEvent]:
+    if engine.limits_per_credential:
+        async for event in engine.astream(request):
+            yield event
+        return
+    async with rate_limit.limit(engine.engine_id, chars=len(request.text)):
+        async for event in engine.astream(request):
+            yield event
+
+
+async def astream(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_volume: float = 1.0,
+    use_cache: bool = True,
+    settings: Optional[Settings] = None,
+) -> AsyncIterator[TTSStreamEvent]:
+    """
+    流式合成：音频数据和词边界事件到达后立即产出，不等待整段合成结束。
+    命中缓存时一次性产出缓存的音频和时间轴。
+    开始产出后合成失败时抛出 TTSServiceError，已产出的数据不完整，不会写入缓存。
+    """
+
+    request = TTSRequest(
+        text=text,
+        voice_name=voice_name,
+        voice_rate=voice_rate,
+        voice_volume=voice_volume,
+        settings=settings,
+    )
+
+    engine = resolve_engine(voice_name)
+    if engine is None:
+        logger.error(f"no tts engine matched voice: {voice_name}")
+        return
+    request.voice_name = engine.normalize_voice_name(request.voice_name)
+
+    cache = get_cache() if use_cache else None
+    key = _make_request_cache_key(engine, request)
+    if cache is not None:
+        entry = await asyncio.to_thread(cache.get, key)
+        if entry is not None:
+            logger.info(f"tts cache hit: {key}, streaming cached audio")
+            yield TTSStreamEvent(type="audio", data=entry.audio)
+            for (start, end), sub in zip(entry.offset, entry.subs):
+                yield TTSStreamEvent(
+                    type="WordBoundary", offset=start, duration=end - start, text=sub
+                )
+            return
+
+    audio = bytearray()
+    subs = []
+    offsets = []
+    async for event in _stream_engine(engine, request):
+        if event.type == "audio":
+            audio.extend(event.data)
+        elif event.type == "WordBoundary":
+            subs.append(event.text)
+            offsets.append((event.offset, event.offset + event.duration))
+        yield event
+
+    # 引擎在中途失败时会抛出异常，执行到这里说明流正常结束，结果完整。
+    # 没有时间轴的结果无法用于生成字幕，不写入缓存
+    if cache is not None and audio and subs:
+        await asyncio.to_thread(
+            cache.put, key, CacheEntry(audio=bytes(audio), subs=subs, offset=offsets)
+        )
+
+
+def stream(
+    text: str,
+    voice_name: str,
+    voice_rate: float,
+    voice_volume: float = 1.0,
+    use_cache: bool = True,
+    settings: Optional[Settings] = None,
+) -> Iterator[TTSStreamEvent]:
+    """
+    astream 的同步版本，在共享的后台事件循环上执行。
+    """
+
+    return utils.iterate_async(
+        astream(
+            text=text,
+            voice_name=voice_name,
+            voice_rate=voice_rate,
+            voice_volume=voice_volume,
+            use_cache=use_cache,
+            settings=settings,
+        )
+    )
+
+
+def get_cache_stats() -> dict:
+    """
+    返回合成缓存的命中/未命中统计，缓存关闭时返回空字典。
+    """
+
+    cache = get_cache()
+    if cache is None:
+        return {}
+    return cache.stats()
+
+
+def create_subtitle(sub_maker: SubMaker, text: str, subtitle_file: str):
+    """
+    优化字幕文件
+    1. 将原文按照标点符号分割成多行
+    2. 按顺序把词边界对齐到每一行
+    3. 生成新的字幕文件（.srt 或 .vtt）
+    """
+
+    try:
+        subtitle.create_subtitle(sub_maker, text, subtitle_file)
     except Exception as exc:
         logger.error(f"failed, error: {str(exc)}")
 
 
-def get_audio_duration(sub_maker: submaker.SubMaker):
+def get_audio_duration(sub_maker: SubMaker, audio_file: str = ""):
     """
-    获取音频时长
+    获取音频时长，指定 audio_file 时解析 MP3 帧得到实际时长，否则使用字幕最后的结束时间
     """
+    if audio_file:
+        return _get_audio_file_duration(audio_file, sub_maker) / 10000000
     if not sub_maker.offset:
         return 0.0
     return sub_maker.offset[-1][1] / 10000000
 
 
 __all__ = [
+    "astream",
+    "atts",
+    "atts_audio",
+    "atts_batch",
     "convert_rate_to_percent",
     "create_subtitle",
     "get_all_azure_voices",
     "get_all_regions",
     "get_audio_duration",
     "get_azure_voices_by_region",
+    "get_cache_stats",
     "get_registered_engine",
     "get_registered_engines",
     "get_siliconflow_voices",
+    "get_voice_catalog",
     "get_voice_region",
     "is_azure_v2_voice",
     "is_siliconflow_voice",
+    "merge_sub_makers",
+    "new_sub_maker",
     "parse_voice_name",
+    "resolve_engine",
+    "stream",
     "tts",
+    "tts_audio",
+    "tts_batch",
+    "warmup_engines",
+    "ProgressCallback",
+    "TTSAudio",
+    "TTSBatchResult",
+    "TTSRequest",
+    "TTSStreamEvent",
+    "VoiceCatalog",
+    "VoiceRecord",
     "VOICE_REGIONS",
 ]
@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+声音目录：所有引擎的声音只解析一次，按区域、引擎和性别建立索引。
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from loguru import logger
+
+from app.config import config
+from app.utils import utils
+
+_VOICE_PATTERN = re.compile(r"Name:\s*(.+)\s*Gender:\s*(.+)\s*", re.MULTILINE)
+_EMPTY: tuple = ()
+_CATALOG_VERSION = 1
+_AZURE_VOICES_URL = "https://{region}.tts.speech.microsoft.com/cognitiveservices/voices/list"
+
+
+@dataclass(slots=True, frozen=True)
+class VoiceRecord:
+    """
+    目录中的一个声音。voice_id 为界面和 TTSRequest 中使用的完整名称，
+    例如 zh-CN-XiaoxiaoNeural-Female、siliconflow:FunAudioLLM/CosyVoice2-0.5B:alex-Male。
+    """
+
+    voice_id: str
+    name: str
+    engine: str
+    region: str
+    gender: str
+    is_v2: bool
+    display_name: str
+
+
+def _display_name(name: str, region: str) -> str:
+    short = name[len(region) + 1 :] if region and name.startswith(region + "-") else name
+    short = short.replace("-V2", "").replace("Neural", "")
+    return short.strip("- ") or name
+
+
+def azure_record(name: str, gender: str) -> VoiceRecord:
+    name = name.strip()
+    gender = gender.strip()
+    parts = name.split("-")
+    region = f"{parts[0]}-{parts[1]}" if len(parts) >= 2 else ""
+    is_v2 = "-V2" in name
+    return VoiceRecord(
+        voice_id=f"{name}-{gender}",
+        name=name,
+        engine="azure-tts-v2" if is_v2 else "azure-tts-v1",
+        region=region,
+        gender=gender,
+        is_v2=is_v2,
+        display_name=_display_name(name, region),
+    )
+
+
+def siliconflow_record(model: str, voice: str, gender: str) -> VoiceRecord:
+    name = f"siliconflow:{model}:{voice}"
+    return VoiceRecord(
+        voice_id=f"{name}-{gender}",
+        name=name,
+        engine="siliconflow",
+        region="",
+        gender=gender,
+        is_v2=False,
+        display_name=voice,
+    )
+
+
+def parse_azure_voices(block: str) -> list[VoiceRecord]:
+    """
+    解析 "Name: ... Gender: ..." 格式的声音列表。
+    """
+
+    return [azure_record(name, gender) for name, gender in _VOICE_PATTERN.findall(block)]
+
+
+def _subsequence(query: str, text: str) -> bool:
+    it = iter(text)
+    return all(c in it for c in query)
+
+
+class VoiceCatalog:
+    """
+    不可变的声音目录。
+
+    构造时按 voice_id 排序并一次性建立 (引擎, 区域)、(引擎, 性别) 等索引，
+    之后的查询都是字典查找，返回的元组可以直接共享。updated_at 为在线同步的时间，
+    只使用内置列表时为 0。
+    """
+
+    def __init__(self, records: Iterable[VoiceRecord], updated_at: float = 0.0) -> None:
+        self.updated_at = updated_at
+        by_id = {record.voice_id: record for record in records}
+        self._records: tuple[VoiceRecord, ...] = tuple(
+            by_id[voice_id] for voice_id in sorted(by_id)
+        )
+        self._by_id = by_id
+        self._by_name = {record.name: record for record in self._records}
+
+        by_engine: dict[str, list[VoiceRecord]] = {}
+        by_region: dict[tuple[str, str], list[VoiceRecord]] = {}
+        by_gender: dict[tuple[str, str], list[VoiceRecord]] = {}
+        for record in self._records:
+            by_engine.setdefault(record.engine, []).append(record)
+            by_region.setdefault((record.engine, record.region), []).append(record)
+            by_gender.setdefault((record.engine, record.gender), []).append(record)
+        self._by_engine = {key: tuple(items) for key, items in by_engine.items()}
+        self._by_region = {key: tuple(items) for key, items in by_region.items()}
+        self._by_gender = {key: tuple(items) for key, items in by_gender.items()}
+        self._regions = {
+            engine: tuple(sorted({r.region for r in items if r.region}))
+            for engine, items in self._by_engine.items()
+        }
+        self._ids = {
+            engine: tuple(r.voice_id for r in items)
+            for engine, items in self._by_engine.items()
+        }
+
+        # 前缀搜索索引：完整名称和去掉区域后的短名称都可以作为前缀匹配
+        keys = []
+        for i, record in enumerate(self._records):
+            keys.append((record.name.casefold(), i))
+            keys.append((record.display_name.casefold(), i))
+        keys.sort()
+        self._search_keys = [key for key, _ in keys]
+        self._search_index = [i for _, i in keys]
+        # 包含和模糊匹配只看名称本身，忽略每个声音都有的 Neural 和性别后缀
+        self._folded = [
+            record.name.replace("Neural", "").casefold() for record in self._records
+        ]
+        self._display_folded = [record.display_name.casefold() for record in self._records]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, voice_id: object) -> bool:
+        return voice_id in self._by_id
+
+    def get(self, voice_id: str) -> Optional[VoiceRecord]:
+        """
+        按 voice_id 查找，也接受不带性别后缀的名称。
+        """
+
+        return self._by_id.get(voice_id) or self._by_name.get(voice_id)
+
+    def engines(self) -> tuple[str, ...]:
+        return tuple(self._by_engine)
+
+    def by_engine(self, engine: str) -> tuple[VoiceRecord, ...]:
+        return self._by_engine.get(engine, _EMPTY)
+
+    def by_region(self, engine: str, region: str) -> tuple[VoiceRecord, ...]:
+        return self._by_region.get((engine, region), _EMPTY)
+
+    def by_gender(self, engine: str, gender: str) -> tuple[VoiceRecord, ...]:
+        return self._by_gender.get((engine, gender), _EMPTY)
+
+    def regions(self, engine: str) -> tuple[str, ...]:
+        return self._regions.get(engine, _EMPTY)
+
+    def voice_ids(self, engine: str) -> tuple[str, ...]:
+        return self._ids.get(engine, _EMPTY)
+
+    def search(
+        self, query: str, engine: Optional[str] = None, limit: int = 20
+    ) -> list[VoiceRecord]:
+        """
+        按名称搜索声音：先返回前缀匹配，再返回包含查询串的，最后返回短名称按顺序包含
+        查询中所有字符的（如 "xxiao" 匹配 Xiaoxiao），每组内按 voice_id 排序。
+        """
+
+        query = query.strip().casefold()
+        if not query or limit <= 0:
+            return []
+
+        seen: set[int] = set()
+        pos = bisect_left(self._search_keys, query)
+        while pos < len(self._search_keys) and self._search_keys[pos].startswith(query):
+            seen.add(self._search_index[pos])
+            pos += 1
+        prefix = sorted(seen)
+
+        substring = []
+        fuzzy = []
+        for i, folded in enumerate(self._folded):
+            if i in seen:
+                continue
+            if query in folded:
+                substring.append(i)
+            elif _subsequence(query, self._display_folded[i]):
+                fuzzy.append(i)
+
+        results = []
+        for i in prefix + substring + fuzzy:
+            record = self._records[i]
+            if engine and record.engine != engine:
+                continue
+            results.append(record)
+            if len(results) >= limit:
+                break
+        return results
+
+
+def _builtin_records() -> list[VoiceRecord]:
+    from .azure_engines import AZURE_VOICES_BLOCK
+    from .siliconflow_engine import _SILICONFLOW_VOICES_WITH_GENDER
+
+    records = parse_azure_voices(AZURE_VOICES_BLOCK)
+    records.extend(
+        siliconflow_record(model, voice, gender)
+        for model, voice, gender in _SILICONFLOW_VOICES_WITH_GENDER
+    )
+    return records
+
+
+def build_default_catalog() -> VoiceCatalog:
+    """
+    由内置的 Azure 声音列表和硅基流动声音列表构建目录。
+    """
+
+    return VoiceCatalog(_builtin_records())
+
+
+def _records_from_voice_list(items: list, v2: bool) -> list[VoiceRecord]:
+    # edge-tts 和 Azure REST 接口返回的列表都包含 ShortName 和 Gender
+    records = []
+    for item in items:
+        name = item.get("ShortName") if isinstance(item, dict) else None
+        gender = item.get("Gender", "") if isinstance(item, dict) else ""
+        if not name or not gender:
+            continue
+        records.append(azure_record(f"{name}-V2" if v2 else name, gender))
+    return records
+
+
+class VoiceCatalogProvider:
+    """
+    声音目录的提供者：启动时读取 storage/voices 下缓存的在线列表，与内置列表合并后立即可用；
+    缓存超过 ttl 秒后在后台事件循环中重新拉取，拉取期间和失败时继续使用当前目录。
+
+    V1 声音来自 edge-tts 的声音列表，V2 声音来自 Azure 语音服务的 voices/list 接口
+    （需要 Speech Key）。两个接口都可以通过配置替换为其他地址，便于在本地测试。
+    内置列表中的声音始终保留，已保存的声音名称不会因为在线列表变化而失效。
+    """
+
+    def __init__(
+        self,
+        cache_file: str,
+        ttl: float = 86400,
+        sync: bool = True,
+        edge_endpoint: str = "",
+        azure_endpoint: str = "",
+        timeout: float = 10,
+        retry_interval: float = 600,
+    ) -> None:
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.sync = sync
+        self.edge_endpoint = edge_endpoint
+        self.azure_endpoint = azure_endpoint
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+
+        self._lock = threading.Lock()
+        self._refreshing: Optional[Future] = None
+        self._next_attempt = 0.0
+        self._builtin = _builtin_records()
+        self._fetched: dict[str, list[VoiceRecord]] = {}
+        updated_at = self._load_cache()
+        self._catalog = self._build(updated_at)
+
+    @property
+    def catalog(self) -> VoiceCatalog:
+        """
+        返回当前目录，缓存过期时顺带触发一次后台刷新，本身不会阻塞。
+        """
+
+        self.maybe_refresh()
+        return self._catalog
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return now - self._catalog.updated_at >= self.ttl
+
+    def _build(self, updated_at: float) -> VoiceCatalog:
+        engines = set(self._fetched)
+        records = [r for r in self._builtin if r.engine not in engines]
+        # 在线列表覆盖同一引擎的内置列表，但保留在线列表中没有的内置声音
+        for engine, fetched in self._fetched.items():
+            ids = {r.voice_id for r in fetched}
+            records.extend(r for r in self._builtin if r.engine == engine and r.voice_id not in ids)
+            records.extend(fetched)
+        return VoiceCatalog(records, updated_at=updated_at)
+
+    def _load_cache(self) -> float:
+        if not os.path.isfile(self.cache_file):
+            return 0.0
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != _CATALOG_VERSION:
+                return 0.0
+            self._fetched = {
+                engine: [azure_record(name, gender) for name, gender in voices]
+                for engine, voices in data.get("engines", {}).items()
+            }
+            return float(data.get("updated_at", 0))
+        except Exception as exc:
+            logger.warning(f"failed to load voice catalog cache {self.cache_file}: {str(exc)}")
+            self._fetched = {}
+            return 0.0
+
+    def _save_cache(self, updated_at: float) -> None:
+        data = {
+            "version": _CATALOG_VERSION,
+            "updated_at": updated_at,
+            "engines": {
+                engine: [[r.name, r.gender] for r in records]
+                for engine, records in self._fetched.items()
+            },
+        }
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        utils.atomic_write(
+            self.cache_file,
+            json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+        )
+
+    async def _get_json(self, url: str, headers: Optional[dict] = None) -> list:
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                return await response.json(content_type=None)
+
+    async def _fetch_edge(self) -> list[VoiceRecord]:
+        if self.edge_endpoint:
+            items = await self._get_json(self.edge_endpoint)
+        else:
+            import edge_tts
+
+            items = await asyncio.wait_for(edge_tts.list_voices(), self.timeout)
+        return _records_from_voice_list(items, v2=False)
+
+    async def _fetch_azure(self) -> Optional[list[VoiceRecord]]:
+        from .azure_engines import AzureTTSV2Engine
+
+        credentials = AzureTTSV2Engine.credential_pool().available()
+        headers = {}
+        if credentials:
+            headers["Ocp-Apim-Subscription-Key"] = credentials[0].key
+        url = self.azure_endpoint
+        if not url:
+            if not credentials:
+                # 没有配置 Speech Key 时无法获取 V2 列表，继续使用已有列表
+                return None
+            url = _AZURE_VOICES_URL.format(region=credentials[0].region)
+        items = await self._get_json(url, headers)
+        return _records_from_voice_list(items, v2=True)
+
+    async def arefresh(self) -> bool:
+        """
+        拉取在线声音列表并替换当前目录，至少一个接口成功时写入缓存并返回 True。
+        """
+
+        sources = {
+            "azure-tts-v1": self._fetch_edge(),
+            "azure-tts-v2": self._fetch_azure(),
+        }
+        results = await asyncio.gather(*sources.values(), return_exceptions=True)
+        fetched = dict(self._fetched)
+        updated = False
+        for engine, result in zip(sources, results):
+            if isinstance(result, BaseException):
+                logger.warning(f"failed to fetch voice list for {engine}: {str(result)}")
+            elif result:
+                fetched[engine] = result
+                updated = True
+
+        if not updated:
+            self._next_attempt = time.time() + self.retry_interval
+            return False
+
+        updated_at = time.time()
+        with self._lock:
+            self._fetched = fetched
+            self._catalog = self._build(updated_at)
+        try:
+            self._save_cache(updated_at)
+        except Exception as exc:
+            logger.warning(f"failed to save voice catalog cache: {str(exc)}")
+        logger.info(
+            f"voice catalog refreshed, {len(self._catalog)} voices, "
+            + ", ".join(f"{engine}: {len(items)}" for engine, items in fetched.items())
+        )
+        return True
+
+    def refresh(self) -> bool:
+        """
+        同步刷新，阻塞到拉取完成。
+        """
+
+        return utils.run_async(self.arefresh())
+
+    def maybe_refresh(self) -> Optional[Future]:
+        """
+        目录过期且没有正在进行的刷新时，在后台事件循环中启动一次刷新。
+        失败后 retry_interval 秒内不再重试，避免离线时每次调用都发起请求。
+        """
+
+        now = time.time()
+        if not self.sync or not self.is_stale(now) or now < self._next_attempt:
+            return None
+        with self._lock:
+            if self._refreshing is not None and not self._refreshing.done():
+                return self._refreshing
+            self._next_attempt = now + self.retry_interval
+            self._refreshing = asyncio.run_coroutine_threadsafe(
+                self.arefresh(), utils.get_event_loop()
+            )
+            return self._refreshing
+
+
+_provider: Optional[VoiceCatalogProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_voice_catalog_provider() -> VoiceCatalogProvider:
+    """
+    返回全局声音目录提供者，同步策略从 config.voices 读取。
+    """
+
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = VoiceCatalogProvider(
+                    cache_file=os.path.join(utils.storage_dir("voices"), "catalog.json"),
+                    ttl=float(config.voices.get("ttl_hours", 24)) * 3600,
+                    sync=bool(config.voices.get("sync", True)),
+                    edge_endpoint=config.voices.get("edge_endpoint", ""),
+                    azure_endpoint=config.voices.get("azure_endpoint", ""),
+                    timeout=float(config.voices.get("timeout", 10)),
+                    retry_interval=float(config.voices.get("retry_interval", 600)),
+                )
+    return _provider
+
+
+def get_voice_catalog() -> VoiceCatalog:
+    """
+    返回当前的声音目录：优先使用缓存的在线列表，过期时在后台刷新，离线时使用内置列表。
+    """
+
+    return get_voice_catalog_provider().catalog
+
+
+__all__ = [
+    "VoiceCatalog",
+    "VoiceCatalogProvider",
+    "VoiceRecord",
+    "azure_record",
+    "build_default_catalog",
+    "get_voice_catalog",
+    "get_voice_catalog_provider",
+    "parse_azure_voices",
+    "siliconflow_record",
+]
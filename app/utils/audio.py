@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+MP3 拼接与裁剪：按帧边界直接复制数据，不解码也不重新编码。
+"""
+from __future__ import annotations
+
+import mmap
+import os
+from contextlib import ExitStack
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Optional, Sequence, Union
+
+from app.utils import mp3
+
+Source = Union[str, bytes, bytearray, memoryview]
+
+
+@dataclass(slots=True)
+class Mp3Join:
+    """
+    拼接结果：join_samples[i] 为第 i 段在输出中的起始采样位置，
+    total_samples 为输出的总采样数。输出到文件时 audio 为空。
+    """
+
+    sample_rate: int
+    samples_per_frame: int
+    total_samples: int = 0
+    join_samples: list[int] = field(default_factory=list)
+    audio: bytes = b""
+
+    def samples_to_100ns(self, samples: int) -> int:
+        return samples * 10000000 // self.sample_rate if self.sample_rate else 0
+
+    @property
+    def join_offsets(self) -> list[int]:
+        """
+        每段的起始时间（100 纳秒单位），可直接用于平移 SubMaker 时间轴。
+        """
+
+        return [self.samples_to_100ns(samples) for samples in self.join_samples]
+
+    @property
+    def duration(self) -> float:
+        return self.total_samples / self.sample_rate if self.sample_rate else 0.0
+
+
+def _open_buffer(source: Source, stack: ExitStack) -> memoryview:
+    if isinstance(source, str):
+        if os.path.getsize(source) == 0:
+            return memoryview(b"")
+        f = stack.enter_context(open(source, "rb"))
+        data = stack.enter_context(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        view = memoryview(data)
+        # memoryview 必须先于 mmap 释放，否则关闭 mmap 时会报错
+        stack.callback(view.release)
+        return view
+    return memoryview(source)
+
+
+def _parse(view: memoryview) -> mp3.Mp3Info:
+    obj = view.obj
+    # mmap 和 bytes 支持 find，直接解析底层对象，避免复制
+    if isinstance(obj, (bytes, bytearray, mmap.mmap)) and len(obj) == len(view):
+        return mp3.parse_mp3(obj)
+    return mp3.parse_mp3(view)
+
+
+def _frame_slices(
+    view: memoryview, info: mp3.Mp3Info, first: int = 0, last: Optional[int] = None
+) -> list[memoryview]:
+    """
+    返回第 first 到 last（不含）帧的数据切片，帧之间连续时只返回一个切片。
+    """
+
+    offsets = info.frame_offsets
+    last = len(offsets) if last is None else last
+    if first >= last:
+        return []
+    if info.contiguous:
+        end = offsets[last] if last < len(offsets) else info.audio_end
+        return [view[offsets[first] : end]]
+
+    # 中间有被跳过的损坏字节，逐帧复制
+    slices = []
+    for offset in offsets[first:last]:
+        header = mp3.parse_frame_header(view, offset)
+        slices.append(view[offset : offset + header.frame_size])
+    return slices
+
+
+@lru_cache(maxsize=32)
+def _silence_frame(header: bytes) -> bytes:
+    # 去掉 CRC 和填充位，边信息和主数据全为 0 的帧解码后为静音
+    b1 = header[1] | 0x01
+    b2 = header[2] & ~0x02
+    frame_header = bytes((header[0], b1, b2, header[3]))
+    parsed = mp3.parse_frame_header(frame_header, 0)
+    return frame_header + bytes(parsed.frame_size - 4)
+
+
+def silence_frames(reference_header: bytes, seconds: float) -> tuple[bytes, int]:
+    """
+    按参考帧头的格式生成约 seconds 秒的静音帧，返回数据和实际采样数。
+    """
+
+    header = mp3.parse_frame_header(reference_header, 0)
+    if header is None:
+        raise ValueError("invalid mp3 frame header")
+    count = max(0, round(seconds * header.sample_rate / header.samples))
+    return _silence_frame(bytes(reference_header[:4])) * count, count * header.samples
+
+
+def _as_gaps(gaps: Union[float, Sequence[float]], count: int) -> list[float]:
+    if isinstance(gaps, (int, float)):
+        return [float(gaps)] * max(0, count - 1)
+    gaps = [float(gap) for gap in gaps]
+    if len(gaps) != max(0, count - 1):
+        raise ValueError(f"expected {count - 1} gaps, got {len(gaps)}")
+    return gaps
+
+
+def concat_mp3(
+    sources: Iterable[Source],
+    output: Union[str, BinaryIO, None] = None,
+    gaps: Union[float, Sequence[float]] = 0.0,
+) -> Mp3Join:
+    """
+    按帧边界拼接多个 MP3（文件路径或数据），去掉各段的 ID3 标签和 Xing/VBRI 信息帧，
+    段与段之间可插入 gaps 秒的静音帧。
+
+    output 为文件路径或可写的二进制文件对象时直接写出，为 None 时结果放在 Mp3Join.audio 中。
+    所有片段的采样率和声道数必须相同，否则抛出 ValueError。
+    """
+
+    sources = list(sources)
+    gap_list = _as_gaps(gaps, len(sources))
+    join = Mp3Join(sample_rate=0, samples_per_frame=0)
+    pieces: list[Union[memoryview, bytes]] = []
+
+    with ExitStack() as stack:
+        try:
+            reference = b""
+            channels = 0
+            for i, source in enumerate(sources):
+                view = _open_buffer(source, stack)
+                info = _parse(view)
+                if not info.frame_count:
+                    raise ValueError(f"no mp3 frames found in segment {i}")
+                if not join.sample_rate:
+                    join.sample_rate = info.sample_rate
+                    join.samples_per_frame = info.samples_per_frame
+                    channels = info.channels
+                    reference = bytes(view[info.frame_offsets[0] : info.frame_offsets[0] + 4])
+                elif info.sample_rate != join.sample_rate or info.channels != channels:
+                    raise ValueError(
+                        f"segment {i} format mismatch: {info.sample_rate}Hz/{info.channels}ch, "
+                        f"expected {join.sample_rate}Hz/{channels}ch"
+                    )
+
+                if i > 0 and gap_list[i - 1] > 0:
+                    silence, samples = silence_frames(reference, gap_list[i - 1])
+                    pieces.append(silence)
+                    join.total_samples += samples
+
+                join.join_samples.append(join.total_samples)
+                pieces.extend(_frame_slices(view, info))
+                join.total_samples += info.total_samples
+
+            if output is None:
+                join.audio = b"".join(pieces)
+            elif isinstance(output, str):
+                with open(output, "wb") as f:
+                    f.writelines(pieces)
+            else:
+                output.writelines(pieces)
+        finally:
+            # 切片引用了 mmap，必须在关闭文件前释放
+            pieces.clear()
+
+    return join
+
+
+def slice_mp3(
+    source: Source, start: float = 0.0, end: Optional[float] = None
+) -> tuple[bytes, int]:
+    """
+    截取 [start, end) 秒之间的音频，起点向前、终点向后对齐到帧边界，
+    返回数据和实际起点在原音频中的采样位置。
+
+    MP3 帧可能引用前一帧的比特储备，从中间截取时第一帧解码可能有极短的瑕疵。
+    """
+
+    with ExitStack() as stack:
+        view = _open_buffer(source, stack)
+        info = _parse(view)
+        if not info.frame_count:
+            return b"", 0
+        spf = info.samples_per_frame
+        first = max(0, int(start * info.sample_rate) // spf)
+        last = info.frame_count
+        if end is not None:
+            last = min(last, -(-int(end * info.sample_rate) // spf))
+        data = b"".join(_frame_slices(view, info, first, last))
+        return data, first * spf
+
+
+def strip_mp3(source: Source) -> bytes:
+    """
+    去掉 ID3 标签和 Xing/VBRI 信息帧，只保留音频帧。
+    """
+
+    return slice_mp3(source)[0]
+
+
+__all__ = ["Mp3Join", "concat_mp3", "silence_frames", "slice_mp3", "strip_mp3"]
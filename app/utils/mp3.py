@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+纯 Python 的 MP3 帧解析：单次遍历得到时长和每一帧的字节位置，不依赖 ffmpeg。
+"""
+from __future__ import annotations
+
+import mmap
+import os
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+# 比特率表（kbps），按 (MPEG 版本是否为 1, layer) 索引，下标为头中的 bitrate_index
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# 采样率表，按头中的版本位索引：3 = MPEG1，2 = MPEG2，0 = MPEG2.5
+_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),
+    2: (22050, 24000, 16000),
+    0: (11025, 12000, 8000),
+}
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+@dataclass(slots=True, frozen=True)
+class FrameHeader:
+    """
+    一个 MP3 帧头的解析结果。
+    """
+
+    version: int
+    layer: int
+    bitrate: int
+    sample_rate: int
+    channels: int
+    padding: int
+    frame_size: int
+    samples: int
+
+    @property
+    def is_mpeg1(self) -> bool:
+        return self.version == 3
+
+
+@dataclass(slots=True)
+class Mp3Info:
+    """
+    MP3 流的解析结果。
+
+    frame_offsets 为每个音频帧在数据中的起始位置（不含 Xing/VBRI 信息帧），
+    audio_end 为最后一个音频帧的结束位置，audio_bytes 为所有音频帧的总长度，
+    帧之间没有被跳过的损坏字节时等于 audio_end - audio_start。
+    """
+
+    sample_rate: int = 0
+    channels: int = 0
+    samples_per_frame: int = 0
+    frame_count: int = 0
+    audio_start: int = 0
+    audio_end: int = 0
+    audio_bytes: int = 0
+    bitrate: int = 0
+    is_vbr: bool = False
+    header_frames: Optional[int] = None
+    encoder_delay: int = 0
+    encoder_padding: int = 0
+    frame_offsets: list[int] = field(default_factory=list)
+
+    @property
+    def total_samples(self) -> int:
+        return self.frame_count * self.samples_per_frame
+
+    @property
+    def contiguous(self) -> bool:
+        return self.audio_bytes == self.audio_end - self.audio_start
+
+    @property
+    def duration(self) -> float:
+        """
+        时长（秒），包含编码器延迟和填充，与逐帧解码得到的长度一致。
+        """
+
+        if not self.sample_rate:
+            return 0.0
+        return self.total_samples / self.sample_rate
+
+    @property
+    def duration_100ns(self) -> int:
+        if not self.sample_rate:
+            return 0
+        return self.total_samples * 10000000 // self.sample_rate
+
+    def frame_size(self, index: int) -> int:
+        """
+        第 index 帧的长度，仅在 contiguous 为 True 时准确。
+        """
+
+        end = (
+            self.frame_offsets[index + 1]
+            if index + 1 < len(self.frame_offsets)
+            else self.audio_end
+        )
+        return end - self.frame_offsets[index]
+
+
+def parse_frame_header(data: Buffer, pos: int) -> Optional[FrameHeader]:
+    """
+    解析 pos 处的 4 字节帧头，不是合法帧头时返回 None。
+    """
+
+    if pos + 4 > len(data):
+        return None
+    b0, b1, b2, b3 = data[pos], data[pos + 1], data[pos + 2], data[pos + 3]
+    if b0 != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer_bits = (b1 >> 1) & 0x03
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    # version 1 为保留值，layer 0、比特率 15、采样率 3 均为非法值；
+    # 自由格式（比特率 0）无法从帧头计算长度，同样视为非法
+    if (
+        version == 1
+        or layer_bits == 0
+        or bitrate_index in (0, 15)
+        or sample_rate_index == 3
+    ):
+        return None
+
+    layer = 4 - layer_bits
+    is_mpeg1 = version == 3
+    bitrate = _BITRATES[(is_mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    channels = 1 if (b3 >> 6) == 3 else 2
+
+    if layer == 1:
+        samples = 384
+        frame_size = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or is_mpeg1:
+        samples = 1152
+        frame_size = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        frame_size = 72 * bitrate // sample_rate + padding
+
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=bitrate,
+        sample_rate=sample_rate,
+        channels=channels,
+        padding=padding,
+        frame_size=frame_size,
+        samples=samples,
+    )
+
+
+def id3v2_size(data: Buffer, pos: int = 0) -> int:
+    """
+    返回 pos 处 ID3v2 标签的总长度（含头部和可选的尾部），不是 ID3v2 标签时返回 0。
+    """
+
+    if pos + 10 > len(data) or bytes(data[pos : pos + 3]) != b"ID3":
+        return 0
+    # 长度使用 synchsafe 整数，每字节只用低 7 位
+    size = 0
+    for b in data[pos + 6 : pos + 10]:
+        size = (size << 7) | (b & 0x7F)
+    footer = 10 if data[pos + 5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def _side_info_size(header: FrameHeader) -> int:
+    if header.is_mpeg1:
+        return 17 if header.channels == 1 else 32
+    return 9 if header.channels == 1 else 17
+
+
+def _read_info_frame(data: Buffer, pos: int, header: FrameHeader, info: Mp3Info) -> bool:
+    """
+    识别首帧中的 Xing/Info 或 VBRI 信息帧并读取其中的总帧数和编码器延迟，
+    是信息帧时返回 True（该帧不含音频数据）。
+    """
+
+    end = pos + header.frame_size
+    xing = pos + 4 + _side_info_size(header)
+    tag = bytes(data[xing : xing + 4])
+    if tag in (b"Xing", b"Info"):
+        # LAME 给 CBR 写 Info、给 VBR 写 Xing，但并非所有编码器都遵守；
+        # 逐帧遍历时会按实际比特率重新判断，这里只作为跳过遍历时的依据
+        info.is_vbr = tag == b"Xing"
+        flags = int.from_bytes(data[xing + 4 : xing + 8], "big")
+        cursor = xing + 8
+        if flags & 0x01:
+            info.header_frames = int.from_bytes(data[cursor : cursor + 4], "big")
+            cursor += 4
+        if flags & 0x02:
+            cursor += 4
+        if flags & 0x04:
+            cursor += 100
+        if flags & 0x08:
+            cursor += 4
+        # LAME 扩展：编码器名称之后第 21 字节起的 3 字节为 12 位延迟 + 12 位填充
+        if cursor + 24 <= end and bytes(data[cursor : cursor + 4]) in (b"LAME", b"Lavf", b"Lavc"):
+            delay_padding = int.from_bytes(data[cursor + 21 : cursor + 24], "big")
+            info.encoder_delay = delay_padding >> 12
+            info.encoder_padding = delay_padding & 0xFFF
+        return True
+
+    vbri = pos + 4 + 32
+    if bytes(data[vbri : vbri + 4]) == b"VBRI":
+        info.is_vbr = True
+        info.header_frames = int.from_bytes(data[vbri + 14 : vbri + 18], "big")
+        return True
+    return False
+
+
+def _find_sync(data: Buffer, pos: int, end: int) -> Optional[tuple[int, FrameHeader]]:
+    """
+    从 pos 开始查找下一个可信的帧头：要求其后紧跟另一个合法帧头（或恰好到达数据末尾），
+    避免把音频数据中偶然出现的 0xFFE 当成帧头。
+    """
+
+    while True:
+        pos = data.find(b"\xff", pos, end)
+        if pos < 0:
+            return None
+        header = parse_frame_header(data, pos)
+        if header is not None:
+            next_pos = pos + header.frame_size
+            if next_pos == end or (
+                next_pos < end and parse_frame_header(data, next_pos) is not None
+            ):
+                return pos, header
+        pos += 1
+
+
+def parse_mp3(data: Buffer, collect_frames: bool = True) -> Mp3Info:
+    """
+    单次遍历解析 MP3 数据，支持 ID3v1/ID3v2 标签、Xing/Info/VBRI 信息帧、CBR 和 VBR。
+
+    collect_frames 为 False 且存在带帧数的信息帧时直接使用信息帧中的帧数，不再逐帧遍历。
+    数据中间出现的损坏字节会被跳过并重新同步。
+    """
+
+    if isinstance(data, memoryview):
+        # memoryview 不支持 find，转换为 bytes 后再查找帧同步
+        data = data.tobytes()
+
+    info = Mp3Info()
+    end = len(data)
+    if end >= 128 and bytes(data[end - 128 : end - 125]) == b"TAG":
+        end -= 128
+
+    pos = 0
+    while True:
+        size = id3v2_size(data, pos)
+        if not size:
+            break
+        pos += size
+
+    found = _find_sync(data, pos, end)
+    if found is None:
+        return info
+    pos, header = found
+
+    info.sample_rate = header.sample_rate
+    info.channels = header.channels
+    info.samples_per_frame = header.samples
+
+    if _read_info_frame(data, pos, header, info):
+        pos += header.frame_size
+        if not collect_frames and info.header_frames:
+            info.audio_start = pos
+            info.audio_end = end
+            info.audio_bytes = end - pos
+            info.frame_count = info.header_frames
+            info.bitrate = (
+                int((end - pos) * 8 / info.duration) if info.duration else header.bitrate
+            )
+            return info
+
+    info.audio_start = pos
+    offsets = info.frame_offsets
+    count = 0
+    # 信息帧的比特率可能与音频帧不同（如 Lavf），只比较音频帧
+    first_bitrate = 0
+    is_vbr = False
+    total_bytes = 0
+    while pos < end:
+        header = parse_frame_header(data, pos)
+        if header is None or header.sample_rate != info.sample_rate:
+            found = _find_sync(data, pos + 1, end)
+            if found is None:
+                break
+            pos, header = found
+            if header.sample_rate != info.sample_rate:
+                pos += 1
+                continue
+        if pos + header.frame_size > end:
+            # 被截断的最后一帧无法完整解码，不计入时长
+            break
+        if collect_frames:
+            offsets.append(pos)
+        if not first_bitrate:
+            first_bitrate = header.bitrate
+        elif header.bitrate != first_bitrate:
+            is_vbr = True
+        count += 1
+        total_bytes += header.frame_size
+        pos += header.frame_size
+        info.audio_end = pos
+
+    info.frame_count = count
+    info.audio_bytes = total_bytes
+    if count:
+        info.is_vbr = is_vbr
+        info.bitrate = int(total_bytes * 8 * info.sample_rate / (count * info.samples_per_frame))
+    return info
+
+
+def parse_mp3_file(path: str, collect_frames: bool = True) -> Mp3Info:
+    """
+    通过内存映射解析 MP3 文件，不把整个文件读入内存。
+    """
+
+    if os.path.getsize(path) == 0:
+        return Mp3Info()
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return parse_mp3(data, collect_frames=collect_frames)
+
+
+def get_mp3_duration(source: Union[str, Buffer]) -> float:
+    """
+    返回 MP3 文件路径或数据的时长（秒），无法识别时返回 0。
+    """
+
+    if isinstance(source, str):
+        return parse_mp3_file(source, collect_frames=False).duration
+    return parse_mp3(source, collect_frames=False).duration
+
+
+__all__ = [
+    "FrameHeader",
+    "Mp3Info",
+    "get_mp3_duration",
+    "id3v2_size",
+    "parse_frame_header",
+    "parse_mp3",
+    "parse_mp3_file",
+]
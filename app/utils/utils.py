@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 import locale
 import os
+import queue
+import re
+import tempfile
 import threading
 from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, TextIO
 from uuid import uuid4
 
 from loguru import logger
@@ -51,6 +56,23 @@ def storage_dir(sub_dir: str = "", create: bool = False):
     return d
 
 
+def atomic_write(path: str, data: bytes) -> None:
+    """
+    先写入同目录下的临时文件再 rename，读取方不会看到写了一半的文件。
+    """
+
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def run_in_background(func, *args, **kwargs):
     def run():
         try:
@@ -63,6 +85,70 @@ def run_in_background(func, *args, **kwargs):
     return thread
 
 
+_loop = None
+_loop_thread = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """
+    返回进程内共享的后台事件循环，首次调用时在守护线程中启动。
+    """
+
+    global _loop, _loop_thread
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=loop.run_forever, name="tts-event-loop", daemon=True
+            )
+            thread.start()
+            _loop, _loop_thread = loop, thread
+    return _loop
+
+
+def run_async(coro):
+    """
+    在共享的后台事件循环上执行协程并阻塞等待结果，供同步代码调用异步接口。
+    """
+
+    loop = get_event_loop()
+    if threading.current_thread() is _loop_thread:
+        coro.close()
+        raise RuntimeError("run_async cannot be called from the event loop thread")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+def iterate_async(async_iterable):
+    """
+    在共享的后台事件循环上消费异步迭代器，并以同步生成器的方式逐个产出元素。
+    调用方提前结束迭代时会取消后台任务。
+    """
+
+    items = queue.Queue()
+    done = object()
+
+    async def _produce():
+        try:
+            async for item in async_iterable:
+                items.put(item)
+        finally:
+            items.put(done)
+
+    future = asyncio.run_coroutine_threadsafe(_produce(), get_event_loop())
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                break
+            yield item
+        future.result()
+    finally:
+        future.cancel()
+
+
 def time_convert_seconds_to_hmsm(seconds) -> str:
     hours = int(seconds // 3600)
     seconds = seconds % 3600
@@ -88,42 +174,129 @@ def text_to_srt(idx: int, msg: str, start_time: float, end_time: float) -> str:
 
 
 def str_contains_punctuation(word):
-    for p in const.PUNCTUATIONS:
-        if p in word:
-            return True
-    return False
+    return _PUNCTUATION_PATTERN.search(word) is not None
 
 
-def split_string_by_punctuations(s):
-    result = []
-    txt = ""
-
-    previous_char = ""
-    next_char = ""
-    for i in range(len(s)):
-        char = s[i]
-        if char == "\n":
-            result.append(txt.strip())
-            txt = ""
-            continue
+# 所有断句标点组成的字符类，替代逐个字符在列表中查找
+_PUNCTUATION_PATTERN = re.compile(
+    "[" + "".join(re.escape(p) for p in const.PUNCTUATIONS) + "]"
+)
+
 
-        if i > 0:
-            previous_char = s[i - 1]
-        if i < len(s) - 1:
-            next_char = s[i + 1]
+class Sentence(NamedTuple):
+    """
+    断句结果：text 为去掉首尾空白的句子，start/end 为其在原文中的字符位置。
+    """
 
-        if char == "." and previous_char.isdigit() and next_char.isdigit():
-            txt += char
+    text: str
+    start: int
+    end: int
+
+
+def _split_positions(s: str, endpos: int):
+    """
+    返回 s[:endpos] 中的断句位置，数字之间的小数点不断句。
+    """
+
+    for match in _PUNCTUATION_PATTERN.finditer(s, 0, endpos):
+        i = match.start()
+        if (
+            s[i] == "."
+            and 0 < i < len(s) - 1
+            and s[i - 1].isdigit()
+            and s[i + 1].isdigit()
+        ):
             continue
+        yield i
+
 
-        if char not in const.PUNCTUATIONS:
-            txt += char
-        else:
-            result.append(txt.strip())
-            txt = ""
-    result.append(txt.strip())
-    result = list(filter(None, result))
-    return result
+def _make_sentence(s: str, start: int, end: int, base: int = 0) -> Optional[Sentence]:
+    segment = s[start:end]
+    text = segment.strip()
+    if not text:
+        return None
+    start += len(segment) - len(segment.lstrip())
+    return Sentence(text, base + start, base + start + len(text))
+
+
+def iter_sentence_spans(s: str) -> Iterator[Sentence]:
+    """
+    按标点断句并返回每句在原文中的位置，断句规则与 split_string_by_punctuations 相同。
+    """
+
+    start = 0
+    for i in _split_positions(s, len(s)):
+        sentence = _make_sentence(s, start, i)
+        if sentence:
+            yield sentence
+        start = i + 1
+    sentence = _make_sentence(s, start, len(s))
+    if sentence:
+        yield sentence
+
+
+def iter_sentences(stream: TextIO, chunk_size: int = 65536) -> Iterator[Sentence]:
+    """
+    从文本文件对象中分块读取并逐句产出，适合处理数 MB 的文本，
+    start/end 为句子在整个文本中的字符位置。
+    """
+
+    carry = ""
+    base = 0
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer = carry + chunk
+        if not chunk:
+            yield from (
+                Sentence(item.text, item.start + base, item.end + base)
+                for item in iter_sentence_spans(buffer)
+            )
+            return
+
+        # 最后一个字符可能是小数点，需要看到下一块的第一个字符才能判断，留到下一轮处理
+        start = 0
+        for i in _split_positions(buffer, len(buffer) - 1):
+            sentence = _make_sentence(buffer, start, i, base)
+            if sentence:
+                yield sentence
+            start = i + 1
+        carry = buffer[start:]
+        base += start
+
+
+def split_string_by_punctuations(s):
+    return [sentence.text for sentence in iter_sentence_spans(s)]
+
+
+def split_text_into_chunks(text: str, max_chars: int) -> list[str]:
+    """
+    按 split_string_by_punctuations 相同的断句规则把长文本切分为不超过 max_chars 的片段。
+    片段直接从原文截取，保留标点和空白，以便引擎正确断句。
+    """
+
+    # 断句位置：标点之后（数字间的小数点除外）
+    boundaries = [i + 1 for i in _split_positions(text, len(text))]
+    boundaries.append(len(text))
+
+    chunks = []
+    start = 0
+    last_boundary = 0
+    for boundary in boundaries:
+        if boundary - start <= max_chars:
+            last_boundary = boundary
+            continue
+        if last_boundary > start:
+            chunks.append(text[start:last_boundary])
+            start = last_boundary
+        # 单句超长时只能硬切
+        while boundary - start > max_chars:
+            chunks.append(text[start : start + max_chars])
+            start += max_chars
+        last_boundary = boundary
+    if start < len(text):
+        chunks.append(text[start:])
+
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
 
 
 def md5(text):
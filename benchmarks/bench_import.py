@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动导入耗时基准：在新的解释器中用 python -X importtime 导入各模块，
+报告每个模块的累计导入耗时、其中最慢的子模块，以及是否连带加载了重量级依赖。
+
+用法：python benchmarks/bench_import.py [--repeat 5] [--top 5] [module ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+DEFAULT_MODULES = [
+    "app.config",
+    "app.services.tts_engine_base",
+    "app.services.voice_catalog",
+    "app.services.voice",
+    "app.services.azure_engines",
+    "app.services.siliconflow_engine",
+    "edge_tts",
+    "aiohttp",
+    "azure.cognitiveservices.speech",
+]
+
+# 应当在首次合成时才加载的依赖
+HEAVY_DEPENDENCIES = ["edge_tts", "aiohttp", "azure.cognitiveservices.speech", "moviepy"]
+
+
+def measure(module: str) -> list[tuple[int, int, int, str]]:
+    """
+    在子进程中导入 module，返回 importtime 的每一行：(缩进层级, 自身微秒, 累计微秒, 模块名)。
+    """
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return rows
+
+
+def summarize(module: str, repeat: int, top: int) -> None:
+    best = None
+    for _ in range(repeat):
+        rows = measure(module)
+        total = next((cum for _, _, cum, name in rows if name == module), 0)
+        if best is None or total < best[0]:
+            best = (total, rows)
+
+    total, rows = best
+    loaded = [dep for dep in HEAVY_DEPENDENCIES if any(name == dep for *_, name in rows)]
+    print(f"{module}: {total / 1000:.1f} ms")
+    if loaded:
+        print(f"  loads: {', '.join(loaded)}")
+
+    # 只看目标模块的直接子模块，按累计耗时排序
+    start = next((i for i, row in enumerate(rows) if row[3] == module), None)
+    if start is None:
+        return
+    depth = rows[start][0]
+    children = []
+    for i in range(start - 1, -1, -1):
+        if rows[i][0] <= depth:
+            break
+        if rows[i][0] == depth + 1:
+            children.append(rows[i])
+    for _, _, cumulative, name in sorted(children, key=lambda row: -row[2])[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"python {sys.version.split()[0]}, best of {args.repeat} cold imports")
+    for module in args.modules:
+        try:
+            summarize(module, args.repeat, args.top)
+        except RuntimeError as exc:
+            print(f"{module}: failed, {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+字幕对齐基准测试：在约 10 万字符的文本上比较旧的逐词正则匹配与新的线性对齐器。
+
+用法：python benchmarks/bench_subtitle.py [--chars 100000] [--skip-legacy]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+from edge_tts import SubMaker  # noqa: E402
+
+from app.services import subtitle  # noqa: E402
+from app.utils import utils  # noqa: E402
+
+_WORDS = (
+    "the quick brown fox jumps over lazy dog speech synthesis subtitle "
+    "timeline offset boundary audio voice engine stream"
+).split()
+_HANZI = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研"
+
+
+def build_text(chars: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < chars:
+        if rng.random() < 0.5:
+            sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(4, 40)))
+            sentence = sentence.capitalize() + rng.choice([".", "!", "?", ","])
+        else:
+            sentence = "".join(rng.choice(_HANZI) for _ in range(rng.randint(6, 60)))
+            sentence += rng.choice(["。", "，", "！", "？"])
+        if rng.random() < 0.1:
+            sentence += "\n"
+        parts.append(sentence)
+        size += len(sentence) + 1
+    return " ".join(parts)
+
+
+def build_sub_maker(text: str) -> SubMaker:
+    """
+    模拟引擎返回的词边界：英文按空格分词，中文每两个字一个词，每词 200 毫秒。
+    """
+
+    sub_maker = SubMaker()
+    offset = 0
+    for token in re.findall(r"[A-Za-z0-9']+|[一-鿿]{1,2}", text):
+        sub_maker.subs.append(token)
+        sub_maker.offset.append((offset, offset + 2000000))
+        offset += 2000000
+    return sub_maker
+
+
+def legacy_align(sub_maker: SubMaker, text: str) -> int:
+    """
+    旧版 create_subtitle 的匹配逻辑（不含写文件），返回匹配到的行数。
+    """
+
+    for c in "[](){}":
+        text = text.replace(c, " ")
+    text = text.strip()
+    script_lines = utils.split_string_by_punctuations(text)
+
+    def match_line(_sub_line, _sub_index):
+        if len(script_lines) <= _sub_index:
+            return ""
+        _line = script_lines[_sub_index]
+        if _sub_line == _line:
+            return _line.strip()
+        _sub_line_ = re.sub(r"[^\w\s]", "", _sub_line)
+        _line_ = re.sub(r"[^\w\s]", "", _line)
+        if _sub_line_ == _line_:
+            return _line_.strip()
+        _sub_line_ = re.sub(r"\W+", "", _sub_line)
+        _line_ = re.sub(r"\W+", "", _line)
+        if _sub_line_ == _line_:
+            return _line.strip()
+        return ""
+
+    matched = 0
+    sub_line = ""
+    for sub in sub_maker.subs:
+        sub_line += sub
+        if match_line(sub_line, matched):
+            matched += 1
+            sub_line = ""
+    return matched
+
+
+def _time(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chars", type=int, default=100000)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    text = build_text(args.chars)
+    sub_maker = build_sub_maker(text)
+    lines = len(utils.split_string_by_punctuations(text))
+    print(f"text: {len(text)} chars, {lines} lines, {len(sub_maker.subs)} word boundaries")
+
+    cues, elapsed = _time(subtitle.align_subtitles, sub_maker, text)
+    print(f"aligner: {elapsed * 1000:.1f} ms, cues: {len(cues)}, valid: {subtitle.validate_cues(cues)}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        _, srt_elapsed = _time(subtitle.write_subtitles, cues, os.path.join(temp_dir, "a.srt"))
+        _, vtt_elapsed = _time(subtitle.write_subtitles, cues, os.path.join(temp_dir, "a.vtt"))
+    print(f"write srt: {srt_elapsed * 1000:.1f} ms, write vtt: {vtt_elapsed * 1000:.1f} ms")
+
+    if not args.skip_legacy:
+        matched, legacy_elapsed = _time(legacy_align, sub_maker, text)
+        print(f"legacy: {legacy_elapsed * 1000:.1f} ms, matched lines: {matched}/{lines}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+WebUI 重跑耗时基准：用 streamlit 的 AppTest 在进程内反复执行 webui/Main.py，
+模拟切换区域的操作，报告每次重跑的耗时和 config.toml 的写入次数。
+
+script 为 Main.py 自身记录的执行耗时（session_state["last_rerun_ms"]），
+wall 另外包含 AppTest 收发消息的开销。
+
+用法：python benchmarks/bench_webui.py [--runs 50]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from app.config import config  # noqa: E402
+from app.config.settings import get_settings_store  # noqa: E402
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent))]
+
+
+def _selectbox(at: AppTest, key: str):
+    for widget in at.selectbox:
+        if widget.key == key:
+            return widget
+    return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    writes = 0
+    original_save = config.save_config
+
+    def counting_save():
+        nonlocal writes
+        mtime = os.stat(config.config_file).st_mtime_ns if os.path.exists(config.config_file) else 0
+        result = original_save()
+        if os.stat(config.config_file).st_mtime_ns != mtime:
+            writes += 1
+        return result
+
+    config.save_config = counting_save
+    try:
+        at = AppTest.from_file(os.path.join(ROOT, "webui", "Main.py"), default_timeout=60)
+        started = time.perf_counter()
+        at.run()
+        print(f"first run: {(time.perf_counter() - started) * 1000:.1f} ms")
+        writes = 0
+
+        plain, plain_script = [], []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            at.run()
+            plain.append((time.perf_counter() - started) * 1000)
+            plain_script.append(at.session_state["last_rerun_ms"])
+
+        # 在服务器和区域之间来回切换，每次切换都会触发一次重跑
+        interactive, interactive_script = [], []
+        for i in range(args.runs):
+            region = _selectbox(at, "voice_region_selector")
+            started = time.perf_counter()
+            if region is not None and len(region.options) > 1:
+                region.set_value(i % len(region.options)).run()
+            else:
+                at.run()
+            interactive.append((time.perf_counter() - started) * 1000)
+            interactive_script.append(at.session_state["last_rerun_ms"])
+
+        # 页面上的修改由 SettingsStore 延迟写入，结束前写出尚未保存的部分
+        get_settings_store().flush()
+    finally:
+        config.save_config = original_save
+
+    for name, wall, script in (
+        ("rerun", plain, plain_script),
+        ("region switch", interactive, interactive_script),
+    ):
+        print(
+            f"{name}: script p50 {_percentile(script, 0.5):.1f} ms, "
+            f"p95 {_percentile(script, 0.95):.1f} ms; "
+            f"wall p50 {_percentile(wall, 0.5):.1f} ms, mean {statistics.mean(wall):.1f} ms"
+        )
+    print(f"config.toml writes: {writes} in {len(plain) + len(interactive)} reruns")
+
+
+if __name__ == "__main__":
+    main()
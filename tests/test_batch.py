@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from app.batch import load_manifest
+
+
+def _write(tmp_path, *records) -> str:
+    path = tmp_path / "manifest.jsonl"
+    path.write_text(
+        "\n".join(json.dumps(record, ensure_ascii=False) for record in records),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_zero_volume_is_kept_and_missing_fields_use_defaults(tmp_path):
+    path = _write(
+        tmp_path,
+        {"text": "a", "volume": 0},
+        {"text": "b", "rate": None, "volume": ""},
+        {"text": "c", "voice_rate": "1.5"},
+    )
+    items = load_manifest(path, "zh-CN-XiaoxiaoNeural", voice_rate=1.2, voice_volume=0.8)
+    assert [(item.voice_rate, item.voice_volume) for item in items] == [
+        (1.2, 0.0),
+        (1.2, 0.8),
+        (1.5, 0.8),
+    ]
+
+
+def test_csv_empty_cells_use_defaults(tmp_path):
+    path = tmp_path / "manifest.csv"
+    path.write_text("text,rate,volume\nhello,,0\n", encoding="utf-8")
+    (item,) = load_manifest(str(path), "zh-CN-XiaoxiaoNeural")
+    assert (item.voice_rate, item.voice_volume) == (1.0, 0.0)
+
+
+@pytest.mark.parametrize(
+    "record", [{"rate": 0}, {"rate": 5}, {"volume": -1}, {"volume": "nan"}]
+)
+def test_out_of_range_values_are_rejected(tmp_path, record):
+    path = _write(tmp_path, {"text": "a", **record})
+    with pytest.raises(ValueError, match=r"manifest\.jsonl:1: "):
+        load_manifest(path, "zh-CN-XiaoxiaoNeural")
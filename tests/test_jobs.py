@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+from app.services.jobs import CANCELLED, FAILED, QUEUED, SUCCEEDED, JobManager
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return job
+
+
+def test_job_succeeds_and_reports_progress():
+    async def work(job):
+        for i in range(4):
+            job.set_progress(i + 1, 4)
+            await asyncio.sleep(0)
+        return "done"
+
+    job = _wait(JobManager().submit(work, title="ok", owner="a"))
+    assert job.status == SUCCEEDED
+    assert job.result == "done"
+    assert (job.done, job.total, job.progress) == (4, 4, 1.0)
+
+
+def test_job_failure_keeps_error():
+    async def work(job):
+        raise RuntimeError("boom")
+
+    job = _wait(JobManager().submit(work))
+    assert job.status == FAILED
+    assert job.error == "boom"
+
+
+def test_cancel_running_and_queued_jobs():
+    manager = JobManager(max_workers=1)
+    started = []
+
+    async def work(job):
+        started.append(job.id)
+        await asyncio.sleep(60)
+
+    running = manager.submit(work)
+    queued = manager.submit(work)
+    deadline = time.monotonic() + 5
+    while not started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert queued.status == QUEUED
+
+    assert manager.cancel(queued.id)
+    assert manager.cancel(running.id)
+    assert _wait(running).status == CANCELLED
+    assert _wait(queued).status == CANCELLED
+    assert started == [running.id]
+    assert not manager.cancel(running.id)
+
+
+def test_jobs_are_listed_per_owner_and_pruned():
+    async def work(job):
+        return None
+
+    manager = JobManager(max_jobs=2)
+    first = _wait(manager.submit(work, owner="a"))
+    _wait(manager.submit(work, owner="b"))
+    assert [job.owner for job in manager.jobs(owner="a")] == ["a"]
+
+    # 超过 max_jobs 时淘汰最早结束的任务
+    manager.submit(work, owner="a")
+    assert manager.get(first.id) is None
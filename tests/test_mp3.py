@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from app.utils import audio, mp3
+
+# MPEG1 Layer III，44.1kHz，单声道；比特率下标 9 = 128kbps，5 = 64kbps
+_BITRATE_128K = 9
+_BITRATE_64K = 5
+_SIDE_INFO = 17
+
+
+def _frame(bitrate_index=_BITRATE_128K, tag=b"", frames=0):
+    header = bytes((0xFF, 0xFB, bitrate_index << 4, 0xC0))
+    size = mp3.parse_frame_header(header, 0).frame_size
+    data = bytearray(header + bytes(size - 4))
+    if tag:
+        pos = 4 + _SIDE_INFO
+        data[pos : pos + 4] = tag
+        # 标志位 0x01：其后 4 字节为总帧数
+        data[pos + 4 : pos + 8] = (1).to_bytes(4, "big")
+        data[pos + 8 : pos + 12] = frames.to_bytes(4, "big")
+    return bytes(data)
+
+
+def _id3v2(payload_size=20):
+    size = payload_size.to_bytes(4, "big")  # 小于 128，synchsafe 与普通整数相同
+    return b"ID3\x04\x00\x00" + size + bytes(payload_size)
+
+
+def test_parse_frame_header():
+    header = mp3.parse_frame_header(_frame(), 0)
+    assert (header.bitrate, header.sample_rate, header.channels) == (128000, 44100, 1)
+    assert header.frame_size == 417
+    assert header.samples == 1152
+    assert mp3.parse_frame_header(b"\xff\xfb\xf0\xc0", 0) is None
+
+
+def test_parse_cbr_with_id3_and_trailing_tag():
+    data = _id3v2() + _frame() * 10 + b"TAG" + bytes(125)
+    info = mp3.parse_mp3(data)
+    assert info.frame_count == 10
+    assert info.audio_start == len(_id3v2())
+    assert info.contiguous
+    assert not info.is_vbr
+    # 没有填充位的帧略短于标称长度，平均比特率略低于 128k
+    assert info.bitrate == pytest.approx(128000, rel=0.01)
+    assert info.duration == pytest.approx(10 * 1152 / 44100)
+
+
+def test_info_tag_on_cbr_is_not_vbr():
+    # 信息帧的比特率与音频帧不同，也不应判断为 VBR
+    data = _frame(_BITRATE_64K, tag=b"Info", frames=8) + _frame() * 8
+    info = mp3.parse_mp3(data)
+    assert info.header_frames == 8
+    assert info.frame_count == 8
+    assert not info.is_vbr
+    assert not mp3.parse_mp3(data, collect_frames=False).is_vbr
+
+
+def test_xing_tag_and_mixed_bitrates_are_vbr():
+    frames = _frame() + _frame(_BITRATE_64K) + _frame()
+    assert mp3.parse_mp3(frames).is_vbr
+
+    data = _frame(tag=b"Xing", frames=3) + frames
+    fast = mp3.parse_mp3(data, collect_frames=False)
+    assert fast.is_vbr
+    assert fast.frame_count == 3
+    assert fast.frame_offsets == []
+
+
+def test_parse_resyncs_after_garbage():
+    data = _frame() * 3 + b"\x00\xff\x01garbage" + _frame() * 3
+    info = mp3.parse_mp3(data)
+    assert info.frame_count == 6
+    assert not info.contiguous
+
+
+def test_truncated_last_frame_is_ignored():
+    data = _frame() * 4 + _frame()[:100]
+    assert mp3.parse_mp3(data).frame_count == 4
+
+
+def test_concat_strips_tags_and_reports_join_offsets(tmp_path):
+    first = _id3v2() + _frame(tag=b"Info", frames=2) + _frame() * 2
+    second = tmp_path / "second.mp3"
+    second.write_bytes(_frame() * 3)
+
+    join = audio.concat_mp3([first, str(second)], gaps=0.0)
+    assert join.audio == _frame() * 5
+    assert join.join_samples == [0, 2 * 1152]
+    assert join.join_offsets[1] == join.samples_to_100ns(2 * 1152)
+    assert join.total_samples == 5 * 1152
+
+
+def test_concat_inserts_silence_and_writes_file(tmp_path):
+    output = tmp_path / "out.mp3"
+    join = audio.concat_mp3([_frame() * 2, _frame() * 2], output=str(output), gaps=0.1)
+    gap_frames = round(0.1 * 44100 / 1152)
+    assert join.join_samples == [0, (2 + gap_frames) * 1152]
+    assert mp3.parse_mp3(output.read_bytes()).frame_count == 4 + gap_frames
+
+
+def test_concat_rejects_mismatched_formats():
+    stereo = bytes((0xFF, 0xFB, _BITRATE_128K << 4, 0x00)) + bytes(413)
+    with pytest.raises(ValueError):
+        audio.concat_mp3([_frame() * 2, stereo * 2])
+
+
+def test_slice_aligns_to_frames():
+    data = _frame() * 10
+    sliced, start = audio.slice_mp3(data, 1152 * 2 / 44100, 1152 * 5 / 44100)
+    assert start == 2 * 1152
+    assert sliced == _frame() * 3
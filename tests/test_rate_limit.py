@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from app.services.rate_limit import AdaptiveConcurrency, RateLimiter, TokenBucket
+
+
+def test_token_bucket_allows_burst_then_waits():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket._reserve(1) == 0
+    assert bucket._reserve(1) == 0
+    assert bucket._reserve(1) == pytest.approx(0.1, abs=0.02)
+
+
+def test_token_bucket_allows_oversized_request():
+    bucket = TokenBucket(rate=100, capacity=10)
+    # 超过容量的申请透支令牌，后续申请等待补足
+    assert bucket._reserve(30) == pytest.approx(0.2, abs=0.02)
+    assert bucket._reserve(1) > 0.2
+
+
+def test_adaptive_concurrency_aimd():
+    concurrency = AdaptiveConcurrency(max_limit=8, min_limit=2)
+    concurrency.on_throttled()
+    assert concurrency.limit == 4
+    concurrency.on_throttled()
+    concurrency.on_throttled()
+    assert concurrency.limit == 2
+    for _ in range(10):
+        concurrency.on_success()
+    assert 2 < concurrency.limit <= 8
+
+
+def test_adaptive_concurrency_queues_and_wakes_waiters():
+    async def main():
+        concurrency = AdaptiveConcurrency(max_limit=1)
+        await concurrency.acquire()
+        waiter = asyncio.create_task(concurrency.acquire())
+        await asyncio.sleep(0.01)
+        assert not waiter.done()
+        concurrency.release()
+        await asyncio.wait_for(waiter, 1)
+        assert concurrency.in_flight == 1
+
+    asyncio.run(main())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def main():
+        concurrency = AdaptiveConcurrency(max_limit=1)
+        await concurrency.acquire()
+        waiter = asyncio.create_task(concurrency.acquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        concurrency.release()
+        assert concurrency.in_flight == 0
+        await asyncio.wait_for(concurrency.acquire(), 1)
+
+    asyncio.run(main())
+
+
+def test_rate_limiter_bounds_concurrency():
+    limiter = RateLimiter("test", max_concurrency=2, adaptive=False)
+    running = []
+    peak = []
+
+    async def work():
+        async with limiter.limit(chars=10):
+            running.append(1)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.pop()
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(main())
+    assert max(peak) == 2
+    assert limiter.concurrency.in_flight == 0
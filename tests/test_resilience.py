@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+import pytest
+
+from app.services.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryPolicy,
+    TTSServiceError,
+    call_with_retry,
+    get_circuit_breaker,
+    stream_with_retry,
+)
+from app.utils import utils
+
+
+def _half_open_breaker() -> CircuitBreaker:
+    breaker = get_circuit_breaker(f"test-{utils.get_uuid(remove_hyphen=True)}")
+    breaker.failure_threshold = 1
+    breaker.reset_timeout = 0.0
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    return breaker
+
+
+def test_breaker_opens_after_threshold():
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_breaker_allows_single_probe_when_half_open():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+
+
+def test_breaker_probe_result_closes_or_reopens():
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_call_with_retry_retries_then_succeeds():
+    calls = []
+
+    async def attempt(i):
+        calls.append(i)
+        if i < 2:
+            raise ConnectionError("reset")
+        return "ok"
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+    engine_id = f"test-{utils.get_uuid(remove_hyphen=True)}"
+    assert asyncio.run(call_with_retry(engine_id, attempt, policy)) == "ok"
+    assert calls == [0, 1, 2]
+
+
+def test_call_with_retry_does_not_retry_client_errors():
+    async def attempt(i):
+        raise ValueError("bad voice")
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+    engine_id = f"test-{utils.get_uuid(remove_hyphen=True)}"
+    with pytest.raises(TTSServiceError) as exc_info:
+        asyncio.run(call_with_retry(engine_id, attempt, policy))
+    assert exc_info.value.kind == "client"
+    assert get_circuit_breaker(engine_id).state == CircuitBreaker.CLOSED
+
+
+@pytest.mark.parametrize("error", [FileNotFoundError("missing"), PermissionError("denied")])
+def test_call_with_retry_fails_fast_on_local_io_errors(error):
+    calls = []
+
+    async def attempt(i):
+        calls.append(i)
+        raise error
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0)
+    engine_id = f"test-{utils.get_uuid(remove_hyphen=True)}"
+    breaker = get_circuit_breaker(engine_id)
+    breaker.failure_threshold = 1
+    with pytest.raises(TTSServiceError) as exc_info:
+        asyncio.run(call_with_retry(engine_id, attempt, policy))
+    assert exc_info.value.kind == "io"
+    assert not exc_info.value.retryable
+    assert calls == [0]
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    breaker = _half_open_breaker()
+    policy = RetryPolicy(max_attempts=1)
+
+    async def hang(i):
+        await asyncio.sleep(60)
+
+    async def ok(i):
+        return "ok"
+
+    async def main():
+        task = asyncio.create_task(call_with_retry(breaker.engine_id, hang, policy))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return await call_with_retry(breaker.engine_id, ok, policy)
+
+    assert asyncio.run(main()) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_abandoned_stream_probe_releases_half_open_slot():
+    breaker = _half_open_breaker()
+    policy = RetryPolicy(max_attempts=1)
+
+    async def open_stream(i):
+        for chunk in (b"a", b"b", b"c"):
+            yield chunk
+
+    async def main():
+        stream = stream_with_retry(breaker.engine_id, open_stream, policy)
+        assert await anext(stream) == b"a"
+        # 调用方只读了一段就关闭流
+        await stream.aclose()
+        stream = stream_with_retry(breaker.engine_id, open_stream, policy)
+        return [chunk async for chunk in stream]
+
+    assert asyncio.run(main()) == [b"a", b"b", b"c"]
+    assert breaker.state == CircuitBreaker.CLOSED
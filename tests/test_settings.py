@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+import toml
+
+from app.config import config
+from app.config.settings import SettingsStore
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "config.toml"
+    path.write_text(
+        toml.dumps({"azure": {"speech_key": "file-key", "speech_region": "eastus"}}),
+        encoding="utf-8",
+    )
+    original = config.config_file
+    config.config_file = str(path)
+    config.reload_config()
+    yield path
+    config.config_file = original
+    config.reload_config()
+
+
+def test_reload_keeps_only_pending_keys(config_file):
+    store = SettingsStore(debounce=60, reload_interval=0)
+    store.update(azure={"speech_key": "session-key"})
+
+    # 外部修改了另一个键，并且文件大小变化，保证能被检测到
+    config_file.write_text(
+        toml.dumps({"azure": {"speech_key": "file-key", "speech_region": "westeurope"}}),
+        encoding="utf-8",
+    )
+    assert store.reload_if_changed()
+    assert config.azure["speech_key"] == "session-key"
+    assert config.azure["speech_region"] == "westeurope"
+
+    assert store.flush()
+    saved = toml.loads(config_file.read_text(encoding="utf-8"))
+    assert saved["azure"] == {"speech_key": "session-key", "speech_region": "westeurope"}
+
+
+def test_reload_after_flush_takes_file_values(config_file):
+    store = SettingsStore(debounce=60, reload_interval=0)
+    store.update(azure={"speech_key": "session-key"})
+    store.flush()
+
+    config_file.write_text(
+        toml.dumps({"azure": {"speech_key": "edited-key", "speech_region": "eastus"}}),
+        encoding="utf-8",
+    )
+    assert store.reload_if_changed()
+    assert config.azure["speech_key"] == "edited-key"
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+import pytest
+
+from app.services.storage import RetentionPolicy, StorageManager, shard_path
+
+OWNER = "a" * 32
+MB = 1024 * 1024
+
+
+def _write(path, size, age):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _manager(tmp_path, **policy):
+    return StorageManager(
+        root=str(tmp_path),
+        policies={"output": RetentionPolicy(**policy), "temp": RetentionPolicy()},
+        sweep_interval=0,
+        min_age=10,
+    )
+
+
+def test_shard_path_keeps_audio_and_subtitle_together():
+    audio = shard_path("/s", "tts-1.mp3")
+    assert os.path.dirname(audio) == os.path.dirname(shard_path("/s", "tts-1.srt"))
+    assert os.path.basename(os.path.dirname(audio)) != "s"
+    assert f"~{OWNER}" in shard_path("/s", "tts-1.mp3", owner=OWNER)
+
+
+@pytest.mark.parametrize("name", ["", ".gitkeep", "../x.mp3", "a/b.mp3", "~x"])
+def test_shard_path_rejects_invalid_names(name):
+    with pytest.raises(ValueError):
+        shard_path("/s", name)
+
+
+def test_shard_path_rejects_invalid_owner():
+    with pytest.raises(ValueError):
+        shard_path("/s", "x.mp3", owner="../etc")
+
+
+def test_sweep_removes_expired_items(tmp_path):
+    manager = _manager(tmp_path, max_age=3600)
+    old = _write(manager.path_for("output", "old.mp3"), 100, 7200)
+    new = _write(manager.path_for("output", "new.mp3"), 100, 60)
+
+    report = manager.sweep_area("output")
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+    assert (report.removed, report.reclaimed_bytes, report.remaining_bytes) == (1, 100, 100)
+
+
+def test_sweep_keeps_dotfiles_and_recent_items(tmp_path):
+    manager = _manager(tmp_path, max_age=1, max_bytes=1)
+    gitkeep = _write(os.path.join(manager.area_dir("output"), ".gitkeep"), 0, 86400)
+    recent = _write(manager.path_for("output", "recent.mp3"), 100, 5)
+
+    report = manager.sweep_area("output")
+    assert os.path.exists(gitkeep)
+    assert os.path.exists(recent)
+    assert report.scanned == 1 and report.removed == 0
+
+
+def test_sweep_enforces_per_user_quota_oldest_first(tmp_path):
+    manager = _manager(tmp_path, per_user_bytes=2 * MB)
+    files = [
+        _write(manager.path_for("output", f"tts-{i}.mp3", owner=OWNER), MB, 100 - i)
+        for i in range(3)
+    ]
+    other = _write(manager.path_for("output", "tts-x.mp3", owner="b" * 32), MB, 500)
+
+    manager.sweep_area("output")
+    assert [os.path.exists(path) for path in files] == [False, True, True]
+    assert os.path.exists(other)
+
+
+def test_sweep_enforces_total_size_and_removes_directories(tmp_path):
+    manager = _manager(tmp_path, max_bytes=2 * MB)
+    book = manager.path_for("output", "book-1", owner=OWNER)
+    _write(os.path.join(book, "001.mp3"), MB, 300)
+    _write(os.path.join(book, "002.mp3"), MB, 200)
+    newest = _write(manager.path_for("output", "tts-1.mp3"), MB, 100)
+    legacy = _write(os.path.join(manager.area_dir("output"), "tts-legacy.mp3"), MB, 50)
+
+    report = manager.sweep_area("output")
+    # 目录作为一个条目整体删除，修改时间取其中最新的文件
+    assert not os.path.exists(book)
+    assert os.path.exists(newest) and os.path.exists(legacy)
+    assert report.reclaimed_bytes == 2 * MB
+    # 空的分片和会话目录一并删除
+    assert not os.path.exists(os.path.dirname(book))
+
+
+def test_sweep_reports_all_areas(tmp_path):
+    manager = _manager(tmp_path, max_age=3600)
+    _write(manager.path_for("output", "old.mp3"), 100, 7200)
+
+    reports = manager.sweep()
+    assert [report.area for report in reports] == ["output", "temp"]
+    assert manager.stats()["total_reclaimed_bytes"] == 100
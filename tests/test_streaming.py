@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import os
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.server import SynthesisServer
+from app.services import voice
+from app.services.azure_engines import AzureTTSV1Engine
+from app.services.resilience import TTSServiceError, get_circuit_breaker
+from app.services.tts_cache import TTSCache
+from app.services.tts_engine_base import TTSStreamEvent
+
+VOICE = "zh-CN-XiaoxiaoNeural-Female"
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TTSCache(cache_dir=str(tmp_path / "cache"))
+    monkeypatch.setattr(voice, "get_cache", lambda: cache)
+    yield cache
+    # 测试中的失败计入了 Azure V1 的熔断器，恢复为关闭状态
+    get_circuit_breaker(AzureTTSV1Engine.engine_id).record_success()
+
+
+@pytest.fixture
+def interrupted(monkeypatch):
+    async def _stream_once(self, text, voice_name, rate_str):
+        yield TTSStreamEvent(type="audio", data=b"partial")
+        yield TTSStreamEvent(type="WordBoundary", offset=0, duration=100, text="你好")
+        raise ConnectionResetError("connection reset by peer")
+
+    monkeypatch.setattr(AzureTTSV1Engine, "_stream_once", _stream_once)
+
+
+async def _collect(text):
+    return [event async for event in voice.astream(text, VOICE, 1.0)]
+
+
+def test_interrupted_stream_raises_and_is_not_cached(cache, interrupted):
+    with pytest.raises(TTSServiceError):
+        asyncio.run(_collect("流式中断"))
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_failure_before_first_event_ends_empty(cache, monkeypatch):
+    async def _stream_once(self, text, voice_name, rate_str):
+        raise ValueError("invalid voice")
+        yield
+
+    monkeypatch.setattr(AzureTTSV1Engine, "_stream_once", _stream_once)
+    assert asyncio.run(_collect("开始前失败")) == []
+
+
+def test_complete_stream_is_cached(cache, monkeypatch):
+    async def _stream_once(self, text, voice_name, rate_str):
+        yield TTSStreamEvent(type="audio", data=b"complete")
+        yield TTSStreamEvent(type="WordBoundary", offset=0, duration=100, text="你好")
+
+    monkeypatch.setattr(AzureTTSV1Engine, "_stream_once", _stream_once)
+    events = asyncio.run(_collect("完整的流"))
+    assert [event.type for event in events] == ["audio", "WordBoundary"]
+    assert cache.stats()["disk_entries"] == 1
+
+
+def test_server_aborts_interrupted_stream(tmp_path, cache, interrupted):
+    server = SynthesisServer(output_dir=str(tmp_path / "output"))
+
+    async def main():
+        async with TestClient(TestServer(server.create_app())) as client:
+            response = await client.post(
+                "/v1/tts", json={"text": "流式中断", "voice_name": VOICE, "stream": True}
+            )
+            assert response.status == 200
+            with pytest.raises(aiohttp.ClientPayloadError):
+                await response.read()
+            return response.headers["X-TTS-Id"]
+
+    result_id = asyncio.run(main())
+    audio_file, subtitle_file = server._paths(result_id)
+    assert not os.path.exists(audio_file)
+    assert not os.path.exists(subtitle_file)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+import pytest
+
+from app.services.azure_synthesizer_pool import PooledSynthesizer, SynthesizerPool
+from app.services.credentials import Credential
+
+
+class _Signal:
+    def connect(self, handler) -> None:
+        pass
+
+
+class _Fake:
+    def __init__(self) -> None:
+        self.closed_in = None
+
+    def __getattr__(self, name):
+        return _Signal()
+
+    def stop_speaking_async(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed_in = threading.current_thread()
+
+
+class _Pool(SynthesizerPool):
+    def __init__(self, **kwargs) -> None:
+        super().__init__(**kwargs)
+        self.created_in = []
+
+    def _create(self, credential, voice_name, output_format) -> PooledSynthesizer:
+        self.created_in.append(threading.current_thread())
+        return PooledSynthesizer(
+            self._make_key(credential, voice_name, output_format), _Fake(), _Fake()
+        )
+
+
+CREDENTIAL = Credential(key="secret", region="eastus")
+
+
+def test_ause_creates_and_closes_off_the_event_loop():
+    pool = _Pool(max_idle=0)
+
+    async def main():
+        async with pool.ause(CREDENTIAL, "voice", "fmt") as item:
+            assert item.uses == 0
+        return threading.current_thread(), item
+
+    loop_thread, item = asyncio.run(main())
+    assert pool.created_in and pool.created_in[0] is not loop_thread
+    # max_idle 为 0，归还时直接关闭
+    assert item.connection.closed_in is not None
+    assert item.connection.closed_in is not loop_thread
+
+
+def test_ause_reuses_and_drops_on_error():
+    pool = _Pool()
+
+    async def main():
+        async with pool.ause(CREDENTIAL, "voice", "fmt"):
+            pass
+        with pytest.raises(RuntimeError):
+            async with pool.ause(CREDENTIAL, "voice", "fmt"):
+                raise RuntimeError("boom")
+
+    asyncio.run(main())
+    stats = pool.stats()
+    assert len(pool.created_in) == 1
+    assert stats["reused"] == 1
+    assert stats["idle"] == 0
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+from app.utils import utils
+
+
+def test_split_by_punctuation_keeps_decimals():
+    text = "价格是3.5元。你好，世界！Hello. World"
+    assert utils.split_string_by_punctuations(text) == [
+        "价格是3.5元",
+        "你好",
+        "世界",
+        "Hello",
+        "World",
+    ]
+
+
+def test_split_text_into_chunks_respects_limit_and_sentence_boundaries():
+    sentence = "这是一个测试句子。"
+    text = sentence * 20
+    chunks = utils.split_text_into_chunks(text, 40)
+    assert all(len(chunk) <= 40 for chunk in chunks)
+    assert all(chunk.endswith("。") for chunk in chunks)
+    assert "".join(chunks) == text
+
+
+def test_split_text_into_chunks_hard_splits_long_sentences():
+    text = "长" * 95 + "。短句。"
+    chunks = utils.split_text_into_chunks(text, 40)
+    # 硬切剩下的部分与后面的短句合并为一个片段
+    assert [len(chunk) for chunk in chunks] == [40, 40, 19]
+    assert "".join(chunks) == text
+
+
+def test_split_text_into_chunks_drops_blank_chunks():
+    assert utils.split_text_into_chunks("   ", 10) == []
+    assert utils.split_text_into_chunks("短文本", 10) == ["短文本"]
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+from app.services.tts_cache import CacheEntry, TTSCache, make_cache_key
+
+
+def _entry(size=100):
+    return CacheEntry(audio=b"x" * size, subs=["你好"], offset=[(0, 5000000)])
+
+
+def _cache(tmp_path, **kwargs):
+    return TTSCache(cache_dir=str(tmp_path), **kwargs)
+
+
+def test_make_cache_key_depends_on_every_field():
+    base = make_cache_key("edge", "voice", "text", 1.0, 1.0)
+    assert base == make_cache_key("edge", "voice", "text", 1.0, 1.0)
+    assert base != make_cache_key("edge", "voice", "text", 1.2, 1.0)
+    assert base != make_cache_key("edge", "voice", "text", 1.0, 1.0, "wav")
+    assert base != make_cache_key("azure", "voice", "text", 1.0, 1.0)
+
+
+def test_get_falls_back_to_disk(tmp_path):
+    key = make_cache_key("edge", "voice", "text", 1.0, 1.0)
+    _cache(tmp_path).put(key, _entry())
+
+    # 新实例没有内存缓存，只能从磁盘读取
+    cache = _cache(tmp_path)
+    entry = cache.get(key)
+    assert entry.audio == b"x" * 100
+    assert entry.to_sub_maker().subs == ["你好"]
+    assert cache.stats()["disk_hits"] == 1
+    assert cache.get(key) is entry
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_get_miss(tmp_path):
+    cache = _cache(tmp_path)
+    assert cache.get("0" * 64) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_eviction_drops_oldest_to_low_water_mark(tmp_path):
+    cache = _cache(tmp_path, max_entries=10)
+    keys = [f"{i:02d}" + "0" * 62 for i in range(11)]
+    for key in keys:
+        cache.put(key, _entry())
+
+    stats = cache.stats()
+    assert stats["disk_entries"] == 9
+    assert stats["evictions"] == 2
+    assert stats["disk_bytes"] == 900
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[-1]) is not None
+
+
+def test_put_does_not_rescan_disk_on_every_write(tmp_path, monkeypatch):
+    cache = _cache(tmp_path, max_entries=10)
+    scans = []
+    original = cache._scan_disk
+    monkeypatch.setattr(cache, "_scan_disk", lambda: scans.append(1) or original())
+
+    for i in range(30):
+        cache.put(f"{i:02d}" + "0" * 62, _entry())
+    # 第一次写入时扫描一次，之后的淘汰都使用内存中的索引
+    assert len(scans) == 1
+    assert cache.stats()["disk_entries"] <= 10
+
+
+def test_clear(tmp_path):
+    cache = _cache(tmp_path)
+    key = make_cache_key("edge", "voice", "text", 1.0, 1.0)
+    cache.put(key, _entry())
+    cache.clear()
+    assert cache.get(key) is None
+    assert cache.stats()["disk_bytes"] == 0
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import asyncio
 import os
+import shutil
 import sys
+import time
 from uuid import uuid4
 
 import streamlit as st
@@ -12,8 +15,15 @@ if root_dir not in sys.path:
     sys.path.append(root_dir)
 
 from app.config import config
-from app.services import voice
-from app.utils import utils
+from app.config.settings import get_settings_store
+from app import audiobook
+from app.services import jobs, voice
+from app.services.resilience import TTSServiceError
+from app.services.storage import get_storage_manager
+from app.utils import mp3
+from webui import resources
+
+_rerun_started = time.perf_counter()
 
 st.set_page_config(
     page_title="TTS-LSJ-Tools",
@@ -52,13 +62,19 @@ h1 {
 """
 st.markdown(streamlit_style, unsafe_allow_html=True)
 
-i18n_dir = os.path.join(root_dir, "webui", "i18n")
-system_locale = utils.get_system_locale()
+resources.init_engines()
 
-if "ui_language" not in st.session_state:
-    st.session_state["ui_language"] = config.ui.get("language", system_locale)
+# 每个会话持有自己的设置快照，页面上的修改只作用于本会话，点击保存后才经由 SettingsStore 写回 config.toml
+settings_store = get_settings_store()
+if "settings" not in st.session_state:
+    st.session_state["settings"] = settings_store.snapshot()
+session_settings = st.session_state["settings"]
+ui_changes, azure_changes, siliconflow_changes = {}, {}, {}
 
-locales = utils.load_locales(i18n_dir)
+if "ui_language" not in st.session_state:
+    st.session_state["ui_language"] = session_settings.ui.get(
+        "language", resources.get_system_locale()
+    )
 
 # 创建顶部栏
 title_col, lang_col = st.columns([3, 1])
@@ -67,29 +83,25 @@ with title_col:
     st.title(f"🎙️ TTS-LSJ-Tools v{config.project_version}")
 
 with lang_col:
-    display_languages = []
-    selected_index = 0
-    for i, code in enumerate(locales.keys()):
-        display_languages.append(f"{code} - {locales[code].get('Language')}")
-        if code == st.session_state.get("ui_language", ""):
-            selected_index = i
-
+    language_codes, display_languages = resources.get_language_options()
+    current_language = st.session_state.get("ui_language", "")
     selected_language = st.selectbox(
         "Language / 语言",
         options=display_languages,
-        index=selected_index,
+        index=language_codes.index(current_language) if current_language in language_codes else 0,
         key="top_language_selector",
         label_visibility="collapsed",
     )
     if selected_language:
-        code = selected_language.split(" - ")[0].strip()
+        code = language_codes[display_languages.index(selected_language)]
         st.session_state["ui_language"] = code
-        config.ui["language"] = code
+        ui_changes["language"] = code
+
+translations = resources.get_translations(st.session_state["ui_language"])
 
 
 def tr(key):
-    loc = locales.get(st.session_state["ui_language"], {})
-    return loc.get("Translation", {}).get(key, key)
+    return translations.get(key, key)
 
 
 # 主界面
@@ -102,7 +114,7 @@ tts_servers = [
     ("siliconflow", tr("SiliconFlow")),
 ]
 
-saved_tts_server = config.ui.get("tts_server", "azure-tts-v1")
+saved_tts_server = session_settings.ui.get("tts_server", "azure-tts-v1")
 saved_tts_server_index = 0
 for i, (server_id, _) in enumerate(tts_servers):
     if server_id == saved_tts_server:
@@ -117,109 +129,77 @@ selected_tts_server_index = st.selectbox(
 )
 
 selected_tts_server = tts_servers[selected_tts_server_index][0]
-config.ui["tts_server"] = selected_tts_server
+ui_changes["tts_server"] = selected_tts_server
 
 # 根据选择的TTS服务器获取声音列表
 voice_name = ""
+ui_language = st.session_state["ui_language"]
+catalog_version = voice.get_voice_catalog().updated_at
+
+
+def select_voice(server: str, region: str, key=None) -> str:
+    voice_ids, voice_labels, voice_index = resources.get_voice_options(
+        server, region, ui_language, catalog_version
+    )
+    if not voice_ids:
+        st.warning(tr("No voices available for the selected TTS server. Please select another server."))
+        return ""
+
+    selected_index = st.selectbox(
+        tr("Speech Synthesis"),
+        options=range(len(voice_ids)),
+        format_func=lambda x: voice_labels[x],
+        index=voice_index.get(session_settings.ui.get("voice_name", ""), 0),
+        key=key,
+    )
+    ui_changes["voice_name"] = voice_ids[selected_index]
+    return voice_ids[selected_index]
+
 
 if selected_tts_server == "siliconflow":
     # 硅基流动不需要区域选择
-    filtered_voices = voice.get_siliconflow_voices()
-    friendly_names = {
-        v: v.replace("Female", tr("Female"))
-        .replace("Male", tr("Male"))
-        .replace("Neural", "")
-        for v in filtered_voices
-    }
-
-    saved_voice_name = config.ui.get("voice_name", "")
-    saved_voice_name_index = 0
-    if saved_voice_name in friendly_names:
-        saved_voice_name_index = list(friendly_names.keys()).index(saved_voice_name)
-
-    if friendly_names:
-        selected_friendly_name = st.selectbox(
-            tr("Speech Synthesis"),
-            options=list(friendly_names.values()),
-            index=min(saved_voice_name_index, len(friendly_names) - 1),
-        )
-        voice_name = list(friendly_names.keys())[
-            list(friendly_names.values()).index(selected_friendly_name)
-        ]
-        config.ui["voice_name"] = voice_name
-    else:
-        st.warning(tr("No voices available for the selected TTS server. Please select another server."))
+    voice_name = select_voice(selected_tts_server, "")
 else:
     # Azure TTS - 使用区域级联选择器
-    is_v2 = selected_tts_server == "azure-tts-v2"
-    available_regions = voice.get_all_regions(v2_only=is_v2)
-
-    # 区域名称映射
-    def get_region_display_name(region_code: str) -> str:
-        return tr(f"region_{region_code}")
-
-    # 获取保存的区域，如果没有则尝试匹配用户语言
-    saved_region = config.ui.get("voice_region", "")
-    saved_region_index = 0
+    available_regions, region_labels, region_index = resources.get_region_options(
+        selected_tts_server, ui_language, catalog_version
+    )
 
-    if saved_region in available_regions:
-        saved_region_index = available_regions.index(saved_region)
-    else:
-        # 根据用户语言自动选择区域
-        ui_lang = st.session_state.get("ui_language", "en")
-        for i, region in enumerate(available_regions):
-            if region.lower().startswith(ui_lang.lower()):
-                saved_region_index = i
-                break
+    # 获取保存的区域，如果没有则根据用户语言自动选择区域
+    saved_region_index = region_index.get(session_settings.ui.get("voice_region", ""))
+    if saved_region_index is None:
+        saved_region_index = next(
+            (
+                i
+                for i, region in enumerate(available_regions)
+                if region.lower().startswith(ui_language.lower())
+            ),
+            0,
+        )
 
     # 区域选择下拉框
     region_col, voice_col = st.columns([1, 2])
 
     with region_col:
-        region_display_names = [get_region_display_name(r) for r in available_regions]
-        selected_region_display = st.selectbox(
+        selected_region_index = st.selectbox(
             tr("Voice Region"),
-            options=region_display_names,
-            index=min(saved_region_index, len(available_regions) - 1) if available_regions else 0,
+            options=range(len(available_regions)),
+            format_func=lambda x: region_labels[x],
+            index=saved_region_index if available_regions else None,
             key="voice_region_selector",
         )
-        if available_regions:
-            selected_region = available_regions[region_display_names.index(selected_region_display)]
-            config.ui["voice_region"] = selected_region
+        if available_regions and selected_region_index is not None:
+            selected_region = available_regions[selected_region_index]
+            ui_changes["voice_region"] = selected_region
         else:
             selected_region = ""
 
     with voice_col:
         # 根据选择的区域获取声音列表
         if selected_region:
-            filtered_voices = voice.get_azure_voices_by_region(selected_region, v2_only=is_v2)
-        else:
-            filtered_voices = []
-
-        friendly_names = {
-            v: v.replace("Female", tr("Female"))
-            .replace("Male", tr("Male"))
-            .replace("Neural", "")
-            .replace("-V2", " V2")
-            for v in filtered_voices
-        }
-
-        saved_voice_name = config.ui.get("voice_name", "")
-        saved_voice_name_index = 0
-        if saved_voice_name in friendly_names:
-            saved_voice_name_index = list(friendly_names.keys()).index(saved_voice_name)
-
-        if friendly_names:
-            selected_friendly_name = st.selectbox(
-                tr("Speech Synthesis"),
-                options=list(friendly_names.values()),
-                index=min(saved_voice_name_index, len(friendly_names) - 1),
-                key="voice_name_selector",
+            voice_name = select_voice(
+                selected_tts_server, selected_region, key="voice_name_selector"
             )
-            voice_name = list(friendly_names.keys())[
-                list(friendly_names.values()).index(selected_friendly_name)
-            ]
-            config.ui["voice_name"] = voice_name
         else:
             st.warning(tr("No voices available for the selected TTS server. Please select another server."))
 
@@ -227,8 +207,8 @@ else:
 if selected_tts_server == "azure-tts-v2" or (
     voice_name and voice.is_azure_v2_voice(voice_name)
 ):
-    saved_azure_speech_region = config.azure.get("speech_region", "")
-    saved_azure_speech_key = config.azure.get("speech_key", "")
+    saved_azure_speech_region = session_settings.azure.get("speech_region", "")
+    saved_azure_speech_key = session_settings.azure.get("speech_key", "")
     azure_speech_region = st.text_input(
         tr("Speech Region"),
         value=saved_azure_speech_region,
@@ -240,14 +220,14 @@ if selected_tts_server == "azure-tts-v2" or (
         type="password",
         key="azure_speech_key_input",
     )
-    config.azure["speech_region"] = azure_speech_region
-    config.azure["speech_key"] = azure_speech_key
+    azure_changes["speech_region"] = azure_speech_region
+    azure_changes["speech_key"] = azure_speech_key
 
 # 当选择硅基流动时，显示API key输入框
 if selected_tts_server == "siliconflow" or (
     voice_name and voice.is_siliconflow_voice(voice_name)
 ):
-    saved_siliconflow_api_key = config.siliconflow.get("api_key", "")
+    saved_siliconflow_api_key = session_settings.siliconflow.get("api_key", "")
 
     siliconflow_api_key = st.text_input(
         tr("SiliconFlow API Key"),
@@ -266,7 +246,7 @@ if selected_tts_server == "siliconflow" or (
         + tr("Volume: Uses Speech Volume setting, default 1.0 maps to gain 0")
     )
 
-    config.siliconflow["api_key"] = siliconflow_api_key
+    siliconflow_changes["api_key"] = siliconflow_api_key
 
 # 音量和速度放在同一行
 vol_col, rate_col = st.columns(2)
@@ -291,6 +271,25 @@ text_to_convert = st.text_area(
     placeholder=tr("Enter the text you want to convert to speech"),
 )
 
+streaming_playback = st.checkbox(
+    tr("Streaming Playback"),
+    value=session_settings.ui.get("streaming_playback", False),
+    help=tr("Streaming Playback Help"),
+)
+ui_changes["streaming_playback"] = streaming_playback
+
+# 设置有变化时只替换本会话的快照，不影响其他会话
+settings = session_settings.update(
+    ui=ui_changes, azure=azure_changes, siliconflow=siliconflow_changes
+)
+if settings is not session_settings:
+    st.session_state["settings"] = settings
+
+# 保存时把本会话与全局配置不同的部分交给 SettingsStore 延迟写入 config.toml，作为新会话的默认值
+if st.button(tr("Save Settings"), help=tr("Save Settings Help")):
+    settings_store.update(**settings.diff(settings_store.snapshot()))
+    st.toast(tr("Settings Saved"))
+
 # 生成按钮
 col1, col2 = st.columns([1, 4])
 with col1:
@@ -301,26 +300,189 @@ with col2:
     else:
         play_button = False
 
+# 流式播放时首段的最小长度：首段尽量小以缩短开始播放的等待时间
+STREAM_FIRST_SEGMENT_BYTES = 24 * 1024
+
+
+def _complete_frames(segment):
+    """
+    返回 segment 中完整 MP3 帧的结束位置和这些帧的时长（秒），剩余的不完整帧留到下一段。
+    """
+
+    # 逐帧遍历：Xing 信息帧中的总帧数描述的是整段音频，不能用来判断这一段在哪里结束
+    info = mp3.parse_mp3(bytes(segment))
+    return info.audio_end, info.duration
+
+
+def stream_speech(text, voice_name, voice_rate, voice_volume, audio_file, settings):
+    """
+    流式合成：音频按 MP3 帧边界切分为若干段，首段到达即开始播放，
+    之后每段在上一段即将播完时追加并自动播放，使播放连续；
+    同时把完整音频写入 audio_file 并返回 SubMaker。合成中途失败时删除 audio_file 并返回 None。
+    """
+
+    sub_maker = voice.new_sub_maker()
+    segment = bytearray()
+    segment_index = 0
+    # 已追加的各段预计播完的时间
+    play_until = 0.0
+    container = st.container()
+
+    def flush(final=False):
+        nonlocal segment, segment_index, play_until
+        end, duration = _complete_frames(segment)
+        if final:
+            end = len(segment)
+        if not end:
+            return
+        if segment_index:
+            # 等上一段播完再追加，避免两段同时播放
+            time.sleep(max(0.0, play_until - time.monotonic()))
+        with container:
+            st.audio(bytes(segment[:end]), format="audio/mp3", autoplay=True)
+        play_until = max(play_until, time.monotonic()) + duration
+        segment = segment[end:]
+        segment_index += 1
+
+    try:
+        with open(audio_file, "wb") as f:
+            for event in voice.stream(
+                text=text,
+                voice_name=voice_name,
+                voice_rate=voice_rate,
+                voice_volume=voice_volume,
+                settings=settings,
+            ):
+                if event.type == "audio":
+                    f.write(event.data)
+                    segment.extend(event.data)
+                    if segment_index == 0:
+                        ready = len(segment) >= STREAM_FIRST_SEGMENT_BYTES
+                    else:
+                        ready = time.monotonic() >= play_until
+                    if ready:
+                        flush()
+                elif event.type == "WordBoundary":
+                    sub_maker.create_sub((event.offset, event.duration), event.text)
+    except TTSServiceError as exc:
+        logger.error(f"streaming playback interrupted, error: {str(exc)}")
+        if os.path.exists(audio_file):
+            os.remove(audio_file)
+        return None
+    flush(final=True)
+
+    if segment_index == 0:
+        return None
+    return sub_maker
+
+
+# 后台任务按会话归属。标识由服务端生成，只保存在本会话的 session_state 中，
+# 不从地址栏等客户端输入读取，否则拿到链接的人就能看到别人的任务和音频
+job_manager = jobs.get_job_manager()
+if "job_owner" not in st.session_state:
+    st.session_state["job_owner"] = uuid4().hex
+    st.session_state["job_ids"] = []
+
+# 生成的文件按会话分目录存放，后台线程按 config.toml 的 [storage] 策略定期清理
+storage = get_storage_manager()
+storage.start()
+
 # 处理试听按钮
 if play_button and voice_name:
     play_content = text_to_convert if text_to_convert else tr("Voice Example")
     with st.spinner(tr("Synthesizing Voice")):
-        temp_dir = utils.storage_dir("temp", create=True)
-        audio_file = os.path.join(temp_dir, f"tmp-voice-{str(uuid4())}.mp3")
-        sub_maker = voice.tts(
-            text=play_content,
+        audio_file = storage.path_for(
+            "temp", f"tmp-voice-{uuid4().hex}.mp3", owner=st.session_state["job_owner"]
+        )
+        try:
+            sub_maker = voice.tts(
+                text=play_content,
+                voice_name=voice_name,
+                voice_rate=voice_rate,
+                voice_file=audio_file,
+                voice_volume=voice_volume,
+                settings=settings,
+            )
+
+            if sub_maker and os.path.exists(audio_file):
+                st.audio(audio_file, format="audio/mp3")
+            else:
+                st.error(tr("Speech synthesis failed"))
+        finally:
+            # 合成失败时引擎也可能留下不完整的文件
+            if os.path.exists(audio_file):
+                os.remove(audio_file)
+
+
+def show_result(audio_file, subtitle_file, audio_duration, key=""):
+    st.audio(audio_file, format="audio/mp3")
+    st.markdown(f"**{tr('Audio Duration')}**: {audio_duration:.2f} {tr('seconds')}")
+
+    # 提供下载按钮
+    col1, col2 = st.columns(2)
+    with col1:
+        with open(audio_file, "rb") as f:
+            st.download_button(
+                label=tr("Download Audio"),
+                data=f,
+                file_name=os.path.basename(audio_file),
+                mime="audio/mp3",
+                key=f"download_audio_{key}",
+            )
+
+    with col2:
+        if os.path.exists(subtitle_file):
+            with open(subtitle_file, "rb") as f:
+                st.download_button(
+                    label=tr("Download Subtitle"),
+                    data=f,
+                    file_name=os.path.basename(subtitle_file),
+                    mime="text/plain",
+                    key=f"download_subtitle_{key}",
+                )
+
+
+def submit_generation(text, voice_name, voice_rate, voice_volume, settings):
+    """
+    把合成和字幕生成作为后台任务提交，立即返回任务，页面不会被阻塞。
+    """
+
+    audio_file = storage.path_for(
+        "output", f"tts-{uuid4().hex}.mp3", owner=st.session_state["job_owner"]
+    )
+    subtitle_file = audio_file.replace(".mp3", ".srt")
+
+    async def _generate(job):
+        sub_maker = await voice.atts(
+            text=text,
             voice_name=voice_name,
             voice_rate=voice_rate,
             voice_file=audio_file,
             voice_volume=voice_volume,
+            settings=settings,
+            progress=job.set_progress,
         )
+        if not sub_maker or not os.path.exists(audio_file):
+            raise RuntimeError("speech synthesis failed")
+
+        def _finish():
+            voice.create_subtitle(sub_maker=sub_maker, text=text, subtitle_file=subtitle_file)
+            return voice.get_audio_duration(sub_maker, audio_file)
+
+        audio_duration = await asyncio.to_thread(_finish)
+        return {
+            "audio_file": audio_file,
+            "subtitle_file": subtitle_file,
+            "audio_duration": audio_duration,
+        }
+
+    title = text.strip().replace("\n", " ")
+    return job_manager.submit(
+        _generate,
+        title=title[:40] + ("…" if len(title) > 40 else ""),
+        owner=st.session_state["job_owner"],
+    )
 
-        if sub_maker and os.path.exists(audio_file):
-            st.audio(audio_file, format="audio/mp3")
-            if os.path.exists(audio_file):
-                os.remove(audio_file)
-        else:
-            st.error(tr("Speech synthesis failed"))
 
 # 处理生成按钮
 if generate_button:
@@ -331,60 +493,154 @@ if generate_button:
     else:
         # 检查必要的配置
         if selected_tts_server == "azure-tts-v2" or voice.is_azure_v2_voice(voice_name):
-            if not config.azure.get("speech_key") or not config.azure.get("speech_region"):
+            if not settings.azure.get("speech_key") or not settings.azure.get("speech_region"):
                 st.error(tr("Azure Speech Key and Region are required for Azure TTS V2"))
                 st.stop()
-        
+
         if selected_tts_server == "siliconflow" or voice.is_siliconflow_voice(voice_name):
-            if not config.siliconflow.get("api_key"):
+            if not settings.siliconflow.get("api_key"):
                 st.error(tr("SiliconFlow API Key is required"))
                 st.stop()
-        
-        with st.spinner(tr("Synthesizing Voice")):
-            output_dir = utils.storage_dir("output", create=True)
-            audio_file = os.path.join(output_dir, f"tts-{str(uuid4())}.mp3")
-            subtitle_file = audio_file.replace(".mp3", ".srt")
-            
-            sub_maker = voice.tts(
-                text=text_to_convert,
-                voice_name=voice_name,
-                voice_rate=voice_rate,
-                voice_file=audio_file,
-                voice_volume=voice_volume,
+
+        if streaming_playback:
+            # 流式播放需要在页面上逐段追加播放器，仍在当前会话中执行
+            with st.spinner(tr("Synthesizing Voice")):
+                audio_file = storage.path_for(
+                    "output", f"tts-{uuid4().hex}.mp3", owner=st.session_state["job_owner"]
+                )
+                subtitle_file = audio_file.replace(".mp3", ".srt")
+                sub_maker = stream_speech(
+                    text=text_to_convert,
+                    voice_name=voice_name,
+                    voice_rate=voice_rate,
+                    voice_volume=voice_volume,
+                    audio_file=audio_file,
+                    settings=settings,
+                )
+
+                if sub_maker and os.path.exists(audio_file):
+                    # 生成字幕
+                    voice.create_subtitle(sub_maker=sub_maker, text=text_to_convert, subtitle_file=subtitle_file)
+                    audio_duration = voice.get_audio_duration(sub_maker, audio_file)
+
+                    st.success(tr("Speech synthesis completed"))
+                    st.markdown(f"**{tr('Full Audio')}**")
+                    show_result(audio_file, subtitle_file, audio_duration, key="stream")
+                else:
+                    st.error(tr("Speech synthesis failed"))
+        else:
+            job = submit_generation(
+                text_to_convert, voice_name, voice_rate, voice_volume, settings
             )
-            
-            if sub_maker and os.path.exists(audio_file):
-                # 生成字幕
-                voice.create_subtitle(sub_maker=sub_maker, text=text_to_convert, subtitle_file=subtitle_file)
-                audio_duration = voice.get_audio_duration(sub_maker)
-                
-                st.success(tr("Speech synthesis completed"))
-                st.audio(audio_file, format="audio/mp3")
-                
-                st.markdown(f"**{tr('Audio Duration')}**: {audio_duration:.2f} {tr('seconds')}")
-                
-                # 提供下载按钮
-                col1, col2 = st.columns(2)
-                with col1:
-                    with open(audio_file, "rb") as f:
-                        st.download_button(
-                            label=tr("Download Audio"),
-                            data=f,
-                            file_name=os.path.basename(audio_file),
-                            mime="audio/mp3",
-                        )
-                
-                with col2:
-                    if os.path.exists(subtitle_file):
-                        with open(subtitle_file, "rb") as f:
-                            st.download_button(
-                                label=tr("Download Subtitle"),
-                                data=f,
-                                file_name=os.path.basename(subtitle_file),
-                                mime="text/plain",
-                            )
-            else:
+            st.session_state["job_ids"].append(job.id)
+            st.toast(tr("Job Queued"))
+
+
+def submit_audiobook(uploaded_file, voice_name, voice_rate, voice_volume, settings):
+    """
+    把上传的文本保存到临时目录，按章节渲染为有声书的任务提交到后台。
+    """
+
+    owner = st.session_state["job_owner"]
+    source = storage.path_for("temp", f"book-{uuid4().hex}.txt", owner=owner)
+    with open(source, "wb") as f:
+        shutil.copyfileobj(uploaded_file, f, 1024 * 1024)
+    # 输出目录按文本内容命名，中断后重新上传同一本书会从未完成的章节继续
+    book_id = audiobook.file_digest(source)[:16]
+    output_dir = storage.path_for("output", f"book-{book_id}", owner=owner)
+
+    async def _render(job):
+        renderer = audiobook.AudiobookRenderer(
+            source,
+            output_dir,
+            voice_name,
+            voice_rate=voice_rate,
+            voice_volume=voice_volume,
+            settings=settings,
+            progress=job.set_progress,
+        )
+        try:
+            chapters = await renderer.arender()
+        finally:
+            os.remove(source)
+        return {
+            "output_dir": output_dir,
+            "chapters": len(chapters),
+            "audio_duration": sum(chapter.duration for chapter in chapters),
+        }
+
+    return job_manager.submit(
+        _render, title=f"📖 {uploaded_file.name}", owner=owner
+    )
+
+
+# 有声书模式：整本书按章节在后台渲染，不经过文本框
+with st.expander(tr("Audiobook Mode")):
+    book_file = st.file_uploader(
+        tr("Audiobook File"), type=["txt"], help=tr("Audiobook Mode Help")
+    )
+    if st.button(tr("Generate Audiobook"), disabled=book_file is None or not voice_name):
+        job = submit_audiobook(book_file, voice_name, voice_rate, voice_volume, settings)
+        st.session_state["job_ids"].append(job.id)
+        st.toast(tr("Job Queued"))
+
+
+def render_jobs():
+    session_jobs = [job_manager.get(job_id) for job_id in st.session_state["job_ids"]]
+    session_jobs = [job for job in session_jobs if job is not None]
+    st.session_state["job_ids"] = [job.id for job in session_jobs]
+    if not session_jobs:
+        return
+
+    st.markdown(f"### {tr('Generation Jobs')}")
+    # 最新提交的任务显示在最前面
+    for job in reversed(session_jobs):
+        with st.container(border=True):
+            title_col, action_col = st.columns([4, 1])
+            with title_col:
+                st.markdown(f"**{job.title}** · {tr(f'Job Status {job.status}')}")
+            with action_col:
+                if not job.finished:
+                    if st.button(tr("Cancel"), key=f"cancel_{job.id}", use_container_width=True):
+                        job_manager.cancel(job.id)
+                        st.rerun()
+                elif st.button(tr("Dismiss"), key=f"dismiss_{job.id}", use_container_width=True):
+                    job_manager.remove(job.id)
+                    st.rerun()
+
+            if not job.finished:
+                progress_text = f"{job.done}/{job.total} {tr('Sentences')}" if job.total else ""
+                st.progress(job.progress, text=progress_text)
+            elif job.status == jobs.SUCCEEDED and "chapters" in job.result:
+                st.markdown(
+                    f"**{tr('Chapters')}**: {job.result['chapters']} · "
+                    f"**{tr('Audio Duration')}**: {job.result['audio_duration'] / 60:.1f} {tr('minutes')}\n\n"
+                    f"`{job.result['output_dir']}`"
+                )
+            elif job.status == jobs.SUCCEEDED and os.path.exists(job.result["audio_file"]):
+                show_result(
+                    job.result["audio_file"],
+                    job.result["subtitle_file"],
+                    job.result["audio_duration"],
+                    key=job.id,
+                )
+            elif job.status == jobs.FAILED:
                 st.error(tr("Speech synthesis failed"))
 
-# 保存配置
-config.save_config()
+    # 有任务结束时整页重跑一次，之后不再定时刷新
+    active = sum(1 for job in session_jobs if not job.finished)
+    if active < st.session_state.get("jobs_active", 0):
+        st.session_state["jobs_active"] = active
+        st.rerun()
+    st.session_state["jobs_active"] = active
+
+
+# 有任务未结束时每秒只刷新任务列表这一片段，页面其余部分不重跑
+has_active_jobs = any(
+    job is not None and not job.finished
+    for job in map(job_manager.get, st.session_state["job_ids"])
+)
+st.fragment(run_every=1.0 if has_active_jobs else None)(render_jobs)()
+
+st.session_state["last_rerun_ms"] = (time.perf_counter() - _rerun_started) * 1000
+logger.debug(f"webui rerun took {st.session_state['last_rerun_ms']:.1f} ms")
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+WebUI 在所有会话之间共享的资源。
+
+Streamlit 每次交互都会重新执行 Main.py，在脚本内定义的缓存函数每次重跑都要重新计算函数签名，
+因此缓存函数统一放在这个只导入一次的模块里。返回值在会话之间共享，调用方不能修改。
+"""
+import os
+
+import streamlit as st
+
+from app.services import voice
+from app.utils import utils
+
+I18N_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "i18n")
+
+
+@st.cache_resource(show_spinner=False)
+def init_engines() -> None:
+    # 预热各引擎连接（进程内只执行一次，不阻塞页面渲染）
+    voice.warmup_engines()
+
+
+@st.cache_resource(show_spinner=False)
+def get_system_locale() -> str:
+    return utils.get_system_locale()
+
+
+@st.cache_resource(show_spinner=False)
+def get_locales() -> dict:
+    return utils.load_locales(I18N_DIR)
+
+
+@st.cache_resource(show_spinner=False)
+def get_language_options() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """
+    返回 (语言代码, 显示名称)。
+    """
+
+    locales = get_locales()
+    codes = tuple(locales)
+    return codes, tuple(f"{code} - {locales[code].get('Language')}" for code in codes)
+
+
+@st.cache_resource(show_spinner=False)
+def get_translations(language: str) -> dict:
+    return get_locales().get(language, {}).get("Translation", {})
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_region_options(server: str, language: str, catalog_version: float):
+    """
+    返回 (区域代码, 显示名称, 区域代码 -> 下标)，按 (服务器, 界面语言, 目录版本) 缓存。
+    """
+
+    translations = get_translations(language)
+    regions = voice.get_voice_catalog().regions(server)
+    labels = tuple(
+        translations.get(f"region_{region}", f"region_{region}") for region in regions
+    )
+    return regions, labels, {region: i for i, region in enumerate(regions)}
+
+
+@st.cache_resource(max_entries=256, show_spinner=False)
+def get_voice_options(server: str, region: str, language: str, catalog_version: float):
+    """
+    返回 (声音名称, 显示名称, 声音名称 -> 下标)，按 (服务器, 区域, 界面语言, 目录版本) 缓存。
+    """
+
+    translations = get_translations(language)
+    female = translations.get("Female", "Female")
+    male = translations.get("Male", "Male")
+    catalog = voice.get_voice_catalog()
+    if region:
+        voice_ids = tuple(record.voice_id for record in catalog.by_region(server, region))
+    else:
+        voice_ids = catalog.voice_ids(server)
+    labels = tuple(
+        v.replace("Female", female)
+        .replace("Male", male)
+        .replace("Neural", "")
+        .replace("-V2", " V2")
+        for v in voice_ids
+    )
+    return voice_ids, labels, {voice_id: i for i, voice_id in enumerate(voice_ids)}